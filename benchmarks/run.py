@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发包性能基准测试入口
+按 帧长 × 包数 × 发送引擎 × IP改写模式 × 并行进程数 × 目标接口 逐项回放合成抓包文件，
+每一项在独立的子进程中运行，分别统计CPU时间和内存峰值。
+
+    python -m benchmarks.run --interface vA --save benchmarks/baseline.json
+    python -m benchmarks.run --interface vA --compare benchmarks/baseline.json
+
+目标接口可以是veth对的一端或dummy接口（ip link add dummy0 type dummy），发送需要root权限，
+9000字节帧需要把接口MTU调大；也可以是不经网卡的null伪接口，只测量读取、改写和节奏控制的开销。对比时pps下降或每包CPU时间增加超过阈值的项记为回退，
+返回码1；有测试项运行失败时返回码2。
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import ensure_synthetic_pcap
+from network.transmit import ENGINES
+
+# 默认测试的帧长（字节）和包数
+DEFAULT_FRAME_SIZES = (64, 512, 1500, 9000)
+DEFAULT_PACKET_COUNTS = (1000, 100000)
+# --full 时测试的包数
+FULL_PACKET_COUNTS = (1000, 100000, 1000000, 10000000)
+
+# IP改写模式 -> (源IP, 目的IP)
+REWRITE_MODES = {
+    'none': (None, None),
+    'source': ('10.1.1.1', None),
+    'both': ('10.1.1.1', '10.2.2.2'),
+}
+
+# 判定为性能回退的变化幅度（百分比）
+REGRESSION_THRESHOLD = 10.0
+# 单个测试项的超时时间（秒）
+CASE_TIMEOUT = 3600
+# 子进程输出结果的行前缀
+RESULT_MARKER = 'BENCH_RESULT '
+
+# 区分测试项的字段
+CASE_FIELDS = ('frame_size', 'packets', 'engine', 'rewrite', 'workers', 'interface')
+
+def case_key(case: dict) -> str:
+    """测试项的唯一标识，用于与基线对比"""
+    return '/'.join(f"{field}={case[field]}" for field in CASE_FIELDS)
+
+def _rusage_totals() -> tuple:
+    """本进程及已回收子进程的 (CPU时间秒, 内存峰值KB)"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+    return cpu, max(own.ru_maxrss, children.ru_maxrss)
+
+def run_case(case: dict) -> dict:
+    """在当前进程中运行一个测试项（由子进程调用）
+    
+    Args:
+        case: 测试项参数，包含CASE_FIELDS和file
+        
+    Returns:
+        测试结果，失败时包含error
+    """
+    from network.parallel import ParallelPacketSender
+    from network.raw_sender import RawPacketSender
+    from network.pacing import PACING_TOPSPEED
+    
+    result = dict(case)
+    source_ip, dest_ip = REWRITE_MODES[case['rewrite']]
+    options = {'engine': case['engine'], 'pacing': PACING_TOPSPEED}
+    if case['workers'] > 1:
+        sender = ParallelPacketSender(case['workers'], **options)
+    else:
+        sender = RawPacketSender(**options)
+        
+    cpu_before, _ = _rusage_totals()
+    success = sender.send_pcap_file(case['file'], case['interface'], source_ip, dest_ip)
+    cpu_after, peak_rss = _rusage_totals()
+    
+    stats = sender.last_stats
+    if not success or stats is None:
+        result['error'] = "发送失败"
+        return result
+    result.update({
+        'engine_used': stats['engine'],
+        'sent': stats['packets'],
+        'bytes': stats['bytes'],
+        'elapsed': stats['elapsed'],
+        'pps': stats['pps'],
+        'mbps': stats['mbps'],
+        'cpu_seconds': cpu_after - cpu_before,
+        'cpu_per_packet_us': (cpu_after - cpu_before) / stats['packets'] * 1e6 if stats['packets'] else 0.0,
+        # Linux下ru_maxrss的单位是KB
+        'peak_rss_mb': peak_rss / 1024,
+    })
+    return result
+
+def launch_case(case: dict, verbose: bool = False) -> dict:
+    """在独立的子进程中运行一个测试项
+    
+    Args:
+        case: 测试项参数
+        verbose: 是否显示发送器的输出
+        
+    Returns:
+        测试结果，失败时包含error
+    """
+    command = [sys.executable, '-m', 'benchmarks.run', '--run-case', json.dumps(case)]
+    try:
+        completed = subprocess.run(command, cwd=ROOT, stdout=subprocess.PIPE,
+                                   stderr=None if verbose else subprocess.PIPE,
+                                   timeout=CASE_TIMEOUT, text=True)
+    except subprocess.TimeoutExpired:
+        return dict(case, error=f"超时（{CASE_TIMEOUT} 秒）")
+    # 失败时附上发送器最后几行输出，说明失败原因
+    output = (completed.stderr or '').strip().splitlines()[-3:]
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            result = json.loads(line[len(RESULT_MARKER):])
+            if 'error' in result and output:
+                result['error'] += '（' + ' / '.join(output) + '）'
+            return result
+    return dict(case, error=' / '.join(output) if output else f"退出码 {completed.returncode}")
+
+def run_repeated(case: dict, repeat: int, verbose: bool = False) -> dict:
+    """重复运行一个测试项，返回pps为中位数的一次结果"""
+    results = [launch_case(case, verbose) for _ in range(max(repeat, 1))]
+    succeeded = [result for result in results if 'error' not in result]
+    if not succeeded:
+        return results[-1]
+    succeeded.sort(key=lambda result: result['pps'])
+    chosen = dict(succeeded[(len(succeeded) - 1) // 2])
+    if len(succeeded) > 1:
+        chosen['pps_stdev'] = statistics.stdev(result['pps'] for result in succeeded)
+    chosen['runs'] = len(succeeded)
+    return chosen
+
+def build_cases(args) -> List[dict]:
+    """按命令行参数生成测试项列表"""
+    packet_counts = args.packets or (FULL_PACKET_COUNTS if args.full else DEFAULT_PACKET_COUNTS)
+    cases = []
+    for frame_size in args.frame_sizes:
+        for packets in packet_counts:
+            for engine in args.engines:
+                for rewrite in args.rewrite:
+                    for workers in args.workers:
+                        for interface in args.interface:
+                            cases.append({
+                                'frame_size': frame_size,
+                                'packets': packets,
+                                'engine': engine,
+                                'rewrite': rewrite,
+                                'workers': workers,
+                                'interface': interface,
+                            })
+    return cases
+
+def host_info() -> dict:
+    """记录运行环境，便于判断基线是否可比"""
+    info = {
+        'hostname': platform.node(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+    }
+    try:
+        info['commit'] = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True,
+                                        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout.strip()
+    except OSError:
+        pass
+    return info
+
+def _change(old: float, new: float) -> Optional[float]:
+    """变化百分比，基线为0时返回None"""
+    return (new - old) / old * 100 if old else None
+
+def compare(baseline: dict, results: List[dict], threshold: float) -> List[str]:
+    """打印与基线的对比，返回回退的测试项
+    
+    Args:
+        baseline: 基线文件内容
+        results: 本次测试结果
+        threshold: 判定为回退的变化幅度（百分比）
+        
+    Returns:
+        回退的测试项标识列表
+    """
+    previous = {case_key(result): result for result in baseline.get('results', []) if 'error' not in result}
+    regressions = []
+    print(f"\n与基线对比（{baseline.get('created', '未知时间')}，{baseline.get('host', {}).get('commit', '')}）:")
+    for result in results:
+        key = case_key(result)
+        old = previous.get(key)
+        if old is None or 'error' in result:
+            print(f"  {key}: 无可对比的基线")
+            continue
+        pps_change = _change(old['pps'], result['pps'])
+        cpu_change = _change(old['cpu_per_packet_us'], result['cpu_per_packet_us'])
+        rss_change = _change(old['peak_rss_mb'], result['peak_rss_mb'])
+        regressed = ((pps_change is not None and pps_change < -threshold) or
+                     (cpu_change is not None and cpu_change > threshold))
+        if regressed:
+            regressions.append(key)
+        print(f"  {'✗' if regressed else ' '} {key}: "
+              f"{old['pps']:.0f} -> {result['pps']:.0f} pps ({_format_change(pps_change)}), "
+              f"CPU {old['cpu_per_packet_us']:.2f} -> {result['cpu_per_packet_us']:.2f} us/包 ({_format_change(cpu_change)}), "
+              f"内存峰值 {old['peak_rss_mb']:.1f} -> {result['peak_rss_mb']:.1f} MB ({_format_change(rss_change)})")
+    return regressions
+
+def _format_change(change: Optional[float]) -> str:
+    return '-' if change is None else f"{change:+.1f}%"
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    def int_list(text):
+        return [int(item) for item in text.split(',') if item]
+        
+    def str_list(text):
+        return [item for item in text.split(',') if item]
+        
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description="发包性能基准测试")
+    parser.add_argument('--interface', type=str_list, default=None,
+                        help="目标接口，多个用逗号分隔（veth或dummy接口）")
+    parser.add_argument('--frame-sizes', type=int_list, default=list(DEFAULT_FRAME_SIZES),
+                        help="帧长列表（字节），默认 %(default)s")
+    parser.add_argument('--packets', type=int_list, default=None,
+                        help=f"包数列表，默认 {list(DEFAULT_PACKET_COUNTS)}")
+    parser.add_argument('--full', action='store_true',
+                        help=f"测试完整的包数范围 {list(FULL_PACKET_COUNTS)}")
+    parser.add_argument('--engines', type=str_list, default=list(ENGINES),
+                        help="发送引擎列表，默认 %(default)s")
+    parser.add_argument('--rewrite', type=str_list, default=list(REWRITE_MODES),
+                        help="IP改写模式列表，默认 %(default)s")
+    parser.add_argument('--workers', type=int_list, default=[1],
+                        help="并行进程数列表，默认 %(default)s")
+    parser.add_argument('--repeat', type=int, default=3, help="每项重复次数，取pps中位数，默认 %(default)s")
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'playpcap-bench'),
+                        help="合成抓包文件缓存目录，默认 %(default)s")
+    parser.add_argument('--save', metavar='PATH', help="把结果保存为基线JSON文件")
+    parser.add_argument('--compare', metavar='PATH', help="与基线JSON文件对比")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="判定为回退的变化幅度（百分比），默认 %(default)s")
+    parser.add_argument('--verbose', action='store_true', help="显示发送器的输出")
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    
+    if args.run_case is None:
+        if not args.interface:
+            parser.error("需要用 --interface 指定目标接口")
+        for engine in args.engines:
+            if engine not in ENGINES:
+                parser.error(f"未知的发送引擎: {engine}")
+        for rewrite in args.rewrite:
+            if rewrite not in REWRITE_MODES:
+                parser.error(f"未知的IP改写模式: {rewrite}（可选 {', '.join(REWRITE_MODES)}）")
+    return args
+
+def main(argv=None) -> int:
+    """运行基准测试
+    
+    Returns:
+        返回码：0正常，1有性能回退，2有测试项失败
+    """
+    args = parse_args(argv)
+    if args.run_case is not None:
+        # 子进程：发送器的输出转到stderr，stdout只输出结果
+        case = json.loads(args.run_case)
+        stdout = sys.stdout
+        sys.stdout = sys.stderr
+        try:
+            result = run_case(case)
+        except Exception as e:
+            result = dict(case, error=str(e))
+        finally:
+            sys.stdout = stdout
+        print(RESULT_MARKER + json.dumps(result, ensure_ascii=False))
+        return 0
+        
+    cases = build_cases(args)
+    print(f"共 {len(cases)} 个测试项，每项运行 {args.repeat} 次")
+    results = []
+    for index, case in enumerate(cases, 1):
+        case['file'] = ensure_synthetic_pcap(args.workdir, case['frame_size'], case['packets'])
+        result = run_repeated(case, args.repeat, args.verbose)
+        result.pop('file', None)
+        results.append(result)
+        if 'error' in result:
+            print(f"[{index}/{len(cases)}] {case_key(result)}: 失败: {result['error']}")
+        else:
+            print(f"[{index}/{len(cases)}] {case_key(result)}: {result['pps']:.0f} pps, {result['mbps']:.2f} Mbps, "
+                  f"CPU {result['cpu_seconds']:.3f} 秒（{result['cpu_per_packet_us']:.2f} us/包）, "
+                  f"内存峰值 {result['peak_rss_mb']:.1f} MB")
+            
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(json.load(f), results, args.threshold)
+    if args.save:
+        report = {
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'host': host_info(),
+            'results': results,
+        }
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.save}")
+        
+    if any('error' in result for result in results):
+        return 2
+    if regressions:
+        print(f"{len(regressions)} 个测试项性能回退超过 {args.threshold}%")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
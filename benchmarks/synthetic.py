@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成抓包文件生成器
+生成指定帧长和包数的以太网/IPv4/UDP经典pcap文件，源端口轮换产生多条流，便于测试按流分片
+"""
+
+import os
+import struct
+
+from network.pcap_reader import LINKTYPE_ETHERNET, PCAP_MAGIC_USEC
+
+# 帧长范围（字节，不含FCS）：以太网+IPv4+UDP头共42字节，最短帧按以太网最小帧长60字节
+MIN_FRAME_SIZE = 60
+MAX_FRAME_SIZE = 65535
+# 默认轮换的流数
+DEFAULT_FLOWS = 256
+# 相邻数据包的时间戳间隔（微秒）
+DEFAULT_INTERVAL_USEC = 10
+# 每次写入文件的数据包数
+WRITE_BATCH = 4096
+
+_SOURCE_MAC = bytes.fromhex('020000000001')
+_DEST_MAC = bytes.fromhex('020000000002')
+_SOURCE_IP = bytes([192, 168, 100, 1])
+_DEST_IP = bytes([192, 168, 100, 2])
+_DEST_PORT = 9
+
+def _ip_checksum(header: bytes) -> int:
+    """计算IPv4头校验和"""
+    total = sum(struct.unpack(f'!{len(header) // 2}H', header))
+    while total > 0xffff:
+        total = (total & 0xffff) + (total >> 16)
+    return ~total & 0xffff
+
+def build_frame(frame_size: int, flow: int = 0) -> bytes:
+    """构造一个以太网/IPv4/UDP帧
+    
+    Args:
+        frame_size: 帧长（字节）
+        flow: 流编号，决定UDP源端口
+        
+    Returns:
+        帧字节
+    """
+    if not MIN_FRAME_SIZE <= frame_size <= MAX_FRAME_SIZE:
+        raise ValueError(f"帧长必须在 {MIN_FRAME_SIZE}-{MAX_FRAME_SIZE} 字节之间: {frame_size}")
+    ip_length = frame_size - 14
+    header = struct.pack('!BBHHHBBH4s4s', 0x45, 0, ip_length, 0, 0x4000, 64, 17, 0, _SOURCE_IP, _DEST_IP)
+    header = header[:10] + struct.pack('!H', _ip_checksum(header)) + header[12:]
+    # UDP校验和为0表示不校验（IPv4下允许）
+    udp = struct.pack('!HHHH', 10000 + flow % 50000, _DEST_PORT, ip_length - 20, 0)
+    payload = bytes(frame_size - 42)
+    return _DEST_MAC + _SOURCE_MAC + b'\x08\x00' + header + udp + payload
+
+def synthetic_path(directory: str, frame_size: int, packet_count: int) -> str:
+    """返回合成文件在缓存目录中的路径"""
+    return os.path.join(directory, f"synthetic_{frame_size}B_{packet_count}.pcap")
+
+def write_synthetic_pcap(path: str, frame_size: int, packet_count: int, flows: int = DEFAULT_FLOWS,
+                         interval_usec: int = DEFAULT_INTERVAL_USEC) -> str:
+    """生成合成抓包文件
+    
+    先写入临时文件再改名，生成中断时不会留下不完整的文件。
+    
+    Args:
+        path: 输出文件路径
+        frame_size: 帧长（字节）
+        packet_count: 数据包数
+        flows: 轮换的流数
+        interval_usec: 相邻数据包的时间戳间隔（微秒）
+        
+    Returns:
+        输出文件路径
+    """
+    frames = [build_frame(frame_size, flow) for flow in range(max(flows, 1))]
+    record_header = struct.Struct('<IIII')
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb', buffering=1024 * 1024) as f:
+        f.write(struct.pack('<IHHiIII', PCAP_MAGIC_USEC, 2, 4, 0, 0, MAX_FRAME_SIZE, LINKTYPE_ETHERNET))
+        for start in range(0, packet_count, WRITE_BATCH):
+            parts = []
+            for index in range(start, min(start + WRITE_BATCH, packet_count)):
+                usec = index * interval_usec
+                parts.append(record_header.pack(usec // 1000000, usec % 1000000, frame_size, frame_size))
+                parts.append(frames[index % len(frames)])
+            f.write(b''.join(parts))
+    os.replace(temp_path, path)
+    return path
+
+def ensure_synthetic_pcap(directory: str, frame_size: int, packet_count: int) -> str:
+    """返回合成文件路径，缓存目录中没有时先生成
+    
+    Args:
+        directory: 缓存目录
+        frame_size: 帧长（字节）
+        packet_count: 数据包数
+        
+    Returns:
+        合成文件路径
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = synthetic_path(directory, frame_size, packet_count)
+    if not os.path.exists(path):
+        print(f"正在生成合成抓包文件: {path}")
+        write_synthetic_pcap(path, frame_size, packet_count)
+    return path
\ No newline at end of file
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PCAP播放器命令行入口
+不加载Qt界面，按数据库中的设置（可用命令行参数覆盖）回放文件或文件夹，适合在CI等环境中调用。
+
+    python cli.py /data/cases/login --interface eth1 --json
+
+返回码：0全部发送成功，1有文件发送失败，2参数或设置错误，130被中断。
+加上--json时发送器的输出转到stderr，stdout只输出一行JSON格式的汇总。
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager
+from network.compression import walk_capture_files
+from network.job import SendJob, read_send_settings, target_interfaces
+
+EXIT_OK = 0
+EXIT_SEND_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+def collect_files(paths) -> list:
+    """把命令行中的文件和文件夹展开为抓包文件列表，文件夹中的文件（含各级子文件夹）按名称排序"""
+    pcap_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            pcap_files.extend(walk_capture_files(path))
+        elif os.path.isfile(path):
+            pcap_files.append(path)
+        else:
+            raise FileNotFoundError(f"文件或文件夹不存在: {path}")
+    return pcap_files
+
+def parse_args(argv=None):
+    """解析命令行参数，未指定的参数使用数据库中的设置"""
+    parser = argparse.ArgumentParser(
+        description="PCAP播放器命令行回放（不加载界面）。未指定的参数使用数据库中保存的设置。")
+    parser.add_argument('paths', nargs='+', help="要发送的抓包文件或文件夹")
+    parser.add_argument('--db', default="pcap_player.db", help="设置数据库路径，默认 %(default)s")
+    parser.add_argument('-i', '--interface',
+                        help="网络接口，多个用逗号分隔时同时发送到所有接口；也可以是null或pcap:<文件路径>伪接口")
+    parser.add_argument('--source-ip', help="改写源IP地址，空字符串表示不改写")
+    parser.add_argument('--dest-ip', help="改写目的IP地址，空字符串表示不改写")
+    parser.add_argument('--engine', help="发送引擎（scapy、afpacket、sendmmsg、txring）")
+    parser.add_argument('--batch-size', type=int, help="sendmmsg/TX_RING批量大小")
+    parser.add_argument('--pacing', help="速率模式（default、topspeed、pps、mbps、multiplier）")
+    parser.add_argument('--rate', type=float, help="pps/Mbps模式下的目标速率，倍速模式下的倍速")
+    parser.add_argument('--loop', type=int, help="循环次数，0为不限")
+    parser.add_argument('--duration', type=int, help="最长循环时间（秒），0为不限")
+    parser.add_argument('--workers', type=int, help="并行发送进程数")
+    parser.add_argument('--prefetch', type=int, help="预读内存上限（MB），0为不预读")
+    parser.add_argument('--telemetry-dir', help="遥测导出目录，空字符串表示不导出")
+    parser.add_argument('--json', action='store_true', help="在stdout输出JSON格式的汇总")
+    parser.add_argument('-q', '--quiet', action='store_true', help="不输出发送过程信息")
+    return parser.parse_args(argv)
+
+def build_job_options(args, db_manager) -> dict:
+    """合并数据库设置和命令行参数，返回SendJob的参数（不含文件列表）"""
+    settings = read_send_settings(db_manager)
+    send_options = settings['send_options']
+    for key, value in (('engine', args.engine), ('batch_size', args.batch_size),
+                       ('pacing', args.pacing), ('rate', args.rate)):
+        if value is not None:
+            send_options[key] = value
+            
+    if args.interface:
+        interfaces = target_interfaces(*_split_interfaces(args.interface))
+    else:
+        network_interface = db_manager.get_setting('network_interface')
+        if not network_interface:
+            raise ValueError("没有设置网络接口，请用--interface指定或在界面的设置页面中配置")
+        interfaces = target_interfaces(network_interface, settings['fanout_interfaces'])
+        
+    return {
+        'network_interface': interfaces,
+        'source_ip': args.source_ip if args.source_ip is not None else db_manager.get_setting('source_ip'),
+        'dest_ip': args.dest_ip if args.dest_ip is not None else db_manager.get_setting('dest_ip'),
+        'send_options': send_options,
+        'loop_count': args.loop if args.loop is not None else settings['loop_count'],
+        'loop_duration': args.duration if args.duration is not None else settings['loop_duration'],
+        'workers': args.workers if args.workers is not None else settings['workers'],
+        'prefetch_budget': (args.prefetch * 1024 * 1024 if args.prefetch is not None
+                            else settings['prefetch_budget']),
+        'telemetry_dir': args.telemetry_dir if args.telemetry_dir is not None else settings['telemetry_dir'],
+    }
+
+def _split_interfaces(text: str) -> tuple:
+    """把逗号分隔的接口列表拆成 (主接口, 其余接口)"""
+    interfaces = [item.strip() for item in text.split(',') if item.strip()]
+    if not interfaces:
+        raise ValueError("网络接口不能为空")
+    return interfaces[0], interfaces[1:]
+
+def summarize(job: SendJob, success: bool, message: str, elapsed: float) -> dict:
+    """汇总发送结果"""
+    packets, byte_count = job.progress.sample()
+    files = []
+    for result in job.results:
+        entry = {'file': result['file'], 'success': result['success']}
+        stats = result['stats']
+        if stats is not None:
+            entry.update({key: stats[key] for key in ('packets', 'bytes', 'elapsed', 'pps', 'mbps') if key in stats})
+        files.append(entry)
+    return {
+        'success': success,
+        'message': message,
+        'interfaces': job.interfaces,
+        'files_total': len(job.pcap_files),
+        'files_sent': sum(1 for result in job.results if result['success']),
+        'packets': packets,
+        'bytes': byte_count,
+        'elapsed': elapsed,
+        'pps': packets / elapsed if elapsed > 0 else 0.0,
+        'mbps': byte_count * 8 / elapsed / 1e6 if elapsed > 0 else 0.0,
+        'files': files,
+    }
+
+def main(argv=None) -> int:
+    """命令行主函数
+    
+    Returns:
+        进程返回码
+    """
+    args = parse_args(argv)
+    # --json时stdout只留给汇总，发送器的输出转到stderr
+    log = open(os.devnull, 'w') if args.quiet else sys.stderr if args.json else sys.stdout
+    stdout = sys.stdout
+    summary = None
+    try:
+        db_manager = DatabaseManager(args.db)
+        db_manager.init_database()
+        options = build_job_options(args, db_manager)
+        telemetry_dir = options.pop('telemetry_dir')
+        pcap_files = collect_files(args.paths)
+        if not pcap_files:
+            raise ValueError("没有找到抓包文件")
+            
+        sys.stdout = log
+        job = SendJob(pcap_files, telemetry=bool(telemetry_dir), **options)
+        job.file_started = lambda pcap_file: print(f"正在发送: {pcap_file}")
+        start = time.perf_counter()
+        try:
+            success, message = job.run()
+        except Exception as e:
+            success, message = False, f"发包过程中出现错误: {str(e)}"
+        summary = summarize(job, success, message, time.perf_counter() - start)
+        if job.telemetry is not None:
+            job.telemetry.finish()
+            summary['telemetry'] = job.telemetry.export(telemetry_dir, final=True)
+        print(("✓ " if success else "✗ ") + message)
+        exit_code = EXIT_OK if success else EXIT_SEND_FAILED
+    except KeyboardInterrupt:
+        exit_code = EXIT_INTERRUPTED
+    except (ValueError, OSError, ImportError) as e:
+        sys.stdout = stdout
+        print(f"错误: {str(e)}", file=sys.stderr)
+        exit_code = EXIT_USAGE
+    finally:
+        sys.stdout = stdout
+        if log not in (sys.stdout, sys.stderr):
+            log.close()
+            
+    if args.json:
+        summary = summary or {'success': False}
+        summary['exit_code'] = exit_code
+        print(json.dumps(summary, ensure_ascii=False))
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -2,12 +2,21 @@
 # -*- coding: utf-8 -*-
 """
 数据库管理器
-用于管理SQLite数据库，存储应用程序设置和文件夹别名
+用于管理SQLite数据库，存储应用程序设置、文件夹别名和PCAP文件摘要索引
 """
 
 import sqlite3
 import os
-from typing import Optional, List, Tuple
+from typing import Dict, Iterable, Optional, List, Tuple
+
+# pcap_index表中的摘要字段
+PCAP_INDEX_FIELDS = ('packet_count', 'byte_count', 'duration', 'linktype',
+                     'first_timestamp', 'last_timestamp', 'error')
+
+def _subtree_range(folder_path: str) -> Tuple[str, str]:
+    """返回文件夹下所有路径所在的范围 [low, high)，可以用上path列的主键索引"""
+    low = os.path.join(folder_path, '')
+    return low, low[:-1] + chr(ord(low[-1]) + 1)
 
 class DatabaseManager:
     """数据库管理器"""
@@ -47,12 +56,39 @@ class DatabaseManager:
             )
         ''')
         
+        # 创建PCAP文件摘要索引表，文件大小和修改时间不变时直接使用缓存的摘要
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS pcap_index (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                packet_count INTEGER NOT NULL,
+                byte_count INTEGER NOT NULL,
+                duration REAL NOT NULL,
+                linktype INTEGER,
+                first_timestamp REAL,
+                last_timestamp REAL,
+                error TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
         # 插入默认设置
         default_settings = [
             ('target_folder', ''),
             ('network_interface', ''),
+            ('fanout_interfaces', ''),
             ('source_ip', ''),
             ('dest_ip', ''),
+            ('send_engine', 'scapy'),
+            ('batch_size', '64'),
+            ('pacing_mode', 'default'),
+            ('pacing_rate', '1.0'),
+            ('loop_count', '1'),
+            ('loop_duration', '0'),
+            ('send_workers', '1'),
+            ('prefetch_budget', '256'),
+            ('telemetry_dir', ''),
         ]
         
         for key, value in default_settings:
@@ -161,5 +197,147 @@ class DatabaseManager:
         
         cursor.execute('DELETE FROM folder_aliases WHERE folder_path = ?', (folder_path,))
         
+        conn.commit()
+        conn.close()
+    
+    def get_pcap_index(self, paths: Iterable[str]) -> Dict[str, dict]:
+        """批量获取PCAP文件摘要
+        
+        Args:
+            paths: 文件路径列表
+            
+        Returns:
+            {文件路径: 摘要字典}，摘要字典包含size、mtime_ns和PCAP_INDEX_FIELDS中的字段，
+            没有缓存的文件不在结果中
+        """
+        paths = list(paths)
+        results = {}
+        if not paths:
+            return results
+            
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        columns = ', '.join(('path', 'size', 'mtime_ns') + PCAP_INDEX_FIELDS)
+        # 分批查询，避免超出SQLite的参数个数限制
+        for start in range(0, len(paths), 500):
+            batch = paths[start:start + 500]
+            placeholders = ', '.join('?' * len(batch))
+            cursor.execute(f'SELECT {columns} FROM pcap_index WHERE path IN ({placeholders})', batch)
+            for row in cursor.fetchall():
+                results[row[0]] = dict(zip(('size', 'mtime_ns') + PCAP_INDEX_FIELDS, row[1:]))
+                
+        conn.close()
+        return results
+    
+    def set_pcap_index(self, path: str, size: int, mtime_ns: int, summary: dict):
+        """保存PCAP文件摘要
+        
+        Args:
+            path: 文件路径
+            size: 扫描时的文件大小
+            mtime_ns: 扫描时的文件修改时间（纳秒）
+            summary: 摘要字典，包含PCAP_INDEX_FIELDS中的字段，error为无法读取的原因，缺少的字段记为空
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        columns = ', '.join(('path', 'size', 'mtime_ns') + PCAP_INDEX_FIELDS)
+        placeholders = ', '.join('?' * (len(PCAP_INDEX_FIELDS) + 3))
+        cursor.execute(f'''
+            INSERT OR REPLACE INTO pcap_index ({columns}, updated_at)
+            VALUES ({placeholders}, CURRENT_TIMESTAMP)
+        ''', (path, size, mtime_ns) + tuple(summary.get(field) for field in PCAP_INDEX_FIELDS))
+        
+        conn.commit()
+        conn.close()
+    
+    def delete_pcap_index(self, paths: Iterable[str]):
+        """删除PCAP文件摘要（文件已被删除或改名时）
+        
+        Args:
+            paths: 文件路径列表
+        """
+        paths = list(paths)
+        if not paths:
+            return
+            
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.executemany('DELETE FROM pcap_index WHERE path = ?', ((path,) for path in paths))
+        
+        conn.commit()
+        conn.close()
+    
+    def get_pcap_index_under(self, folder_path: str, recursive: bool = True) -> Dict[str, dict]:
+        """获取文件夹中所有PCAP文件的摘要
+        
+        Args:
+            folder_path: 文件夹路径
+            recursive: 是否包含各级子文件夹中的文件
+            
+        Returns:
+            {文件路径: 摘要字典}，格式同get_pcap_index
+        """
+        low, high = _subtree_range(folder_path)
+        columns = ', '.join(('path', 'size', 'mtime_ns') + PCAP_INDEX_FIELDS)
+        query = f'SELECT {columns} FROM pcap_index WHERE path >= ? AND path < ?'
+        params = [low, high]
+        if not recursive:
+            query += ' AND instr(substr(path, ?), ?) = 0'
+            params += [len(low) + 1, os.sep]
+            
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute(query, params)
+        results = {row[0]: dict(zip(('size', 'mtime_ns') + PCAP_INDEX_FIELDS, row[1:])) for row in cursor.fetchall()}
+        
+        conn.close()
+        return results
+    
+    def get_folder_summaries(self, parent_folder: str) -> Dict[str, dict]:
+        """按子文件夹汇总索引中的PCAP文件摘要（含各级子文件夹中的文件），用于文件夹展开前的显示
+        
+        Args:
+            parent_folder: 父文件夹路径
+            
+        Returns:
+            {子文件夹路径: 汇总字典}，汇总字典包含file_count、packet_count、byte_count、duration
+            和indexed_count（能读取的文件数），索引中没有文件的子文件夹不在结果中
+        """
+        low, high = _subtree_range(parent_folder)
+        start = len(low) + 1
+        
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        # 按路径中父文件夹之后的第一级分组，直接在父文件夹中的文件不计入
+        cursor.execute('''
+            SELECT substr(path, 1, ? + instr(substr(path, ?), ?) - 2) AS folder, count(*),
+                   sum(packet_count), sum(byte_count), sum(duration), sum(error IS NULL)
+            FROM pcap_index
+            WHERE path >= ? AND path < ? AND instr(substr(path, ?), ?) > 0
+            GROUP BY folder
+        ''', (start, start, os.sep, low, high, start, os.sep))
+        fields = ('file_count', 'packet_count', 'byte_count', 'duration', 'indexed_count')
+        results = {row[0]: dict(zip(fields, row[1:])) for row in cursor.fetchall()}
+        
+        conn.close()
+        return results
+    
+    def delete_pcap_index_under(self, folder_path: str):
+        """删除文件夹中所有PCAP文件的摘要（文件夹已被删除或改名时）
+        
+        Args:
+            folder_path: 文件夹路径
+        """
+        low, high = _subtree_range(folder_path)
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('DELETE FROM pcap_index WHERE path >= ? AND path < ?', (low, high))
+        
         conn.commit()
         conn.close()
\ No newline at end of file
@@ -3,34 +3,60 @@
 """
 PCAP播放器主程序
 类似于科来数据包播放器，增加了文件夹列表功能
+
+加上 --startup-timing 参数时，在后台预加载完成后输出启动各阶段的耗时。
 """
 
+import importlib
 import sys
 import os
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import Qt
-from ui.main_window import MainWindow
-from database.db_manager import DatabaseManager
+from ui.startup import startup_timer
+
+# 启动时按顺序导入的模块，逐个计时，每项只包含之前没有导入过的部分
+STARTUP_IMPORTS = (
+    'PyQt5.QtWidgets',
+    'database.db_manager',
+    'network.job',
+    'ui.settings_page',
+    'ui.home_page',
+    'ui.main_window',
+)
 
 def main():
     """主函数"""
+    if '--startup-timing' in sys.argv:
+        sys.argv.remove('--startup-timing')
+        startup_timer.enabled = True
+        
+    for module in STARTUP_IMPORTS:
+        with startup_timer.measure(f"导入 {module}"):
+            importlib.import_module(module)
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import Qt
+    from ui.main_window import MainWindow
+    from database.db_manager import DatabaseManager
+    
     # 设置高DPI支持（必须在创建QApplication之前）
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
     QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
     
     # 创建应用程序
-    app = QApplication(sys.argv)
-    app.setApplicationName("PCAP播放器")
-    app.setApplicationVersion("1.0.0")
-    
+    with startup_timer.measure("创建QApplication"):
+        app = QApplication(sys.argv)
+        app.setApplicationName("PCAP播放器")
+        app.setApplicationVersion("1.0.0")
+        
     # 初始化数据库
-    db_manager = DatabaseManager()
-    db_manager.init_database()
-    
+    with startup_timer.measure("初始化数据库"):
+        db_manager = DatabaseManager()
+        db_manager.init_database()
+        
     # 创建主窗口
-    main_window = MainWindow()
-    main_window.show()
-    
+    with startup_timer.measure("创建主窗口"):
+        main_window = MainWindow()
+    with startup_timer.measure("显示主窗口"):
+        main_window.show()
+        
     # 运行应用程序
     sys.exit(app.exec_())
 
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+压缩抓包文件支持
+按扩展名透明解压.gz/.xz/.zst抓包文件，解压在后台线程中提前进行
+"""
+
+import gzip
+import lzma
+import os
+import queue
+import struct
+import threading
+from typing import Optional
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# 支持的压缩扩展名
+COMPRESSED_SUFFIXES = ('.gz', '.xz', '.zst')
+
+# 文件夹扫描时识别的抓包文件扩展名
+CAPTURE_FILE_SUFFIXES = ('.pcap', '.pcapng') + tuple(
+    f'.{ext}{suffix}' for ext in ('pcap', 'pcapng') for suffix in COMPRESSED_SUFFIXES)
+
+# 后台解压每次产出的数据块大小（字节）
+READ_AHEAD_CHUNK = 1024 * 1024
+# 后台解压最多领先读取方的数据块数
+READ_AHEAD_DEPTH = 8
+
+# 无法从文件中得到解压后大小时，按该倍数估算
+COMPRESSION_RATIO_ESTIMATE = 4
+
+def is_capture_file(name: str) -> bool:
+    """按文件名判断是否为抓包文件（含.gz/.xz/.zst压缩文件，不含隐藏文件）"""
+    return not name.startswith('.') and name.lower().endswith(CAPTURE_FILE_SUFFIXES)
+
+def scan_folder(folder_path: str) -> tuple:
+    """只读取一次目录，返回 (子文件夹路径列表, 抓包文件的os.DirEntry列表)"""
+    folders, files = [], []
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                folders.append(entry.path)
+            elif is_capture_file(entry.name) and entry.is_file():
+                files.append(entry)
+    return folders, files
+
+def walk_capture_files(folder_path: str) -> list:
+    """递归列出文件夹及各级子文件夹中的抓包文件
+    
+    每个文件夹中先列出按名称排序的文件，再按名称顺序进入子文件夹；无法读取的文件夹跳过。
+    """
+    pcap_files = []
+    for root, folders, files in os.walk(folder_path):
+        folders.sort()
+        pcap_files.extend(os.path.join(root, name) for name in sorted(files) if is_capture_file(name))
+    return pcap_files
+
+def is_compressed(path: str) -> bool:
+    """按扩展名判断文件是否为压缩文件"""
+    return path.lower().endswith(COMPRESSED_SUFFIXES)
+
+def _open_decompressor(path: str):
+    """按扩展名打开解压流，非压缩文件返回None"""
+    name = path.lower()
+    if name.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if name.endswith('.xz'):
+        return lzma.open(path, 'rb')
+    if name.endswith('.zst'):
+        if not ZSTD_AVAILABLE:
+            raise ImportError("读取.zst文件需要安装zstandard库: pip install zstandard")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return None
+
+def open_stream(path: str, buffering: int = -1, read_ahead: bool = True):
+    """打开抓包文件的字节流，压缩文件自动解压
+    
+    Args:
+        path: 文件路径
+        buffering: 非压缩文件的读缓冲区大小
+        read_ahead: 压缩文件是否在后台线程中提前解压
+        
+    Returns:
+        提供read/close方法的只读字节流
+    """
+    stream = _open_decompressor(path)
+    if stream is None:
+        return open(path, 'rb', buffering=buffering)
+    if read_ahead:
+        return ReadAheadReader(stream, path)
+    return stream
+
+def estimate_uncompressed_size(path: str) -> int:
+    """估算文件解压后的大小（字节）
+    
+    gzip文件读取尾部记录的原始长度，其他压缩格式按COMPRESSION_RATIO_ESTIMATE估算，
+    非压缩文件返回文件大小。
+    
+    Args:
+        path: 文件路径
+        
+    Returns:
+        估算的解压后大小
+    """
+    size = os.path.getsize(path)
+    if not is_compressed(path):
+        return size
+    if path.lower().endswith('.gz') and size >= 4:
+        with open(path, 'rb') as f:
+            f.seek(-4, os.SEEK_END)
+            # 尾部只记录原始长度的低32位，比压缩文件还小说明已经回绕
+            original = struct.unpack('<I', f.read(4))[0]
+        if original >= size:
+            return original
+    return size * COMPRESSION_RATIO_ESTIMATE
+
+class ReadAheadReader:
+    """后台解压的只读字节流
+    
+    后台线程不断从解压流读取固定大小的数据块放入有界队列，读取方只做切片，
+    解压与发送并行进行。zlib、lzma和zstandard解压时都会释放GIL，
+    不会拖慢发送线程。队列已满时后台线程等待，内存占用不超过
+    READ_AHEAD_DEPTH个数据块。
+    """
+    
+    def __init__(self, stream, name: str, chunk_size: int = READ_AHEAD_CHUNK,
+                 depth: int = READ_AHEAD_DEPTH):
+        """启动后台解压线程
+        
+        Args:
+            stream: 解压流，由后台线程负责关闭
+            name: 文件名
+            chunk_size: 每次解压的数据块大小
+            depth: 队列中最多缓存的数据块数
+        """
+        self.name = name
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._queue = queue.Queue(depth)
+        self._chunk = b''
+        self._pos = 0
+        self._eof = False
+        self._error: Optional[Exception] = None
+        self._closed = threading.Event()
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='pcap-decompress', daemon=True)
+        self._thread.start()
+        
+    def _run(self):
+        """后台线程：解压数据块并放入队列，结束时放入None"""
+        try:
+            while not self._closed.is_set():
+                chunk = self._stream.read(self._chunk_size)
+                if not chunk:
+                    break
+                self._put(chunk)
+        except Exception as e:
+            self._error = e
+        finally:
+            self._put(None)
+            self._stream.close()
+            self._finished.set()
+            
+    def _put(self, item):
+        """放入队列，读取方关闭后放弃"""
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+                
+    def _next_chunk(self) -> Optional[bytes]:
+        """取下一个解压好的数据块，结束时返回None"""
+        if self._eof:
+            return None
+        chunk = self._queue.get()
+        if chunk is None:
+            self._eof = True
+            if self._error is not None:
+                raise OSError(f"解压文件时出错: {self.name}: {self._error}")
+        return chunk
+        
+    def read(self, size: int = -1) -> bytes:
+        """读取最多size字节，size为负数时读到文件末尾"""
+        chunk = self._chunk
+        pos = self._pos
+        end = pos + size
+        if 0 <= size and end <= len(chunk):
+            # 常见情况：当前数据块中剩余的字节足够
+            self._pos = end
+            return chunk[pos:end]
+            
+        parts = [chunk[pos:]]
+        have = len(parts[0])
+        self._chunk = b''
+        self._pos = 0
+        while size < 0 or have < size:
+            chunk = self._next_chunk()
+            if chunk is None:
+                break
+            need = size - have
+            if 0 <= size and len(chunk) > need:
+                parts.append(chunk[:need])
+                self._chunk = chunk
+                self._pos = need
+                break
+            parts.append(chunk)
+            have += len(chunk)
+        return b''.join(parts)
+        
+    def readinto(self, buffer) -> int:
+        """把数据读入可写缓冲区，直到填满或文件结束
+        
+        Returns:
+            读入的字节数
+        """
+        size = len(buffer)
+        filled = 0
+        while filled < size:
+            chunk = self._chunk
+            pos = self._pos
+            if pos >= len(chunk):
+                chunk = self._next_chunk()
+                if chunk is None:
+                    break
+                self._chunk = chunk
+                self._pos = 0
+                continue
+            count = min(len(chunk) - pos, size - filled)
+            buffer[filled:filled + count] = memoryview(chunk)[pos:pos + count]
+            self._pos = pos + count
+            filled += count
+        return filled
+        
+    def close(self):
+        """停止后台解压"""
+        self._closed.set()
+        # 用Event等待而不是join：在QThread中调用join会创建_DummyThread，
+        # 之后fork出的工作进程在退出时会因为threading._shutdown断言失败而返回退出码1
+        self._finished.wait(timeout=1.0)
+        
+    @property
+    def closed(self) -> bool:
+        return self._closed.is_set()
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
\ No newline at end of file
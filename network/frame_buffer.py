@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内存帧缓冲区
+把一个文件的所有帧一次性装入连续内存，供循环回放反复发送
+"""
+
+import mmap
+import os
+import tempfile
+from array import array
+from typing import Iterable, Iterator, Tuple
+
+# 共享帧文件所在的目录：Linux下放在内存文件系统中，其他系统放在临时目录
+SHARED_FRAME_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+# 共享帧文件中偏移数组和时间戳数组每项的字节数
+_TABLE_ITEM_SIZE = 8
+
+class FrameBuffer:
+    """连续内存帧缓冲区
+    
+    所有帧字节首尾相接存放在一个bytearray中，另用偏移数组和时间戳数组记录
+    每帧的位置，比逐帧保存bytes对象节省大量对象开销。迭代时返回
+    (时间戳秒, memoryview) 元组，发送时不再复制帧数据。
+    缓冲区可以写入共享帧文件（save_shared），其他进程映射该文件（open_shared）后直接使用，
+    不经进程间管道序列化和复制帧数据；映射得到的缓冲区是只读的。
+    """
+    
+    def __init__(self):
+        self._data = bytearray()
+        # 第i帧位于 _offsets[i]:_offsets[i+1]
+        self._offsets = array('Q', [0])
+        self._timestamps = array('d')
+        self._mmap = None
+        # 映射期间无法删除（Windows）、需要在关闭时删除的共享帧文件
+        self._shared_path = None
+        
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[float, bytes]]) -> 'FrameBuffer':
+        """从 (时间戳, 帧字节) 序列构建缓冲区
+        
+        Args:
+            records: 帧记录序列，如PcapRecordReader
+            
+        Returns:
+            装满帧数据的缓冲区
+        """
+        buffer = cls()
+        buffer.extend(records)
+        return buffer
+        
+    def extend(self, records: Iterable[Tuple[float, bytes]]):
+        """追加一批帧
+        
+        Args:
+            records: 帧记录序列
+        """
+        data = self._data
+        offsets = self._offsets
+        timestamps = self._timestamps
+        for timestamp, frame in records:
+            data += frame
+            offsets.append(len(data))
+            timestamps.append(timestamp)
+            
+    def save_shared(self) -> Tuple[str, int, int]:
+        """把帧写入共享帧文件
+        
+        文件依次存放偏移数组、时间戳数组和帧数据。文件由打开它的一方负责删除
+        （open_shared的remove参数或discard_shared_frames）。
+        
+        Returns:
+            可以传给其他进程的句柄 (文件路径, 帧数, 帧数据字节数)
+        """
+        fd, path = tempfile.mkstemp(prefix='playpcap-frames-', dir=SHARED_FRAME_DIR)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self._offsets)
+                f.write(self._timestamps)
+                f.write(self._data)
+        except BaseException:
+            discard_shared_frames((path, 0, 0))
+            raise
+        return path, len(self), len(self._data)
+        
+    @classmethod
+    def open_shared(cls, handle: Tuple[str, int, int], remove: bool = False) -> 'FrameBuffer':
+        """只读映射save_shared写入的共享帧文件
+        
+        Args:
+            handle: save_shared返回的句柄
+            remove: 是否由本进程删除文件。映射后立即删除，进程异常退出也不会留下文件；
+                    映射期间不能删除文件的系统（Windows）上在close时删除
+                    
+        Returns:
+            映射文件的帧缓冲区，用完后调用close释放
+        """
+        path, count, data_size = handle
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        offsets_end = (count + 1) * _TABLE_ITEM_SIZE
+        data_start = offsets_end + count * _TABLE_ITEM_SIZE
+        buffer = cls()
+        buffer._offsets = view[:offsets_end].cast('Q')
+        buffer._timestamps = view[offsets_end:data_start].cast('d')
+        buffer._data = view[data_start:data_start + data_size]
+        buffer._mmap = mapped
+        if remove:
+            try:
+                os.remove(path)
+            except OSError:
+                buffer._shared_path = path
+        return buffer
+        
+    def close(self):
+        """释放映射的共享帧文件，普通缓冲区不需要调用"""
+        mapped, self._mmap = self._mmap, None
+        if mapped is None:
+            return
+        self._data = bytearray()
+        self._offsets = array('Q', [0])
+        self._timestamps = array('d')
+        try:
+            mapped.close()
+        except BufferError:
+            # 还有帧视图在使用，映射在视图都释放后由垃圾回收解除
+            pass
+        if self._shared_path is not None:
+            discard_shared_frames((self._shared_path, 0, 0))
+            self._shared_path = None
+            
+    def __len__(self) -> int:
+        return len(self._timestamps)
+        
+    @property
+    def total_bytes(self) -> int:
+        """所有帧的总字节数"""
+        return len(self._data)
+        
+    @property
+    def first_timestamp(self) -> float:
+        """首帧的抓包时间戳"""
+        return self._timestamps[0] if self._timestamps else 0.0
+        
+    @property
+    def duration(self) -> float:
+        """首帧到末帧的抓包时间跨度（秒）"""
+        if not self._timestamps:
+            return 0.0
+        return self._timestamps[-1] - self._timestamps[0]
+        
+    def frame(self, index: int) -> memoryview:
+        """返回第index帧的只读视图"""
+        return memoryview(self._data)[self._offsets[index]:self._offsets[index + 1]].toreadonly()
+        
+    def __iter__(self) -> Iterator[Tuple[float, memoryview]]:
+        view = memoryview(self._data).toreadonly()
+        offsets = self._offsets
+        start = 0
+        for index, timestamp in enumerate(self._timestamps):
+            end = offsets[index + 1]
+            yield timestamp, view[start:end]
+            start = end
+
+def discard_shared_frames(handle: Tuple[str, int, int]):
+    """删除共享帧文件（不再使用或已删除时忽略）"""
+    try:
+        os.remove(handle[0])
+    except OSError:
+        pass
\ No newline at end of file
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发送任务
+把一组抓包文件按设置发送到一个或多个接口，不依赖Qt，界面的发包线程和命令行入口共用
+"""
+
+import contextlib
+import os
+from typing import Callable, List, Optional, Tuple
+
+from .progress import SendProgress
+
+def read_send_settings(db_manager) -> dict:
+    """从数据库设置中读取发送参数（网络接口和IP地址由调用方读取）
+    
+    Args:
+        db_manager: 提供get_setting方法的数据库管理器
+        
+    Returns:
+        字典，包含send_options（传给发送器的参数）、loop_count、loop_duration（秒）、
+        workers、prefetch_budget（字节）、fanout_interfaces（扇出接口列表）和
+        telemetry_dir（未设置或目录不存在时为空字符串）
+    """
+    get_setting = db_manager.get_setting
+    send_options = {'engine': get_setting('send_engine') or 'scapy'}
+    batch_size = get_setting('batch_size')
+    if batch_size and batch_size.isdigit():
+        send_options['batch_size'] = int(batch_size)
+    send_options['pacing'] = get_setting('pacing_mode') or 'default'
+    try:
+        send_options['rate'] = float(get_setting('pacing_rate') or 0)
+    except ValueError:
+        send_options['rate'] = 0.0
+        
+    def number(key: str, default: int) -> int:
+        value = get_setting(key)
+        return int(value) if value and value.isdigit() else default
+        
+    telemetry_dir = get_setting('telemetry_dir') or ''
+    return {
+        'send_options': send_options,
+        'loop_count': number('loop_count', 1),
+        'loop_duration': number('loop_duration', 0),
+        'workers': number('send_workers', 1),
+        'prefetch_budget': number('prefetch_budget', 0) * 1024 * 1024,
+        'fanout_interfaces': [item for item in (get_setting('fanout_interfaces') or '').split(',') if item],
+        'telemetry_dir': telemetry_dir if os.path.isdir(telemetry_dir) else '',
+    }
+
+def target_interfaces(network_interface: str, fanout_interfaces: List[str]) -> List[str]:
+    """返回本次发送的所有目标接口（主接口加上扇出接口，去掉重复）"""
+    return list(dict.fromkeys([network_interface] + list(fanout_interfaces)))
+
+class SendJob:
+    """一次发包任务
+    
+    按接口数和进程数选择发送器：多个接口时每个文件扇出到所有接口，进程数大于1时按流分片，
+    否则单进程发送原始字节；只导入所选发送器需要的模块。
+    已发包数和字节数由发送会话（或工作进程的共享计数）累计在progress中，
+    调用方可以在其他线程定时读取。
+    """
+    
+    def __init__(self, pcap_files: List[str], network_interface, source_ip: Optional[str],
+                 dest_ip: Optional[str] = None, send_options: Optional[dict] = None, loop_count: int = 1,
+                 loop_duration: float = 0, workers: int = 1, prefetch_budget: int = 0, telemetry: bool = False):
+        """创建发送器
+        
+        Args:
+            pcap_files: 按发送顺序排列的文件列表
+            network_interface: 网络接口名称，或同时发送的接口列表
+            source_ip: 可选的源IP地址
+            dest_ip: 可选的目的IP地址
+            send_options: 发送器参数（engine、batch_size、pacing、rate）
+            loop_count: 循环次数，0为不限
+            loop_duration: 最长循环时间（秒），0为不限
+            workers: 并行发送进程数
+            prefetch_budget: 发送多个文件时预读后续文件的内存上限（字节），0为不预读
+            telemetry: 是否记录发送遥测
+        """
+        self.pcap_files = list(pcap_files)
+        # 可以是一个接口名，也可以是同时发送的接口列表
+        self.interfaces = [network_interface] if isinstance(network_interface, str) else list(network_interface)
+        self.network_interface = self.interfaces[0]
+        self.source_ip = source_ip
+        self.dest_ip = dest_ip
+        self.send_options = send_options or {}
+        # 循环次数（0为不限）和最长循环时间（秒，0为不限）
+        self.loop_count = loop_count
+        self.loop_duration = loop_duration
+        self.workers = workers
+        self.prefetch_budget = prefetch_budget if workers <= 1 else 0
+        # 不需要改写IP时走原始字节快速路径，否则自动回退到scapy路径
+        if len(self.interfaces) > 1:
+            # 每个文件只读取一次，由每个接口各自的进程同时发送
+            from .parallel import FanoutPacketSender
+            self.packet_sender = FanoutPacketSender(**self.send_options)
+        elif workers > 1:
+            # 多进程按流分片发送，进度由工作进程计数汇总
+            from .parallel import ParallelPacketSender
+            self.packet_sender = ParallelPacketSender(workers, **self.send_options)
+        else:
+            from .raw_sender import RawPacketSender
+            self.packet_sender = RawPacketSender(**self.send_options)
+        self.progress = SendProgress()
+        self.packet_sender.progress = self.progress
+        # 可选的遥测记录（发送耗时直方图、错误统计、速率时间线）
+        self.telemetry = self.packet_sender.enable_telemetry() if telemetry else None
+        # 开始发送一个文件时调用 file_started(文件路径)
+        self.file_started: Optional[Callable[[str], None]] = None
+        # 发送完一个文件时调用 file_finished(已完成文件数, 文件总数)
+        self.file_finished: Optional[Callable[[int, int], None]] = None
+        # 每个已发送文件的结果：{'file': 路径, 'success': 是否成功, 'stats': 发送器的速率统计}
+        self.results: List[dict] = []
+        
+    def run(self) -> Tuple[bool, str]:
+        """执行发送任务
+        
+        Returns:
+            (是否全部发送成功, 结果说明)
+        """
+        self.results = []
+        if len(self.interfaces) > 1:
+            return self.run_fanout()
+        total_files = len(self.pcap_files)
+        looping = self.loop_count != 1 or self.loop_duration > 0
+        if total_files > 1 and self.prefetch_budget > 0 and not looping:
+            return self.run_prefetched()
+            
+        # 整个发送任务复用同一个二层socket；按流分片发送时各工作进程打开自己的socket，
+        # 不打开用不到的共享会话（循环发送不分片，仍使用共享会话）
+        sharded = self.workers > 1 and not looping
+        with contextlib.nullcontext() if sharded else self.packet_sender.open_session(self.network_interface) as session:
+            for i, pcap_file in enumerate(self.pcap_files):
+                self._start_file(pcap_file)
+                
+                # 发送PCAP文件，需要循环时只加载一次文件
+                if looping:
+                    success = self.packet_sender.send_loop(
+                        pcap_file, self.network_interface, self.source_ip, self.dest_ip,
+                        self.loop_count, self.loop_duration, session=session
+                    )
+                else:
+                    success = self.packet_sender.send_pcap_file(
+                        pcap_file, self.network_interface, self.source_ip, self.dest_ip,
+                        session=session
+                    )
+                    
+                if not self._finish_file(pcap_file, success, i):
+                    return False, f"发送文件失败: {pcap_file}"
+                    
+        return True, f"成功发送 {total_files} 个文件"
+        
+    def run_prefetched(self) -> Tuple[bool, str]:
+        """发送当前文件的同时在后台预读后续文件"""
+        from .prefetch import FramePrefetcher
+        
+        total_files = len(self.pcap_files)
+        with self.packet_sender.open_session(self.network_interface) as session, \
+                FramePrefetcher(self.packet_sender, self.pcap_files, self.source_ip, self.dest_ip,
+                                self.prefetch_budget) as prefetcher:
+            for i, (pcap_file, buffer) in enumerate(prefetcher):
+                self._start_file(pcap_file)
+                
+                if buffer is not None:
+                    success = self.packet_sender.send_frame_buffer(buffer, self.network_interface, session=session)
+                else:
+                    # 超过预读内存上限的文件直接流式发送
+                    success = self.packet_sender.send_pcap_file(
+                        pcap_file, self.network_interface, self.source_ip, self.dest_ip,
+                        session=session
+                    )
+                    
+                if not self._finish_file(pcap_file, success, i):
+                    return False, f"发送文件失败: {pcap_file}"
+                    
+        return True, f"成功发送 {total_files} 个文件"
+        
+    def run_fanout(self) -> Tuple[bool, str]:
+        """把每个文件同时发送到所有选中的接口"""
+        for i, pcap_file in enumerate(self.pcap_files):
+            self._start_file(pcap_file)
+            
+            success = self.packet_sender.send_fanout(
+                pcap_file, self.interfaces, self.source_ip, self.dest_ip,
+                self.loop_count, self.loop_duration
+            )
+            
+            if not self._finish_file(pcap_file, success, i):
+                return False, f"发送文件失败: {pcap_file}"
+                
+        return True, f"成功发送 {len(self.pcap_files)} 个文件到 {len(self.interfaces)} 个接口"
+        
+    def _start_file(self, pcap_file: str):
+        """开始发送一个文件"""
+        self.packet_sender.last_stats = None
+        if self.file_started is not None:
+            self.file_started(pcap_file)
+            
+    def _finish_file(self, pcap_file: str, success: bool, index: int) -> bool:
+        """记录一个文件的发送结果，返回是否继续发送"""
+        self.results.append({'file': pcap_file, 'success': success, 'stats': self.packet_sender.last_stats})
+        if success and self.file_finished is not None:
+            self.file_finished(index + 1, len(self.pcap_files))
+        return success
\ No newline at end of file
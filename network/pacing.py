@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发包节奏控制
+按抓包时间戳或目标速率计算绝对发送时刻，避免逐包sleep造成的误差累积
+"""
+
+import math
+import sys
+import time
+from typing import Optional
+
+# 距离截止时刻小于该值时改为忙等，Windows的sleep精度较差需要更长的忙等区间
+DEFAULT_SPIN_THRESHOLD = 0.002 if sys.platform == 'win32' else 0.0002
+# 与原实现一致，超过该值的时间间隔直接跳过
+DEFAULT_MAX_GAP = 10.0
+
+# 速率模式落后计划超过该时长时放弃追赶
+MAX_RATE_LAG = 0.01
+
+# 速率模式
+PACING_DEFAULT = 'default'        # 每100包暂停1ms（原有行为）
+PACING_TOPSPEED = 'topspeed'      # 全速发送
+PACING_PPS = 'pps'                # 固定包速率
+PACING_MBPS = 'mbps'              # 固定比特速率
+PACING_MULTIPLIER = 'multiplier'  # 原始时间间隔按倍速回放
+# 按原始时间间隔回放（send_packets_with_timing），不在界面中提供选择
+PACING_TIMESTAMP = 'timestamp'
+
+PACING_MODES = (PACING_DEFAULT, PACING_TOPSPEED, PACING_PPS, PACING_MBPS, PACING_MULTIPLIER)
+
+# 误差直方图的桶上限（微秒）
+_ERROR_BUCKETS_US = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 100000)
+
+class TimingStats:
+    """发送时刻误差统计
+    
+    只保存计数、累加值和固定的直方图，内存占用与包数无关。
+    """
+    
+    def __init__(self):
+        self.count = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self.max_error = 0.0
+        self._buckets = [0] * (len(_ERROR_BUCKETS_US) + 1)
+        
+    def add(self, error: float):
+        """记录一个发送时刻误差
+        
+        Args:
+            error: 实际时刻减去截止时刻（秒），提前为负
+        """
+        self.count += 1
+        self._sum += error
+        self._sum_sq += error * error
+        magnitude = abs(error)
+        if magnitude > self.max_error:
+            self.max_error = magnitude
+        error_us = magnitude * 1e6
+        index = 0
+        for bound in _ERROR_BUCKETS_US:
+            if error_us <= bound:
+                break
+            index += 1
+        self._buckets[index] += 1
+        
+    def percentile(self, fraction: float) -> float:
+        """按直方图估算误差绝对值的分位数
+        
+        Args:
+            fraction: 分位，例如0.99
+            
+        Returns:
+            分位数所在桶的上限（秒）
+        """
+        if self.count == 0:
+            return 0.0
+        target = math.ceil(self.count * fraction)
+        seen = 0
+        for index, bucket in enumerate(self._buckets):
+            seen += bucket
+            if seen >= target:
+                if index < len(_ERROR_BUCKETS_US):
+                    return _ERROR_BUCKETS_US[index] / 1e6
+                return self.max_error
+        return self.max_error
+        
+    def summary(self) -> dict:
+        """返回误差统计字典（秒）"""
+        mean = self._sum / self.count if self.count else 0.0
+        variance = self._sum_sq / self.count - mean * mean if self.count else 0.0
+        return {
+            'count': self.count,
+            'mean_error': mean,
+            'stddev': math.sqrt(max(variance, 0.0)),
+            'p50_error': self.percentile(0.5),
+            'p99_error': self.percentile(0.99),
+            'max_error': self.max_error,
+        }
+
+def _wait_until(deadline: float, spin_threshold: float) -> float:
+    """先sleep再忙等，直到到达截止时刻
+    
+    Args:
+        deadline: 截止时刻（time.perf_counter）
+        spin_threshold: 忙等区间（秒）
+        
+    Returns:
+        实际到达的时刻
+    """
+    perf_counter = time.perf_counter
+    now = perf_counter()
+    remaining = deadline - now
+    if remaining > spin_threshold:
+        time.sleep(remaining - spin_threshold)
+        now = perf_counter()
+    while now < deadline:
+        now = perf_counter()
+    return now
+
+class DefaultPacer:
+    """原有的简单限速：每100个包暂停1ms"""
+    
+    def __init__(self):
+        self._count = 0
+        self.stop_time = None  # 每次最多等待1ms，不需要按结束时刻截断
+        
+    def wait(self, timestamp: Optional[float], length: int) -> bool:
+        """每100个包暂停1ms以避免网络拥塞
+        
+        Returns:
+            始终为False，帧可以在批量引擎中积压
+        """
+        if self._count % 100 == 0:
+            time.sleep(0.001)
+        self._count += 1
+        return False
+        
+    def report(self, stats: dict) -> dict:
+        """没有需要额外输出的统计"""
+        return {'mode': PACING_DEFAULT}
+
+class DeadlineScheduler:
+    """绝对截止时间调度器
+    
+    每个包的发送时刻按 “开始时刻 + (包时间戳 - 首包时间戳) / 倍速” 计算，
+    发送耗时和sleep超时不会累积。等待时先粗略sleep，
+    距离截止时刻不足spin_threshold时改为忙等，保证亚毫秒间隔的精度。
+    """
+    
+    def __init__(self, speed: float = 1.0, spin_threshold: float = DEFAULT_SPIN_THRESHOLD,
+                 max_gap: float = DEFAULT_MAX_GAP, mode: str = PACING_MULTIPLIER):
+        """初始化调度器
+        
+        Args:
+            speed: 倍速，2.0表示以两倍速度回放
+            spin_threshold: 忙等区间（秒）
+            max_gap: 最大等待间隔（抓包时间，秒），相邻两包间隔超过该值时不等待
+            mode: 报告中的速率模式，PACING_MULTIPLIER或PACING_TIMESTAMP
+            
+        Raises:
+            ValueError: 倍速不大于0
+        """
+        if speed <= 0:
+            raise ValueError("倍速必须大于0")
+        self.speed = speed
+        self.mode = mode
+        self.spin_threshold = spin_threshold
+        self.max_gap = max_gap
+        # 到达该时刻（time.perf_counter）后不再等待，循环发送限定了持续时间时由调用方设置
+        self.stop_time = None
+        self.stats = TimingStats()
+        self._base_clock = None
+        self._base_timestamp = 0.0
+        self._last_timestamp = 0.0
+        
+    def reset(self):
+        """重新开始调度（每个文件开始时调用）"""
+        self.stats = TimingStats()
+        self._base_clock = None
+        
+    def anchor(self, clock: float, timestamp: float):
+        """指定调度起点，多个进程共用同一起点时各自的发送时刻可以对齐
+        
+        Args:
+            clock: 起点时刻（time.perf_counter，Linux下各进程共用同一单调时钟）
+            timestamp: 起点对应的抓包时间戳
+        """
+        self._base_clock = clock
+        self._base_timestamp = timestamp
+        self._last_timestamp = timestamp
+        
+    def wait(self, timestamp: Optional[float], length: int = 0) -> bool:
+        """等待到该包的发送时刻
+        
+        Args:
+            timestamp: 数据包的抓包时间戳（秒），None表示不等待
+            length: 帧长度（按时间戳调度时不使用）
+            
+        Returns:
+            是否按计划时刻发送；落后于计划时返回False，调用方可以让帧在批量引擎中积压
+        """
+        if timestamp is None:
+            return False
+            
+        now = time.perf_counter()
+        if self._base_clock is None:
+            self._base_clock = now
+            self._base_timestamp = timestamp
+            self._last_timestamp = timestamp
+            self.stats.add(0.0)
+            return True
+            
+        if timestamp - self._last_timestamp > self.max_gap:
+            # 间隔过长，跳过这段空闲时间
+            self._base_clock = now
+            self._base_timestamp = timestamp
+        self._last_timestamp = timestamp
+        
+        deadline = self._base_clock + (timestamp - self._base_timestamp) / self.speed
+        if self.stop_time is not None and deadline > self.stop_time:
+            # 发送时刻已超过持续时间，只等到结束时刻，由调用方停止发送
+            _wait_until(self.stop_time, self.spin_threshold)
+            return False
+        on_time = deadline >= now
+        now = _wait_until(deadline, self.spin_threshold)
+        self.stats.add(now - deadline)
+        return on_time
+        
+    def report(self, stats: Optional[dict] = None) -> dict:
+        """打印并返回本文件的时间误差统计
+        
+        Args:
+            stats: 本文件的速率统计（未使用，与其他调度器接口一致）
+            
+        Returns:
+            时间误差统计字典（秒）
+        """
+        summary = self.stats.summary()
+        summary['mode'] = self.mode
+        summary['speed'] = self.speed
+        if summary['count']:
+            print(f"时间误差: 平均 {summary['mean_error'] * 1e6:.1f} µs, "
+                  f"p99 ≤ {summary['p99_error'] * 1e6:.0f} µs, "
+                  f"最大 {summary['max_error'] * 1e6:.1f} µs（{summary['count']} 个数据包）")
+        return summary
+
+class RatePacer:
+    """固定速率调度器
+    
+    维护一个虚拟发送时钟：pps模式每发一包推进 1/pps 秒，Mbps模式按帧字节推进
+    len*8/bps 秒（令牌桶）。每个包在虚拟时钟的绝对时刻发出，误差不会累积；
+    落后计划超过max_lag时重新对齐，相当于令牌桶的容量，避免长时间停顿后突发。
+    """
+    
+    def __init__(self, mode: str, rate: float, spin_threshold: float = DEFAULT_SPIN_THRESHOLD,
+                 max_lag: float = MAX_RATE_LAG):
+        """初始化调度器
+        
+        Args:
+            mode: PACING_PPS或PACING_MBPS
+            rate: 目标速率（pps或Mbps）
+            spin_threshold: 忙等区间（秒）
+            max_lag: 允许追赶的最大落后时长（秒）
+            
+        Raises:
+            ValueError: 速率不大于0
+        """
+        if rate <= 0:
+            raise ValueError("目标速率必须大于0")
+        self.mode = mode
+        self.rate = rate
+        self.spin_threshold = spin_threshold
+        self.max_lag = max_lag
+        self._per_packet = 1.0 / rate if mode == PACING_PPS else 0.0
+        self._per_byte = 8.0 / (rate * 1e6) if mode == PACING_MBPS else 0.0
+        # 到达该时刻（time.perf_counter）后不再等待，循环发送限定了持续时间时由调用方设置
+        self.stop_time = None
+        self._next = None
+        
+    def wait(self, timestamp: Optional[float], length: int) -> bool:
+        """等待到下一个发送时刻，并按本帧推进虚拟时钟
+        
+        Args:
+            timestamp: 数据包的抓包时间戳（不使用）
+            length: 帧长度（字节）
+            
+        Returns:
+            是否按计划时刻发送；落后于计划时返回False，调用方可以让帧在批量引擎中积压
+        """
+        now = time.perf_counter()
+        on_time = True
+        if self._next is None or now - self._next > self.max_lag:
+            self._next = now
+        elif self._next > now:
+            if self.stop_time is not None and self._next > self.stop_time:
+                # 发送时刻已超过持续时间，只等到结束时刻，由调用方停止发送
+                _wait_until(self.stop_time, self.spin_threshold)
+                return False
+            _wait_until(self._next, self.spin_threshold)
+        else:
+            on_time = False
+        self._next += self._per_packet + length * self._per_byte
+        return on_time
+        
+    def report(self, stats: dict) -> dict:
+        """打印并返回目标速率与实际速率的对比
+        
+        Args:
+            stats: 本文件的速率统计（PacketSender.report_rate的返回值）
+            
+        Returns:
+            速率对比字典
+        """
+        unit = 'pps' if self.mode == PACING_PPS else 'Mbps'
+        achieved = stats['pps'] if self.mode == PACING_PPS else stats['mbps']
+        deviation = (achieved - self.rate) / self.rate * 100
+        print(f"目标速率: {self.rate:g} {unit}，实际 {achieved:.1f} {unit}（偏差 {deviation:+.2f}%）")
+        return {
+            'mode': self.mode,
+            'requested': self.rate,
+            'achieved': achieved,
+            'deviation_percent': deviation,
+        }
+
+def create_pacer(mode: str, rate: float = 0.0):
+    """按速率模式创建调度器
+    
+    Args:
+        mode: 速率模式，见PACING_MODES；PACING_TIMESTAMP按原始时间间隔回放
+        rate: pps/Mbps模式下为目标速率，倍速模式下为倍速
+        
+    Returns:
+        调度器对象，提供wait/report方法；全速模式返回None
+    """
+    if mode == PACING_TOPSPEED:
+        return None
+    if mode in (PACING_PPS, PACING_MBPS):
+        return RatePacer(mode, rate)
+    if mode == PACING_MULTIPLIER:
+        return DeadlineScheduler(speed=rate or 1.0)
+    if mode == PACING_TIMESTAMP:
+        return DeadlineScheduler(mode=PACING_TIMESTAMP)
+    return DefaultPacer()
\ No newline at end of file
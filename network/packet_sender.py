@@ -5,25 +5,171 @@
 使用scapy库读取和发送PCAP文件
 """
 
+import importlib.util
 import os
 import time
-from typing import Optional
+from collections import deque
+from typing import Iterator, Optional
 
-try:
-    from scapy.all import rdpcap, sendp, get_if_list, get_if_addr
+from .compression import open_stream
+from .frame_buffer import FrameBuffer
+from .pacing import PACING_DEFAULT, PACING_TIMESTAMP, DeadlineScheduler, create_pacer
+from .progress import SendProgress
+from .rewrite import IpRewriter
+from .telemetry import SendTelemetry
+from .transmit import ENGINE_SCAPY, BatchSendError, SendmmsgTransmitter, create_transmitter
+
+# 导入scapy需要数百毫秒，不在导入本模块时加载，而是第一次用到时导入（见load_scapy）；界面在窗口显示后于后台预加载
+SCAPY_AVAILABLE = importlib.util.find_spec('scapy') is not None
+PcapReader = get_if_list = get_if_addr = None
+IP = None
+
+# 循环发送时保留的最近每轮统计条数
+LOOP_HISTORY = 1000
+# 循环发送时每轮统计的最短打印间隔（秒）
+LOOP_REPORT_INTERVAL = 1.0
+
+def load_scapy():
+    """导入本模块用到的scapy函数和协议层，已导入时直接返回"""
+    global PcapReader, get_if_list, get_if_addr, IP
+    if IP is not None:
+        return
+    from scapy.all import PcapReader, get_if_list, get_if_addr
+    # IP最后赋值，其他线程看到IP不为None时其余名称都已可用
     from scapy.layers.inet import IP
-    SCAPY_AVAILABLE = True
-except ImportError:
-    SCAPY_AVAILABLE = False
+
+class SendSession:
+    """二层发送会话
+    
+    在一个网络接口上只打开一次发送后端，整个文件或文件夹发送期间复用，
+    避免sendp()每发一个包都重新创建socket和解析接口。
+    """
+    
+    def __init__(self, interface: str, engine: str = ENGINE_SCAPY, progress: Optional[SendProgress] = None,
+                 telemetry: Optional[SendTelemetry] = None, **engine_options):
+        """打开发送会话
+        
+        Args:
+            interface: 网络接口名称
+            engine: 发送引擎名称（scapy、afpacket、sendmmsg）
+            progress: 可选的进度计数，会话打开期间的发送计数计入其中
+            telemetry: 可选的遥测记录，记录每次发送调用的耗时和发送错误
+            **engine_options: 引擎参数，如batch_size、sndbuf、qdisc_bypass
+        """
+        self.interface = interface
+        self._socket = create_transmitter(engine, interface, **engine_options)
+        # 实际使用的引擎（可能因系统不支持而回退）
+        self.engine = self._socket.engine
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        self._progress = progress
+        self.telemetry = telemetry
+        if telemetry is not None and isinstance(self._socket, SendmmsgTransmitter):
+            # sendmmsg提交失败时最多丢弃一批帧，这些帧的耗时等确认发出后再计入
+            telemetry.confirm_window = self._socket.batch_size
+        if progress is not None:
+            progress.watch(self)
+            
+    def send(self, packet):
+        """通过会话socket发送一个数据包
+        
+        Args:
+            packet: scapy数据包或原始帧字节
+        """
+        if not isinstance(packet, (bytes, bytearray, memoryview)):
+            packet = bytes(packet)
+        telemetry = self.telemetry
+        try:
+            if telemetry is None:
+                self._socket.send(packet)
+            else:
+                started = time.perf_counter()
+                try:
+                    self._socket.send(packet)
+                except Exception as e:
+                    telemetry.record_error(e)
+                    raise
+                telemetry.record_send(len(packet), started, time.perf_counter())
+        except BatchSendError as e:
+            # 未发出的帧中包括本帧，本帧还没有计数
+            self._discard(e.packets - 1, e.bytes - len(packet))
+            raise
+        self.packets_sent += 1
+        self.bytes_sent += len(packet)
+        
+    def flush(self):
+        """提交发送后端中尚未发出的帧（批量引擎）
+        
+        Raises:
+            BatchSendError: 批量提交失败，未发出的帧已从发送计数中扣除
+        """
+        try:
+            self._socket.flush()
+        except BatchSendError as e:
+            if self.telemetry is not None:
+                self.telemetry.record_error(e)
+            self._discard(e.packets, e.bytes)
+            raise
+        if self.telemetry is not None:
+            self.telemetry.confirm()
+            
+    def _discard(self, packets: int, byte_count: int):
+        """扣除已计为发送、但批量提交失败没有发出的帧"""
+        self.packets_sent -= packets
+        self.bytes_sent -= byte_count
+        if self.telemetry is not None:
+            self.telemetry.record_unsent(packets, byte_count)
+            
+    def close(self):
+        """提交剩余帧并关闭会话socket"""
+        if self._socket is not None:
+            try:
+                self.flush()
+            finally:
+                self._socket.close()
+                self._socket = None
+                if self.telemetry is not None:
+                    self.telemetry.confirm()
+                    self.telemetry.confirm_window = 0
+                if self._progress is not None:
+                    self._progress.unwatch(self)
+                    self._progress = None
+                    
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
 
 class PacketSender:
     """数据包发送器类"""
     
-    def __init__(self):
-        """初始化发送器"""
+    def __init__(self, engine: str = ENGINE_SCAPY, pacing: str = PACING_DEFAULT, rate: float = 0.0,
+                 **engine_options):
+        """初始化发送器
+        
+        Args:
+            engine: 发送引擎名称（scapy、afpacket、sendmmsg、txring）
+            pacing: 速率模式（default、topspeed、pps、mbps、multiplier）
+            rate: pps/Mbps模式下的目标速率，倍速模式下的倍速
+            **engine_options: 引擎参数，如batch_size、sndbuf、qdisc_bypass
+        """
         if not SCAPY_AVAILABLE:
             raise ImportError("需要安装scapy库: pip install scapy")
-            
+        self.engine = engine
+        self.engine_options = engine_options
+        self.pacing = pacing
+        self.rate = rate
+        # 提前检查速率参数，无效时在创建发送器时抛出ValueError
+        self.create_pacer()
+        self.last_stats = None
+        # 可选的进度计数，本发送器打开的会话（并行发送时为工作进程的共享计数）都计入其中，
+        # 由界面线程定时读取
+        self.progress: Optional[SendProgress] = None
+        # 可选的遥测记录，本发送器打开的会话（并行发送时为各工作进程）都计入其中
+        self.telemetry: Optional[SendTelemetry] = None
+        
     def get_available_interfaces(self):
         """获取可用的网络接口列表
         
@@ -31,6 +177,7 @@ class PacketSender:
             网络接口名称列表
         """
         try:
+            load_scapy()
             return get_if_list()
         except Exception:
             return []
@@ -45,173 +192,438 @@ class PacketSender:
             IP地址，如果获取失败返回None
         """
         try:
+            load_scapy()
             return get_if_addr(interface)
         except Exception:
             return None
             
-    def send_pcap_file(self, pcap_file: str, interface: str, source_ip: Optional[str] = None, dest_ip: Optional[str] = None) -> bool:
-        """发送PCAP文件中的数据包
+    def open_session(self, interface: str) -> SendSession:
+        """打开一个可复用的发送会话
+        
+        Args:
+            interface: 网络接口名称
+            
+        Returns:
+            发送会话，使用完毕后需要关闭（支持with语句）
+        """
+        return SendSession(interface, self.engine, self.progress, self.telemetry, **self.engine_options)
+        
+    def enable_telemetry(self) -> SendTelemetry:
+        """为之后的发送开启遥测记录
+        
+        每次发送调用会多两次计时，默认不开启。
+        
+        Returns:
+            新的遥测记录，发送结束后调用finish()再导出
+        """
+        self.telemetry = SendTelemetry(self.pacing, self.rate)
+        return self.telemetry
+        
+    def report_rate(self, session: SendSession, start_packets: int, start_bytes: int, start_time: float) -> dict:
+        """统计并打印一次文件发送的实际速率
+        
+        Args:
+            session: 发送会话
+            start_packets: 开始发送时会话的已发包数
+            start_bytes: 开始发送时会话的已发字节数
+            start_time: 开始发送的时间（time.perf_counter）
+            
+        Returns:
+            速率统计字典，同时保存在last_stats中
+        """
+        self.last_stats = self._rate_stats(session, start_packets, start_bytes, start_time)
+        self.last_stats['engine'] = session.engine
+        print(f"发送速率: {self.last_stats['pps']:.0f} pps, {self.last_stats['mbps']:.2f} Mbps"
+              f"（引擎: {session.engine}，耗时 {self.last_stats['elapsed']:.3f} 秒）")
+        return self.last_stats
+        
+    def _rate_stats(self, session: SendSession, start_packets: int, start_bytes: int, start_time: float) -> dict:
+        """计算从start_time开始的发送量和速率"""
+        elapsed = time.perf_counter() - start_time
+        packets = session.packets_sent - start_packets
+        byte_count = session.bytes_sent - start_bytes
+        return {
+            'packets': packets,
+            'bytes': byte_count,
+            'elapsed': elapsed,
+            'pps': packets / elapsed if elapsed > 0 else 0.0,
+            'mbps': byte_count * 8 / elapsed / 1e6 if elapsed > 0 else 0.0,
+        }
+        
+    def iter_packets(self, pcap_file: str) -> Iterator:
+        """流式读取PCAP文件中的数据包
+        
+        使用scapy的增量读取器逐个解析数据包，不会把整个文件加载到内存，
+        读出第一个数据包后即可开始发送。压缩文件在后台线程中边读边解压。
+        
+        Args:
+            pcap_file: PCAP文件路径（支持.pcap和.pcapng，以及.gz/.xz/.zst压缩文件）
+            
+        Yields:
+            scapy数据包对象
+        """
+        load_scapy()
+        # 流由外层with关闭：PcapReader构造时识别文件格式失败会直接抛出异常，不会关闭传入的流
+        with open_stream(pcap_file) as stream, PcapReader(stream) as reader:
+            for packet in reader:
+                yield packet
+                
+    def needs_rewrite(self, source_ip: Optional[str] = None, dest_ip: Optional[str] = None) -> bool:
+        """判断是否需要改写数据包的IP地址
+        
+        Args:
+            source_ip: 可选的源IP地址
+            dest_ip: 可选的目的IP地址
+            
+        Returns:
+            源IP或目的IP中是否有有效的非空字符串
+        """
+        return bool((source_ip and source_ip.strip()) or (dest_ip and dest_ip.strip()))
+        
+    def create_rewriter(self, source_ip: Optional[str] = None, dest_ip: Optional[str] = None) -> Optional[IpRewriter]:
+        """为一个文件创建IP地址改写器
+        
+        Args:
+            source_ip: 可选的源IP地址
+            dest_ip: 可选的目的IP地址
+            
+        Returns:
+            改写器，不需要改写时返回None
+        """
+        return IpRewriter(source_ip, dest_ip) if self.needs_rewrite(source_ip, dest_ip) else None
+        
+    def rewrite_packet(self, packet, rewriter: Optional[IpRewriter] = None) -> bytes:
+        """按需修改scapy数据包的源/目的IP地址，返回待发送的帧字节
+        
+        与原始字节路径一样由IpRewriter在帧字节上替换地址并修正校验和，不复制数据包、不重新组包；
+        IP头部的位置取scapy解析出的IP层，非以太网链路类型的帧也能改写。
+        
+        Args:
+            packet: scapy数据包
+            rewriter: IP地址改写器（见create_rewriter），None表示不改写
+            
+        Returns:
+            帧字节
+        """
+        frame = bytes(packet)
+        if rewriter is None:
+            return frame
+        load_scapy()
+        if not packet.haslayer(IP):
+            return frame
+        ip_layer = packet[IP]
+        if packet.original is not None and ip_layer.original is not None:
+            # 从文件解析出的数据包各层保存着解析时的原始字节，由此得到IP头部的偏移，不必再组包一次
+            offset = len(packet.original) - len(ip_layer.original)
+        else:
+            offset = len(frame) - len(bytes(ip_layer))
+        return rewriter.rewrite(frame, offset)
+        
+    def create_pacer(self):
+        """按发送器的速率模式为一个文件创建调度器
+        
+        Returns:
+            调度器对象，全速模式返回None
+        """
+        return create_pacer(self.pacing, self.rate)
+        
+    def send_pcap_file(self, pcap_file: str, interface: str, source_ip: Optional[str] = None, dest_ip: Optional[str] = None,
+                       session: Optional[SendSession] = None) -> bool:
+        """按发送器的速率模式发送PCAP文件中的数据包
         
         Args:
             pcap_file: PCAP文件路径
             interface: 网络接口名称
             source_ip: 可选的源IP地址，如果提供则修改数据包的源IP
             dest_ip: 可选的目的IP地址，如果提供则修改数据包的目的IP
+            session: 可选的发送会话，未提供时为本文件临时打开一个
+            
+        Returns:
+            发送是否成功
+        """
+        return self._send_packets(pcap_file, interface, source_ip, dest_ip, session, self.create_pacer())
+        
+    def send_packets_with_timing(self, pcap_file: str, interface: str, 
+                               source_ip: Optional[str] = None, 
+                               dest_ip: Optional[str] = None,
+                               preserve_timing: bool = True,
+                               session: Optional[SendSession] = None) -> bool:
+        """按照原始时间间隔发送数据包
+        
+        Args:
+            pcap_file: PCAP文件路径
+            interface: 网络接口名称
+            source_ip: 可选的源IP地址
+            dest_ip: 可选的目的IP地址
+            preserve_timing: 是否保持原始时间间隔
+            session: 可选的发送会话，未提供时为本文件临时打开一个
             
         Returns:
             发送是否成功
         """
+        # 按首包开始的绝对时刻调度，发送耗时和sleep误差不会累积
+        pacer = DeadlineScheduler(mode=PACING_TIMESTAMP) if preserve_timing else None
+        return self._send_packets(pcap_file, interface, source_ip, dest_ip, session, pacer)
+        
+    def _send_packets(self, pcap_file: str, interface: str, source_ip: Optional[str], dest_ip: Optional[str],
+                      session: Optional[SendSession], pacer) -> bool:
+        """经scapy解析发送文件中的数据包
+        
+        Args:
+            pcap_file: PCAP文件路径
+            interface: 网络接口名称
+            source_ip: 可选的源IP地址
+            dest_ip: 可选的目的IP地址
+            session: 可选的发送会话
+            pacer: 发包调度器（见pacing.create_pacer），None表示全速发送
+            
+        Returns:
+            发送是否成功
+        """
+        own_session = False
         try:
             # 检查文件是否存在
             if not os.path.exists(pcap_file):
                 print(f"PCAP文件不存在: {pcap_file}")
                 return False
                 
-            # 读取PCAP文件
+            # 流式读取PCAP文件，边读边发
             print(f"正在读取PCAP文件: {pcap_file}")
-            packets = rdpcap(pcap_file)
             
-            if not packets:
-                print("PCAP文件中没有数据包")
-                return False
+            # 没有传入会话时为本文件打开一个，发送结束后关闭
+            if session is None:
+                session = self.open_session(interface)
+                own_session = True
                 
-            print(f"读取到 {len(packets)} 个数据包")
-            
             # 发送数据包
             sent_count = 0
-            for i, packet in enumerate(packets):
+            total_count = 0
+            start_packets, start_bytes = session.packets_sent, session.bytes_sent
+            start_time = time.perf_counter()
+            rewriter = self.create_rewriter(source_ip, dest_ip)
+            
+            for i, packet in enumerate(self.iter_packets(pcap_file)):
+                total_count += 1
                 try:
-                    # 创建数据包副本以避免修改原始数据包
-                    packet_to_send = packet.copy()
+                    frame = self.rewrite_packet(packet, rewriter)
                     
-                    # 如果指定了源IP或目的IP，修改数据包的IP地址
-                    # 检查IP地址是否为有效的非空字符串
-                    valid_source_ip = source_ip and source_ip.strip()
-                    valid_dest_ip = dest_ip and dest_ip.strip()
+                    # 等待到该包的发送时刻
+                    on_time = pacer is not None and pacer.wait(float(packet.time), len(frame))
                     
-                    if packet_to_send.haslayer(IP) and (valid_source_ip or valid_dest_ip):
-                        if valid_source_ip:
-                            packet_to_send[IP].src = valid_source_ip
-                        if valid_dest_ip:
-                            packet_to_send[IP].dst = valid_dest_ip
-                        # 重新计算校验和
-                        del packet_to_send[IP].chksum
-                        # 检查并重新计算传输层校验和
-                        try:
-                            from scapy.layers.inet import TCP, UDP
-                            if packet_to_send.haslayer(TCP):
-                                del packet_to_send[TCP].chksum
-                            elif packet_to_send.haslayer(UDP):
-                                del packet_to_send[UDP].chksum
-                        except Exception:
-                            pass  # 如果无法处理传输层，继续发送
-                            
                     # 发送数据包
-                    sendp(packet_to_send, iface=interface, verbose=False)
+                    session.send(frame)
+                    if on_time:
+                        # 按计划发送的帧不能积压在批量引擎的缓冲区中，落后时则批量追赶
+                        session.flush()
                     sent_count += 1
                     
-                    # 添加小延迟以避免网络拥塞
-                    if i % 100 == 0:
-                        time.sleep(0.001)  # 1ms延迟
-                        
                 except Exception as e:
                     print(f"发送第 {i+1} 个数据包时出错: {str(e)}")
                     continue
                     
-            print(f"成功发送 {sent_count}/{len(packets)} 个数据包")
+            # 批量引擎中可能还有未提交的帧
+            session.flush()
+            
+            if total_count == 0:
+                print("PCAP文件中没有数据包")
+                return False
+                
+            print(f"成功发送 {sent_count}/{total_count} 个数据包")
+            stats = self.report_rate(session, start_packets, start_bytes, start_time)
+            if pacer is not None:
+                stats['pacing'] = pacer.report(stats)
             return sent_count > 0
             
         except Exception as e:
             print(f"发送PCAP文件时出错: {str(e)}")
             return False
             
-    def send_packets_with_timing(self, pcap_file: str, interface: str, 
-                               source_ip: Optional[str] = None, 
-                               dest_ip: Optional[str] = None,
-                               preserve_timing: bool = True) -> bool:
-        """按照原始时间间隔发送数据包
+        finally:
+            if own_session:
+                session.close()
+                
+    def load_frame_buffer(self, pcap_file: str, source_ip: Optional[str] = None,
+                          dest_ip: Optional[str] = None) -> FrameBuffer:
+        """把文件中的帧（按需改写IP后）一次性装入内存
+        
+        Args:
+            pcap_file: PCAP文件路径
+            source_ip: 可选的源IP地址
+            dest_ip: 可选的目的IP地址
+            
+        Returns:
+            帧缓冲区
+        """
+        rewriter = self.create_rewriter(source_ip, dest_ip)
+        return FrameBuffer.from_records(
+            (float(packet.time), self.rewrite_packet(packet, rewriter))
+            for packet in self.iter_packets(pcap_file)
+        )
+        
+    def send_frame_buffer(self, buffer: FrameBuffer, interface: str,
+                          session: Optional[SendSession] = None) -> bool:
+        """按发送器的速率模式发送一个已装入内存的帧缓冲区
+        
+        Args:
+            buffer: 帧缓冲区（见load_frame_buffer）
+            interface: 网络接口名称
+            session: 可选的发送会话，未提供时临时打开一个
+            
+        Returns:
+            发送是否成功
+        """
+        own_session = False
+        try:
+            if len(buffer) == 0:
+                print("PCAP文件中没有数据包")
+                return False
+                
+            if session is None:
+                session = self.open_session(interface)
+                own_session = True
+                
+            sent_count = 0
+            send = session.send
+            pacer = self.create_pacer()
+            start_packets, start_bytes = session.packets_sent, session.bytes_sent
+            start_time = time.perf_counter()
+            for i, (timestamp, frame) in enumerate(buffer):
+                try:
+                    on_time = pacer is not None and pacer.wait(timestamp, len(frame))
+                    send(frame)
+                    if on_time:
+                        # 按计划发送的帧不能积压在批量引擎的缓冲区中，落后时则批量追赶
+                        session.flush()
+                    sent_count += 1
+                except Exception as e:
+                    print(f"发送第 {i + 1} 个数据包时出错: {str(e)}")
+                    
+            # 批量引擎中可能还有未提交的帧
+            session.flush()
+            
+            print(f"成功发送 {sent_count}/{len(buffer)} 个数据包")
+            stats = self.report_rate(session, start_packets, start_bytes, start_time)
+            if pacer is not None:
+                stats['pacing'] = pacer.report(stats)
+            return sent_count > 0
+            
+        except Exception as e:
+            print(f"发送PCAP文件时出错: {str(e)}")
+            return False
+            
+        finally:
+            if own_session:
+                session.close()
+                
+    def send_loop(self, pcap_file: str, interface: str, source_ip: Optional[str] = None,
+                  dest_ip: Optional[str] = None, loop_count: int = 1, duration: float = 0.0,
+                  session: Optional[SendSession] = None) -> bool:
+        """把文件装入内存后循环发送
+        
+        文件只读取和解析一次，之后每轮直接从内存缓冲区发送，没有文件I/O和解析开销。
+        每轮按发送器的速率模式重新调度。
         
         Args:
             pcap_file: PCAP文件路径
             interface: 网络接口名称
             source_ip: 可选的源IP地址
             dest_ip: 可选的目的IP地址
-            preserve_timing: 是否保持原始时间间隔
+            loop_count: 循环次数，0表示不限次数（需要指定duration）
+            duration: 最长发送时间（秒），0表示不限时间
+            session: 可选的发送会话，未提供时临时打开一个
             
         Returns:
             发送是否成功
         """
+        if loop_count <= 0 and duration <= 0:
+            print("循环次数和持续时间不能同时为不限")
+            return False
+            
+        own_session = False
         try:
             # 检查文件是否存在
             if not os.path.exists(pcap_file):
                 print(f"PCAP文件不存在: {pcap_file}")
                 return False
                 
-            # 读取PCAP文件
-            print(f"正在读取PCAP文件: {pcap_file}")
-            packets = rdpcap(pcap_file)
-            
-            if not packets:
+            print(f"正在加载PCAP文件到内存: {pcap_file}")
+            buffer = self.load_frame_buffer(pcap_file, source_ip, dest_ip)
+            if len(buffer) == 0:
                 print("PCAP文件中没有数据包")
                 return False
-                
-            print(f"读取到 {len(packets)} 个数据包")
+            print(f"已加载 {len(buffer)} 个数据包（{buffer.total_bytes / 1e6:.2f} MB），开始循环发送")
             
-            # 发送数据包
-            sent_count = 0
-            last_time = None
+            if session is None:
+                session = self.open_session(interface)
+                own_session = True
+                
+            send = session.send
+            flush = session.flush
+            history = deque(maxlen=LOOP_HISTORY)
+            error_count = 0
+            loop_index = 0
+            expired = False
+            start_packets, start_bytes = session.packets_sent, session.bytes_sent
+            start_time = time.perf_counter()
+            end_time = start_time + duration if duration > 0 else None
+            last_report = start_time
             
-            for i, packet in enumerate(packets):
-                try:
-                    # 创建数据包副本以避免修改原始数据包
-                    packet_to_send = packet.copy()
-                    
-                    # 如果指定了源IP或目的IP，修改数据包的IP地址
-                    # 检查IP地址是否为有效的非空字符串
-                    valid_source_ip = source_ip and source_ip.strip()
-                    valid_dest_ip = dest_ip and dest_ip.strip()
-                    
-                    if packet_to_send.haslayer(IP) and (valid_source_ip or valid_dest_ip):
-                        if valid_source_ip:
-                            packet_to_send[IP].src = valid_source_ip
-                        if valid_dest_ip:
-                            packet_to_send[IP].dst = valid_dest_ip
-                        # 重新计算校验和
-                        del packet_to_send[IP].chksum
-                        # 检查并重新计算传输层校验和
-                        try:
-                            from scapy.layers.inet import TCP, UDP
-                            if packet_to_send.haslayer(TCP):
-                                del packet_to_send[TCP].chksum
-                            elif packet_to_send.haslayer(UDP):
-                                del packet_to_send[UDP].chksum
-                        except Exception:
-                            pass  # 如果无法处理传输层，继续发送
-                    
-                    # 计算时间间隔
-                    if preserve_timing and hasattr(packet, 'time'):
-                        current_time = float(packet.time)
-                        if last_time is not None:
-                            delay = current_time - last_time
-                            if delay > 0 and delay < 10:  # 最大延迟10秒
-                                time.sleep(delay)
-                        last_time = current_time
+            while not expired and (loop_count <= 0 or loop_index < loop_count):
+                loop_packets, loop_bytes = session.packets_sent, session.bytes_sent
+                loop_start = time.perf_counter()
+                pacer = self.create_pacer()
+                if pacer is not None:
+                    pacer.stop_time = end_time
+                for i, (timestamp, frame) in enumerate(buffer):
+                    try:
+                        on_time = pacer is not None and pacer.wait(timestamp, len(frame))
+                        # 限速发送时每个包之间都可能等待很久，每次等待后都检查是否到达持续时间
+                        if pacer is not None and end_time is not None and time.perf_counter() >= end_time:
+                            expired = True
+                            break
+                        send(frame)
+                        if on_time:
+                            # 按计划发送的帧不能积压在批量引擎的缓冲区中，落后时则批量追赶
+                            flush()
+                    except Exception as e:
+                        error_count += 1
+                        print(f"第 {loop_index + 1} 轮发送第 {i + 1} 个数据包时出错: {str(e)}")
                         
-                    # 发送数据包
-                    sendp(packet_to_send, iface=interface, verbose=False)
-                    sent_count += 1
+                    # 全速发送时每1024个包检查一次是否到达持续时间
+                    if end_time is not None and i & 0x3ff == 0x3ff and time.perf_counter() >= end_time:
+                        expired = True
+                        break
+                        
+                flush()
+                loop_index += 1
+                loop_stats = self._rate_stats(session, loop_packets, loop_bytes, loop_start)
+                loop_stats['loop'] = loop_index
+                history.append(loop_stats)
+                if end_time is not None and time.perf_counter() >= end_time:
+                    expired = True
                     
-                except Exception as e:
-                    print(f"发送第 {i+1} 个数据包时出错: {str(e)}")
-                    continue
+                # 每轮都很短时限制打印频率
+                now = time.perf_counter()
+                if now - last_report >= LOOP_REPORT_INTERVAL or expired or loop_index == loop_count:
+                    last_report = now
+                    print(f"第 {loop_index} 轮: {loop_stats['packets']} 个数据包, "
+                          f"{loop_stats['pps']:.0f} pps, {loop_stats['mbps']:.2f} Mbps，耗时 {loop_stats['elapsed']:.3f} 秒")
                     
-            print(f"成功发送 {sent_count}/{len(packets)} 个数据包")
-            return sent_count > 0
+            print(f"循环发送完成: {loop_index} 轮, 出错 {error_count} 个数据包")
+            stats = self.report_rate(session, start_packets, start_bytes, start_time)
+            stats['loop_count'] = loop_index
+            stats['errors'] = error_count
+            stats['loops'] = list(history)
+            return stats['packets'] > 0
             
         except Exception as e:
-            print(f"发送PCAP文件时出错: {str(e)}")
+            print(f"循环发送PCAP文件时出错: {str(e)}")
             return False
             
+        finally:
+            if own_session:
+                session.close()
+                
     def validate_interface(self, interface: str) -> bool:
         """验证网络接口是否有效
         
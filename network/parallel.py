@@ -0,0 +1,676 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程并行发送
+按五元组哈希把数据包分配到多个工作进程，同一条流始终由同一个进程按顺序发送；
+或把同一个文件同时扇出到多个网络接口
+"""
+
+import multiprocessing
+import os
+import queue as queue_module
+import time
+import zlib
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from .frame_buffer import FrameBuffer, discard_shared_frames
+from .pacing import (PACING_MBPS, PACING_PPS, PACING_TIMESTAMP, PACING_TOPSPEED,
+                     DeadlineScheduler, create_pacer)
+from .packet_sender import SendSession
+from .pcap_reader import LINKTYPE_ETHERNET, open_capture
+from .raw_sender import RawPacketSender
+from .rewrite import ETH_TYPE_IPV4, ETH_TYPE_VLANS, IP_PROTO_TCP, IP_PROTO_UDP, IpRewriter
+from .telemetry import SendTelemetry
+from .transmit import shard_sink
+
+ETH_TYPE_IPV6 = 0x86dd
+
+# 每批交给工作进程的帧数
+SHARD_BATCH_SIZE = 512
+# 每个工作进程队列中最多积压的批数
+SHARD_QUEUE_DEPTH = 64
+# 进度回调的最短间隔（秒）
+PROGRESS_INTERVAL = 0.2
+# 按时间戳回放时首包相对开始读取的延后时间，留给工作进程接收第一批帧
+START_DELAY = 0.1
+
+# 共享计数器中每个工作进程占用的槽位：已发包数、已发字节数、出错包数
+_COUNTER_SLOTS = 3
+
+def flow_hash(frame: bytes) -> int:
+    """计算以太网帧的对称流哈希
+    
+    IPv4/IPv6按 (地址, 端口) 两端排序后加上协议号计算，同一连接的两个方向
+    得到相同的哈希；分片报文不使用端口，保证所有分片落在同一个分片组。
+    非IP帧按MAC地址对计算。
+    
+    Args:
+        frame: 以太网帧字节
+        
+    Returns:
+        32位哈希值
+    """
+    length = len(frame)
+    if length < 14:
+        return 0
+    offset = 12
+    ethertype = (frame[12] << 8) | frame[13]
+    while ethertype in ETH_TYPE_VLANS and length >= offset + 6:
+        offset += 4
+        ethertype = (frame[offset] << 8) | frame[offset + 1]
+    ip = offset + 2
+    
+    if ethertype == ETH_TYPE_IPV4 and length >= ip + 20:
+        protocol = frame[ip + 9]
+        source = bytes(frame[ip + 12:ip + 16])
+        dest = bytes(frame[ip + 16:ip + 20])
+        fragmented = ((frame[ip + 6] << 8) | frame[ip + 7]) & 0x3fff
+        l4 = ip + (frame[ip] & 0x0f) * 4
+    elif ethertype == ETH_TYPE_IPV6 and length >= ip + 40:
+        protocol = frame[ip + 6]
+        source = bytes(frame[ip + 8:ip + 24])
+        dest = bytes(frame[ip + 24:ip + 40])
+        fragmented = False
+        l4 = ip + 40
+    else:
+        first, second = bytes(frame[0:6]), bytes(frame[6:12])
+        return zlib.crc32(min(first, second) + max(first, second))
+        
+    if not fragmented and protocol in (IP_PROTO_TCP, IP_PROTO_UDP) and length >= l4 + 4:
+        source += bytes(frame[l4:l4 + 2])
+        dest += bytes(frame[l4 + 2:l4 + 4])
+    return zlib.crc32(min(source, dest) + max(source, dest) + bytes((protocol,)))
+
+def _worker_counts(counters, index: int) -> dict:
+    """读取一个工作进程的共享计数"""
+    base = index * _COUNTER_SLOTS
+    return {
+        'packets': counters[base],
+        'bytes': counters[base + 1],
+        'errors': counters[base + 2],
+    }
+
+class _CounterView:
+    """工作进程共享计数的只读视图，提供与SendSession相同的packets_sent/bytes_sent属性"""
+    
+    def __init__(self, counters, count: int):
+        self._counters = counters
+        self._size = count * _COUNTER_SLOTS
+        
+    @property
+    def packets_sent(self) -> int:
+        counters = self._counters
+        return sum(counters[index] for index in range(0, self._size, _COUNTER_SLOTS))
+        
+    @property
+    def bytes_sent(self) -> int:
+        counters = self._counters
+        return sum(counters[index] for index in range(1, self._size, _COUNTER_SLOTS))
+
+def _worker_main(index: int, interface: str, engine: str, engine_options: dict, pacing: str,
+                 rate: float, source_ip: Optional[str], dest_ip: Optional[str], queue, counters,
+                 telemetry_results=None, sink_append: bool = False):
+    """工作进程入口：从队列取出帧批次并发送
+    
+    队列中第一条消息是 (起点时刻, 起点时间戳)，用于对齐按时间戳回放的各个进程，
+    之后每条消息是 (时间戳, 帧字节) 列表，None表示结束；已在主进程中改写的帧附带第三个元素，不再改写。
+    开启遥测时结束后把本进程的遥测数据放入telemetry_results。
+    sink_append为True时抓包文件伪接口接着写入本次任务中已写入的文件。
+    """
+    base = index * _COUNTER_SLOTS
+    telemetry = SendTelemetry() if telemetry_results is not None else None
+    session = SendSession(interface, engine, telemetry=telemetry, sink_append=sink_append, **engine_options)
+    try:
+        rewriter = IpRewriter(source_ip, dest_ip) if source_ip or dest_ip else None
+        pacer = create_pacer(pacing, rate)
+        anchor = queue.get()
+        if isinstance(pacer, DeadlineScheduler) and anchor is not None:
+            pacer.anchor(*anchor)
+            
+        send = session.send
+        errors = 0
+        while True:
+            batch = queue.get()
+            if batch is None:
+                break
+            for record in batch:
+                timestamp, frame = record[0], record[1]
+                try:
+                    if rewriter is not None and len(record) == 2:
+                        frame = rewriter.rewrite(frame)
+                    on_time = pacer is not None and pacer.wait(timestamp, len(frame))
+                    send(frame)
+                    if on_time:
+                        session.flush()
+                except Exception:
+                    errors += 1
+            counters[base] = session.packets_sent
+            counters[base + 1] = session.bytes_sent
+            counters[base + 2] = errors
+    finally:
+        session.close()
+        counters[base] = session.packets_sent
+        counters[base + 1] = session.bytes_sent
+        if telemetry is not None:
+            telemetry_results.put(telemetry.worker_totals())
+
+def _merge_worker_telemetry(telemetry: Optional[SendTelemetry], results):
+    """把工作进程交回的遥测数据合并到发送器的遥测记录中（工作进程都已结束后调用）"""
+    if telemetry is None or results is None:
+        return
+    while not results.empty():
+        telemetry.merge(*results.get())
+    results.close()
+
+class ParallelPacketSender(RawPacketSender):
+    """多进程并行发送器
+    
+    主进程只负责读取文件和计算流哈希，按哈希把帧分批交给工作进程；
+    每个工作进程打开自己的发送socket，完成IP改写、节奏控制和发送。
+    同一条流（含双向）始终由同一个进程发送，流内顺序不变，不同流之间的相对顺序不做保证。
+    固定速率模式下目标速率平均分给各进程，流量在进程间不均匀时总速率会低于目标。
+    """
+    
+    def __init__(self, workers: int = 0, **options):
+        """初始化发送器
+        
+        Args:
+            workers: 工作进程数，0表示使用CPU核数
+            **options: 传给PacketSender的参数（engine、pacing、rate及引擎参数）
+        """
+        super().__init__(**options)
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        # 发送过程中定期调用 progress_callback(已发包数, 已发字节数)
+        self.progress_callback: Optional[Callable[[int, int], None]] = None
+        # 已写入过的抓包文件伪接口，之后的文件接着写入而不是清空重写
+        self._opened_sinks = set()
+        
+    def send_pcap_file(self, pcap_file: str, interface: str, source_ip: Optional[str] = None, dest_ip: Optional[str] = None,
+                       session: Optional[SendSession] = None) -> bool:
+        """按发送器的速率模式并行发送PCAP文件
+        
+        Args:
+            pcap_file: PCAP文件路径
+            interface: 网络接口名称
+            source_ip: 可选的源IP地址
+            dest_ip: 可选的目的IP地址
+            session: 单进程时使用的发送会话，并行发送时各工作进程打开自己的socket
+            
+        Returns:
+            发送是否成功
+        """
+        if self.workers <= 1:
+            return super().send_pcap_file(pcap_file, interface, source_ip, dest_ip, session=session)
+        return self._send_parallel(pcap_file, interface, source_ip, dest_ip, self.pacing, self.rate)
+        
+    def send_packets_with_timing(self, pcap_file: str, interface: str,
+                               source_ip: Optional[str] = None,
+                               dest_ip: Optional[str] = None,
+                               preserve_timing: bool = True,
+                               session: Optional[SendSession] = None) -> bool:
+        """按照原始时间间隔并行发送数据包
+        
+        Args:
+            pcap_file: PCAP文件路径
+            interface: 网络接口名称
+            source_ip: 可选的源IP地址
+            dest_ip: 可选的目的IP地址
+            preserve_timing: 是否保持原始时间间隔
+            session: 单进程时使用的发送会话
+            
+        Returns:
+            发送是否成功
+        """
+        if self.workers <= 1:
+            return super().send_packets_with_timing(pcap_file, interface, source_ip, dest_ip,
+                                                    preserve_timing, session=session)
+        pacing = PACING_TIMESTAMP if preserve_timing else PACING_TOPSPEED
+        return self._send_parallel(pcap_file, interface, source_ip, dest_ip, pacing, 1.0)
+        
+    def _iter_records(self, pcap_file: str, source_ip: Optional[str],
+                      dest_ip: Optional[str]) -> Tuple[Iterable, bool]:
+        """返回帧记录序列，以及改写是否需要交给工作进程完成"""
+        rewriter = self.create_rewriter(source_ip, dest_ip)
+        if self.can_send_raw(pcap_file, source_ip, dest_ip):
+            if rewriter is None:
+                return open_capture(pcap_file), False
+            return self._worker_records(pcap_file, rewriter), True
+        records = ((float(packet.time), self.rewrite_packet(packet, rewriter))
+                   for packet in self.iter_packets(pcap_file))
+        return records, False
+        
+    def _worker_records(self, pcap_file: str, rewriter: IpRewriter) -> Iterator[tuple]:
+        """读取需要改写的文件，以太网帧交给工作进程改写
+        
+        pcapng文件中间出现的其他链路类型的帧在主进程中经scapy改写（见rewrite_record），
+        返回 (时间戳, 帧字节, False)，工作进程原样发送；改写失败的帧跳过。
+        """
+        with open_capture(pcap_file) as reader:
+            for index, (timestamp, frame, linktype) in enumerate(reader.records_with_linktype(), 1):
+                if linktype == LINKTYPE_ETHERNET:
+                    yield timestamp, frame
+                    continue
+                try:
+                    frame = self.rewrite_record(frame, linktype, rewriter)
+                except Exception as e:
+                    print(f"改写第 {index} 个数据包时出错: {str(e)}")
+                    continue
+                yield timestamp, frame, False
+                
+    def _send_parallel(self, pcap_file: str, interface: str, source_ip: Optional[str],
+                       dest_ip: Optional[str], pacing: str, rate: float) -> bool:
+        """把文件中的帧按流分配给工作进程发送
+        
+        Args:
+            pcap_file: PCAP文件路径
+            interface: 网络接口名称
+            source_ip: 可选的源IP地址
+            dest_ip: 可选的目的IP地址
+            pacing: 速率模式
+            rate: 目标速率或倍速
+            
+        Returns:
+            发送是否成功
+        """
+        workers = self.workers
+        processes = []
+        queues = []
+        counter_view = None
+        telemetry_results = None
+        try:
+            # 检查文件是否存在
+            if not os.path.exists(pcap_file):
+                print(f"PCAP文件不存在: {pcap_file}")
+                return False
+                
+            print(f"正在读取PCAP文件: {pcap_file}（{workers} 个工作进程）")
+            records, rewrite_in_worker = self._iter_records(pcap_file, source_ip, dest_ip)
+            worker_source = source_ip.strip() if rewrite_in_worker and source_ip else None
+            worker_dest = dest_ip.strip() if rewrite_in_worker and dest_ip else None
+            worker_rate = rate / workers if pacing in (PACING_PPS, PACING_MBPS) else rate
+            
+            context = multiprocessing.get_context()
+            counters = context.Array('q', workers * _COUNTER_SLOTS, lock=False)
+            counter_view = _CounterView(counters, workers)
+            if self.progress is not None:
+                self.progress.watch(counter_view)
+            if self.telemetry is not None:
+                telemetry_results = context.SimpleQueue()
+            sink_append = interface in self._opened_sinks
+            self._opened_sinks.add(interface)
+            for index in range(workers):
+                queue = context.Queue(SHARD_QUEUE_DEPTH)
+                process = context.Process(
+                    target=_worker_main,
+                    # 抓包文件伪接口每个进程写入各自的文件
+                    args=(index, shard_sink(interface, index), self.engine, self.engine_options, pacing, worker_rate,
+                          worker_source, worker_dest, queue, counters, telemetry_results, sink_append),
+                    daemon=True,
+                )
+                process.start()
+                queues.append(queue)
+                processes.append(process)
+                
+            total_count = 0
+            batches = [[] for _ in range(workers)]
+            start_time = time.perf_counter()
+            last_progress = start_time
+            anchored = False
+            try:
+                for record in records:
+                    timestamp, frame = record[0], record[1]
+                    if not anchored:
+                        # 所有进程以同一时刻对应首包时间戳，按时间戳回放时彼此对齐
+                        anchor = (time.perf_counter() + START_DELAY, timestamp)
+                        for shard in range(workers):
+                            self._put(queues, processes, shard, anchor)
+                        anchored = True
+                        
+                    shard = flow_hash(frame) % workers
+                    batch = batches[shard]
+                    batch.append(record)
+                    if len(batch) >= SHARD_BATCH_SIZE:
+                        self._put(queues, processes, shard, batch)
+                        batches[shard] = []
+                        
+                    total_count += 1
+                    if total_count & 0xfff == 0:
+                        last_progress = self._report_progress(counters, last_progress)
+            finally:
+                if hasattr(records, 'close'):
+                    records.close()
+                    
+            for shard in range(workers):
+                if not anchored:
+                    self._put(queues, processes, shard, None)
+                if batches[shard]:
+                    self._put(queues, processes, shard, batches[shard])
+                self._put(queues, processes, shard, None)
+                
+            while any(process.is_alive() for process in processes):
+                for process in processes:
+                    process.join(PROGRESS_INTERVAL / workers)
+                last_progress = self._report_progress(counters, last_progress)
+                
+            if total_count == 0:
+                print("PCAP文件中没有数据包")
+                return False
+                
+            stats = self._parallel_stats(counters, start_time)
+            self._report_progress(counters, 0.0)
+            failed = [index for index, process in enumerate(processes) if process.exitcode != 0]
+            for index in failed:
+                print(f"工作进程 {index} 异常退出（退出码 {processes[index].exitcode}）")
+                
+            print(f"成功发送 {stats['packets']}/{total_count} 个数据包")
+            print(f"发送速率: {stats['pps']:.0f} pps, {stats['mbps']:.2f} Mbps"
+                  f"（引擎: {self.engine}，{workers} 个进程，耗时 {stats['elapsed']:.3f} 秒）")
+            return stats['packets'] > 0 and not failed
+            
+        except Exception as e:
+            print(f"并行发送PCAP文件时出错: {str(e)}")
+            return False
+            
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+            for queue in queues:
+                # 工作进程已结束，不再等待未取走的数据写入管道，否则退出时会阻塞
+                queue.cancel_join_thread()
+                queue.close()
+            _merge_worker_telemetry(self.telemetry, telemetry_results)
+            if counter_view is not None and self.progress is not None:
+                self.progress.unwatch(counter_view)
+                
+    def _put(self, queues: list, processes: list, shard: int, item):
+        """把消息放入工作进程队列，队列满时等待，工作进程已退出时抛出RuntimeError"""
+        while True:
+            try:
+                queues[shard].put(item, timeout=PROGRESS_INTERVAL)
+                return
+            except queue_module.Full:
+                if not processes[shard].is_alive():
+                    raise RuntimeError(f"工作进程 {shard} 已退出（退出码 {processes[shard].exitcode}）")
+                    
+    def _parallel_stats(self, counters, start_time: float) -> dict:
+        """汇总各工作进程的计数，保存到last_stats"""
+        elapsed = time.perf_counter() - start_time
+        per_worker = [_worker_counts(counters, index) for index in range(self.workers)]
+        packets = sum(worker['packets'] for worker in per_worker)
+        byte_count = sum(worker['bytes'] for worker in per_worker)
+        self.last_stats = {
+            'engine': self.engine,
+            'packets': packets,
+            'bytes': byte_count,
+            'elapsed': elapsed,
+            'pps': packets / elapsed if elapsed > 0 else 0.0,
+            'mbps': byte_count * 8 / elapsed / 1e6 if elapsed > 0 else 0.0,
+            'workers': per_worker,
+        }
+        return self.last_stats
+        
+    def _report_progress(self, counters, last_progress: float) -> float:
+        """间隔足够时把汇总进度交给progress_callback，并更新遥测的速率时间线
+        
+        Returns:
+            本次或上次回调的时刻
+        """
+        now = time.perf_counter()
+        if now - last_progress < PROGRESS_INTERVAL:
+            return last_progress
+        if self.progress_callback is None and self.telemetry is None:
+            return last_progress
+        packets = sum(counters[index * _COUNTER_SLOTS] for index in range(self.workers))
+        byte_count = sum(counters[index * _COUNTER_SLOTS + 1] for index in range(self.workers))
+        if self.telemetry is not None:
+            self.telemetry.tick(now, packets, byte_count)
+        if self.progress_callback is not None:
+            self.progress_callback(packets, byte_count)
+        return now
+
+def _fanout_worker_main(index: int, interface: str, engine: str, engine_options: dict, pacing: str,
+                        rate: float, frames: tuple, loop_count: int, duration: float,
+                        counters, elapsed, ready, start, telemetry_results=None, sink_append: bool = False):
+    """扇出工作进程入口：在一个接口上发送共享帧文件中的帧
+    
+    frames是主进程写入的共享帧文件句柄（见FrameBuffer.save_shared），各进程映射同一个文件，
+    不论进程以fork还是spawn方式启动都不复制帧数据。
+    映射文件并打开发送会话后登记就绪，等主进程写入统一的开始时刻后再开始发送，
+    各接口的发送起点和按时间戳回放的调度彼此对齐。
+    开启遥测时结束后把本进程的遥测数据放入telemetry_results。
+    sink_append为True时抓包文件伪接口接着写入本次任务中已写入的文件。
+    """
+    base = index * _COUNTER_SLOTS
+    buffer = FrameBuffer.open_shared(frames)
+    telemetry = SendTelemetry() if telemetry_results is not None else None
+    try:
+        session = SendSession(interface, engine, telemetry=telemetry, sink_append=sink_append, **engine_options)
+    except BaseException:
+        buffer.close()
+        raise
+    errors = 0
+    try:
+        with ready.get_lock():
+            ready.value += 1
+        while start.value == 0.0:
+            time.sleep(0.001)
+        start_clock = start.value
+        delay = start_clock - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+            
+        send = session.send
+        end_time = start_clock + duration if duration > 0 else None
+        loop_index = 0
+        expired = False
+        while not expired and (loop_count <= 0 or loop_index < loop_count):
+            pacer = create_pacer(pacing, rate)
+            if pacer is not None:
+                pacer.stop_time = end_time
+            if isinstance(pacer, DeadlineScheduler):
+                pacer.anchor(start_clock if loop_index == 0 else time.perf_counter(), buffer.first_timestamp)
+            for i, (timestamp, frame) in enumerate(buffer):
+                try:
+                    on_time = pacer is not None and pacer.wait(timestamp, len(frame))
+                    # 限速发送时每次等待后都检查持续时间，各接口都在 start + duration 停止
+                    if pacer is not None and end_time is not None and time.perf_counter() >= end_time:
+                        expired = True
+                        break
+                    send(frame)
+                    if on_time:
+                        session.flush()
+                except Exception:
+                    errors += 1
+                    
+                if i & 0x3ff == 0x3ff:
+                    counters[base] = session.packets_sent
+                    counters[base + 1] = session.bytes_sent
+                    counters[base + 2] = errors
+                    # 全速发送时每1024个包检查一次是否到达持续时间
+                    if end_time is not None and time.perf_counter() >= end_time:
+                        expired = True
+                        break
+                        
+            session.flush()
+            loop_index += 1
+            if end_time is not None and time.perf_counter() >= end_time:
+                expired = True
+        elapsed[index] = time.perf_counter() - start_clock
+    finally:
+        session.close()
+        buffer.close()
+        counters[base] = session.packets_sent
+        counters[base + 1] = session.bytes_sent
+        counters[base + 2] = errors
+        if telemetry is not None:
+            telemetry_results.put(telemetry.worker_totals())
+
+class FanoutPacketSender(RawPacketSender):
+    """多接口扇出发送器
+    
+    每个文件只读取和改写一次，装入内存帧缓冲区并写入共享帧文件后由每个接口各自的进程映射并同时发送，
+    总耗时与只发送到一个接口相同，而不是N个接口之和。
+    """
+    
+    def __init__(self, **options):
+        """初始化发送器
+        
+        Args:
+            **options: 传给PacketSender的参数（engine、pacing、rate及引擎参数）
+        """
+        super().__init__(**options)
+        # 发送过程中定期调用 progress_callback(已发包数, 已发字节数)，为所有接口之和
+        self.progress_callback: Optional[Callable[[int, int], None]] = None
+        # 发送过程中定期对每个接口调用 interface_progress_callback(接口名, 已发包数, 已发字节数)
+        self.interface_progress_callback: Optional[Callable[[str, int, int], None]] = None
+        # 已写入过的抓包文件伪接口，之后的文件接着写入而不是清空重写
+        self._opened_sinks = set()
+        
+    def send_fanout(self, pcap_file: str, interfaces: List[str], source_ip: Optional[str] = None,
+                    dest_ip: Optional[str] = None, loop_count: int = 1, duration: float = 0.0) -> bool:
+        """把一个文件同时发送到多个网络接口
+        
+        Args:
+            pcap_file: PCAP文件路径
+            interfaces: 网络接口名称列表
+            source_ip: 可选的源IP地址
+            dest_ip: 可选的目的IP地址
+            loop_count: 循环次数，0表示不限次数（需要指定duration）
+            duration: 最长发送时间（秒），0表示不限时间
+            
+        Returns:
+            所有接口是否都发送成功
+        """
+        if loop_count <= 0 and duration <= 0:
+            print("循环次数和持续时间不能同时为不限")
+            return False
+            
+        processes = []
+        counter_view = None
+        telemetry_results = None
+        frames = None
+        try:
+            # 检查文件是否存在
+            if not os.path.exists(pcap_file):
+                print(f"PCAP文件不存在: {pcap_file}")
+                return False
+                
+            print(f"正在加载PCAP文件到内存: {pcap_file}")
+            buffer = self.load_frame_buffer(pcap_file, source_ip, dest_ip)
+            if len(buffer) == 0:
+                print("PCAP文件中没有数据包")
+                return False
+            print(f"已加载 {len(buffer)} 个数据包，同时发送到 {len(interfaces)} 个接口: {', '.join(interfaces)}")
+            # 各接口的进程映射同一个共享帧文件，只传文件句柄
+            frames = buffer.save_shared()
+            buffer = None
+            
+            count = len(interfaces)
+            context = multiprocessing.get_context()
+            counters = context.Array('q', count * _COUNTER_SLOTS, lock=False)
+            counter_view = _CounterView(counters, count)
+            if self.progress is not None:
+                self.progress.watch(counter_view)
+            elapsed = context.Array('d', count, lock=False)
+            ready = context.Value('i', 0)
+            start = context.Value('d', 0.0, lock=False)
+            if self.telemetry is not None:
+                telemetry_results = context.SimpleQueue()
+            for index, interface in enumerate(interfaces):
+                sink_append = interface in self._opened_sinks
+                self._opened_sinks.add(interface)
+                process = context.Process(
+                    target=_fanout_worker_main,
+                    args=(index, interface, self.engine, self.engine_options, self.pacing, self.rate,
+                          frames, loop_count, duration, counters, elapsed, ready, start, telemetry_results,
+                          sink_append),
+                    daemon=True,
+                )
+                process.start()
+                processes.append(process)
+                
+            # 所有接口都打开发送会话后再统一开始
+            while ready.value < count:
+                if not all(process.is_alive() for process in processes):
+                    raise RuntimeError("有接口的发送进程启动失败")
+                time.sleep(0.001)
+            # 所有进程都已映射共享帧文件，可以删除（映射期间不能删除文件的系统上在结束后删除）
+            discard_shared_frames(frames)
+            start_clock = time.perf_counter() + START_DELAY
+            start.value = start_clock
+            
+            last_progress = start_clock
+            while any(process.is_alive() for process in processes):
+                for process in processes:
+                    process.join(PROGRESS_INTERVAL / count)
+                last_progress = self._report_progress(interfaces, counters, last_progress)
+            self._report_progress(interfaces, counters, 0.0)
+            
+            wall_time = time.perf_counter() - start_clock
+            success = True
+            per_interface = {}
+            for index, interface in enumerate(interfaces):
+                stats = _worker_counts(counters, index)
+                stats['elapsed'] = elapsed[index]
+                stats['pps'] = stats['packets'] / elapsed[index] if elapsed[index] > 0 else 0.0
+                stats['mbps'] = stats['bytes'] * 8 / elapsed[index] / 1e6 if elapsed[index] > 0 else 0.0
+                per_interface[interface] = stats
+                if processes[index].exitcode != 0 or stats['packets'] == 0:
+                    success = False
+                    print(f"接口 {interface} 发送失败（退出码 {processes[index].exitcode}）")
+                else:
+                    print(f"接口 {interface}: {stats['packets']} 个数据包, {stats['pps']:.0f} pps, "
+                          f"{stats['mbps']:.2f} Mbps，耗时 {stats['elapsed']:.3f} 秒")
+                    
+            packets = sum(stats['packets'] for stats in per_interface.values())
+            byte_count = sum(stats['bytes'] for stats in per_interface.values())
+            self.last_stats = {
+                'engine': self.engine,
+                'packets': packets,
+                'bytes': byte_count,
+                'elapsed': wall_time,
+                'pps': packets / wall_time if wall_time > 0 else 0.0,
+                'mbps': byte_count * 8 / wall_time / 1e6 if wall_time > 0 else 0.0,
+                'interfaces': per_interface,
+            }
+            print(f"发送速率: {self.last_stats['pps']:.0f} pps, {self.last_stats['mbps']:.2f} Mbps"
+                  f"（引擎: {self.engine}，{count} 个接口合计，耗时 {wall_time:.3f} 秒）")
+            return success
+            
+        except Exception as e:
+            print(f"扇出发送PCAP文件时出错: {str(e)}")
+            return False
+            
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+            if frames is not None:
+                discard_shared_frames(frames)
+            _merge_worker_telemetry(self.telemetry, telemetry_results)
+            if counter_view is not None and self.progress is not None:
+                self.progress.unwatch(counter_view)
+                
+    def _report_progress(self, interfaces: List[str], counters, last_progress: float) -> float:
+        """间隔足够时把总进度和各接口进度交给回调，并更新遥测的速率时间线
+        
+        Returns:
+            本次或上次回调的时刻
+        """
+        now = time.perf_counter()
+        if now - last_progress < PROGRESS_INTERVAL:
+            return last_progress
+        per_interface = [_worker_counts(counters, index) for index in range(len(interfaces))]
+        if self.telemetry is not None:
+            self.telemetry.tick(now, sum(stats['packets'] for stats in per_interface),
+                                sum(stats['bytes'] for stats in per_interface))
+        if self.interface_progress_callback is not None:
+            for interface, stats in zip(interfaces, per_interface):
+                self.interface_progress_callback(interface, stats['packets'], stats['bytes'])
+        if self.progress_callback is not None:
+            self.progress_callback(sum(stats['packets'] for stats in per_interface),
+                                   sum(stats['bytes'] for stats in per_interface))
+        return now
\ No newline at end of file
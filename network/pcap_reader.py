@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PCAP文件读取器
+直接解析PCAP记录头/pcapng数据块和帧数据，不依赖scapy，也不对数据包做协议解析
+"""
+
+import os
+import struct
+from typing import Iterator, List, Optional, Tuple
+
+from .compression import open_stream
+
+# 经典pcap文件魔数（微秒/纳秒时间戳）
+PCAP_MAGIC_USEC = 0xa1b2c3d4
+PCAP_MAGIC_NSEC = 0xa1b23c4d
+
+# pcapng数据块类型
+PCAPNG_BLOCK_SHB = 0x0A0D0D0A  # 节头块
+PCAPNG_BLOCK_IDB = 0x00000001  # 接口描述块
+PCAPNG_BLOCK_PB = 0x00000002   # 数据包块（已废弃）
+PCAPNG_BLOCK_SPB = 0x00000003  # 简单数据包块
+PCAPNG_BLOCK_EPB = 0x00000006  # 增强数据包块
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+
+# 以太网链路类型
+LINKTYPE_ETHERNET = 1
+
+# 文件读取缓冲区大小
+READ_BUFFER_SIZE = 1024 * 1024
+# pcapng数据块复用缓冲区的初始大小（读入接口描述块和不能seek时跳过的数据），遇到更大的块时扩大
+BLOCK_BUFFER_SIZE = 65536
+# pcapng数据包块尾部（填充、选项和块尾长度）短于该长度时读入暂存区，更长时跳过
+_TRAILER_SCRATCH = 64
+
+_GLOBAL_HEADER_LEN = 24
+_RECORD_HEADER_LEN = 16
+
+# pcapng接口描述块选项
+_IDB_OPTION_END = 0
+_IDB_OPTION_NAME = 2
+_IDB_OPTION_TSRESOL = 9
+_IDB_OPTION_TSOFFSET = 14
+
+def open_capture(pcap_file: str):
+    """按文件魔数打开经典pcap或pcapng读取器，压缩文件（.gz/.xz/.zst）先解压
+    
+    Args:
+        pcap_file: 文件路径
+        
+    Returns:
+        PcapRecordReader或PcapngRecordReader，迭代时都返回 (时间戳秒, 帧字节)
+        
+    Raises:
+        ValueError: 既不是经典pcap也不是pcapng格式
+    """
+    with open_stream(pcap_file, read_ahead=False) as f:
+        magic = f.read(4)
+    if len(magic) == 4 and struct.unpack('<I', magic)[0] == PCAPNG_BLOCK_SHB:
+        return PcapngRecordReader(pcap_file)
+    return PcapRecordReader(pcap_file)
+
+def get_pcap_linktype(pcap_file: str) -> Optional[int]:
+    """读取pcap/pcapng文件的链路类型
+    
+    pcapng文件只读取第一个数据包之前的接口描述块，文件中间出现的接口在读取记录时才能得知
+    （见records_with_linktype）。
+    
+    Args:
+        pcap_file: 文件路径
+        
+    Returns:
+        链路类型，pcapng文件中各接口链路类型不一致、格式无法识别或无法读取时返回None
+    """
+    try:
+        with open_capture(pcap_file) as reader:
+            return reader.linktype
+    except (OSError, ValueError):
+        return None
+
+def scan_capture(pcap_file: str) -> dict:
+    """快速统计抓包文件的摘要信息
+    
+    只读取记录头和数据块头，不做协议解析；非压缩的经典pcap文件直接跳过帧数据。
+    
+    Args:
+        pcap_file: 文件路径
+        
+    Returns:
+        包含packet_count、byte_count、first_timestamp、last_timestamp、
+        duration和linktype的字典，字节数为帧的抓包长度之和
+        
+    Raises:
+        OSError: 文件无法读取
+        ValueError: 文件格式无法识别
+    """
+    with open_capture(pcap_file) as reader:
+        packet_count, byte_count, first_timestamp, last_timestamp = reader.scan()
+        return {
+            'packet_count': packet_count,
+            'byte_count': byte_count,
+            'first_timestamp': first_timestamp,
+            'last_timestamp': last_timestamp,
+            'duration': max(last_timestamp - first_timestamp, 0.0),
+            'linktype': reader.linktype,
+        }
+
+class PcapRecordReader:
+    """经典pcap文件的流式记录读取器
+    
+    每次只读取一条记录，内存占用与文件大小无关。
+    迭代时返回 (时间戳秒, 帧字节) 元组。
+    """
+    
+    def __init__(self, pcap_file: str):
+        """打开pcap文件并解析全局头
+        
+        Args:
+            pcap_file: PCAP文件路径
+            
+        Raises:
+            ValueError: 文件不是经典pcap格式
+        """
+        self.pcap_file = pcap_file
+        self._file = open_stream(pcap_file, buffering=READ_BUFFER_SIZE)
+        try:
+            header = self._file.read(_GLOBAL_HEADER_LEN)
+            if len(header) < _GLOBAL_HEADER_LEN:
+                raise ValueError(f"PCAP文件头不完整: {pcap_file}")
+                
+            for endian in ('<', '>'):
+                magic = struct.unpack(endian + 'I', header[:4])[0]
+                if magic in (PCAP_MAGIC_USEC, PCAP_MAGIC_NSEC):
+                    break
+            else:
+                raise ValueError(f"不是经典pcap格式: {pcap_file}")
+                
+            _, _, _, _, self.snaplen, self.linktype = struct.unpack(endian + 'HHiIII', header[4:])
+            self.nanosecond = magic == PCAP_MAGIC_NSEC
+            self._ts_scale = 1e-9 if self.nanosecond else 1e-6
+            self._record_header = struct.Struct(endian + 'IIII')
+        except Exception:
+            self._file.close()
+            raise
+            
+    def __iter__(self) -> Iterator[Tuple[float, bytes]]:
+        read = self._file.read
+        unpack = self._record_header.unpack
+        ts_scale = self._ts_scale
+        while True:
+            header = read(_RECORD_HEADER_LEN)
+            if len(header) < _RECORD_HEADER_LEN:
+                return
+            ts_sec, ts_frac, incl_len, _ = unpack(header)
+            data = read(incl_len)
+            if len(data) < incl_len:
+                # 文件末尾的记录被截断，丢弃
+                return
+            yield ts_sec + ts_frac * ts_scale, data
+            
+    def records_with_linktype(self) -> Iterator[Tuple[float, bytes, int]]:
+        """按顺序返回 (时间戳秒, 帧字节, 链路类型)，经典pcap文件所有记录的链路类型相同"""
+        linktype = self.linktype
+        for timestamp, data in self:
+            yield timestamp, data, linktype
+            
+    def scan(self) -> Tuple[int, int, float, float]:
+        """只读取记录头，统计剩余记录
+        
+        Returns:
+            (包数, 字节数, 首包时间戳, 末包时间戳)
+        """
+        read = self._file.read
+        unpack = self._record_header.unpack
+        seekable = getattr(self._file, 'seekable', lambda: False)()
+        file_size = os.fstat(self._file.fileno()).st_size if seekable else 0
+        packet_count = byte_count = 0
+        first_timestamp = last_timestamp = 0.0
+        while True:
+            header = read(_RECORD_HEADER_LEN)
+            if len(header) < _RECORD_HEADER_LEN:
+                break
+            ts_sec, ts_frac, incl_len, _ = unpack(header)
+            if seekable:
+                # 直接跳过帧数据，超出文件末尾说明最后一条记录被截断
+                if self._file.seek(incl_len, os.SEEK_CUR) > file_size:
+                    break
+            elif len(read(incl_len)) < incl_len:
+                break
+            last_timestamp = ts_sec + ts_frac * self._ts_scale
+            if packet_count == 0:
+                first_timestamp = last_timestamp
+            packet_count += 1
+            byte_count += incl_len
+        return packet_count, byte_count, first_timestamp, last_timestamp
+        
+    def close(self):
+        """关闭文件"""
+        self._file.close()
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+class PcapngInterface:
+    """pcapng接口描述块中与回放相关的信息"""
+    
+    __slots__ = ('linktype', 'snaplen', 'name', 'ts_scale', 'ts_offset')
+    
+    def __init__(self, linktype: int, snaplen: int, name: Optional[str] = None,
+                 ts_scale: float = 1e-6, ts_offset: int = 0):
+        self.linktype = linktype
+        self.snaplen = snaplen
+        self.name = name
+        # 时间戳单位（秒），由if_tsresol选项决定，默认微秒
+        self.ts_scale = ts_scale
+        # 时间戳偏移（秒），由if_tsoffset选项决定
+        self.ts_offset = ts_offset
+
+class PcapngRecordReader:
+    """pcapng文件的流式数据块读取器
+    
+    逐块读取，按接口描述块记录每个接口的链路类型和时间戳精度，
+    解析增强数据包块（EPB）、简单数据包块（SPB）和旧式数据包块（PB），
+    其他数据块直接跳过。支持多个节（SHB）以及节之间字节序不同的文件。
+    块头、固定字段和块尾用readinto读入复用的缓冲区原地解析，每个数据包只新建帧字节一个对象；
+    文件中间出现的接口描述块和节头块同步反映在linktype中。
+    迭代时返回 (时间戳秒, 帧字节) 元组，与PcapRecordReader一致；
+    需要接口编号或每帧的链路类型时使用records_with_interface()或records_with_linktype()。
+    """
+    
+    def __init__(self, pcap_file: str):
+        """打开pcapng文件并读取开头的节头块和接口描述块
+        
+        Args:
+            pcap_file: PCAPNG文件路径
+            
+        Raises:
+            ValueError: 文件不是pcapng格式
+        """
+        self.pcap_file = pcap_file
+        self.interfaces: List[PcapngInterface] = []
+        # 文件中出现过的所有链路类型（跨节累计）
+        self._linktypes = set()
+        self.linktype = None
+        self.snaplen = 0
+        # 块头、数据包块固定字段和数据块内容的复用缓冲区
+        self._header = bytearray(8)
+        self._header_view = memoryview(self._header)
+        self._fixed_view = memoryview(bytearray(20))
+        self._block = bytearray(BLOCK_BUFFER_SIZE)
+        self._block_view = memoryview(self._block)
+        # 读取接口描述块时多读出的下一个块头仍在_header中，迭代时先处理（压缩流不能回退）
+        self._header_pending = False
+        self._file = open_stream(pcap_file, buffering=READ_BUFFER_SIZE)
+        self._seekable = getattr(self._file, 'seekable', lambda: False)()
+        self._file_size = os.fstat(self._file.fileno()).st_size if self._seekable else 0
+        try:
+            header = self._header_view
+            if self._file.readinto(header) < 8 or struct.unpack_from('<I', header)[0] != PCAPNG_BLOCK_SHB:
+                raise ValueError(f"不是pcapng格式: {pcap_file}")
+            self._read_section_header()
+            
+            # 读取紧跟在节头之后的接口描述块，用于确定链路类型
+            while self._file.readinto(header) == 8:
+                block_type, block_len = self._block_header.unpack_from(header)
+                if block_type != PCAPNG_BLOCK_IDB or block_len < 20:
+                    self._header_pending = True
+                    break
+                body = self._read_block(block_len - 8)
+                if body is None:
+                    break
+                self._add_interface(body)
+        except Exception:
+            self._file.close()
+            raise
+            
+    def _read_section_header(self):
+        """解析_header中的节头块，确定本节的字节序并清空接口列表"""
+        bom = self._file.read(4)
+        if len(bom) < 4:
+            raise ValueError(f"pcapng节头不完整: {self.pcap_file}")
+        if struct.unpack('<I', bom)[0] == PCAPNG_BYTE_ORDER_MAGIC:
+            endian = '<'
+        elif struct.unpack('>I', bom)[0] == PCAPNG_BYTE_ORDER_MAGIC:
+            endian = '>'
+        else:
+            raise ValueError(f"pcapng字节序标记无效: {self.pcap_file}")
+            
+        self._endian = endian
+        self._block_header = struct.Struct(endian + 'II')
+        self._epb_header = struct.Struct(endian + 'IIIII')
+        self._pb_header = struct.Struct(endian + 'HHIIII')
+        self._spb_header = struct.Struct(endian + 'I')
+        self.interfaces = []
+        
+        block_len = struct.unpack_from(endian + 'I', self._header, 4)[0]
+        if block_len < 28:
+            raise ValueError(f"pcapng节头长度无效: {self.pcap_file}")
+        if not self._skip(block_len - 12):
+            raise ValueError(f"pcapng节头不完整: {self.pcap_file}")
+            
+    def _read_block(self, size: int) -> Optional[memoryview]:
+        """把数据块中块头之后的size字节读入复用缓冲区
+        
+        Returns:
+            缓冲区前size字节的视图，文件末尾的数据块被截断时返回None
+        """
+        view = self._block_buffer(size)[:size]
+        if self._file.readinto(view) < size:
+            return None
+        return view
+        
+    def _block_buffer(self, size: int) -> memoryview:
+        """返回至少size字节的复用缓冲区，不够大时换一个更大的缓冲区（调用方仍持有的旧视图不受影响）"""
+        if size > len(self._block):
+            self._block = bytearray(max(size, len(self._block) * 2))
+            self._block_view = memoryview(self._block)
+        return self._block_view
+        
+    def _skip(self, size: int) -> bool:
+        """跳过size字节，可定位的文件直接seek，否则读入复用缓冲区
+        
+        Returns:
+            是否完整跳过（文件末尾被截断时为False）
+        """
+        if self._seekable:
+            return self._file.seek(size, os.SEEK_CUR) <= self._file_size
+        while size > 0:
+            chunk = min(size, len(self._block))
+            if self._file.readinto(self._block_view[:chunk]) < chunk:
+                return False
+            size -= chunk
+        return True
+        
+    def _add_interface(self, body):
+        """解析接口描述块（不含块头8字节），同时更新文件的链路类型"""
+        endian = self._endian
+        linktype, _, snaplen = struct.unpack_from(endian + 'HHI', body, 0)
+        interface = PcapngInterface(linktype, snaplen)
+        
+        # 选项区域位于固定字段之后、块尾长度字段之前
+        offset = 8
+        end = len(body) - 4
+        while offset + 4 <= end:
+            code, length = struct.unpack_from(endian + 'HH', body, offset)
+            offset += 4
+            if code == _IDB_OPTION_END:
+                break
+            value = body[offset:offset + length]
+            if code == _IDB_OPTION_TSRESOL and length >= 1:
+                resolution = value[0]
+                if resolution & 0x80:
+                    interface.ts_scale = 2.0 ** -(resolution & 0x7f)
+                else:
+                    interface.ts_scale = 10.0 ** -resolution
+            elif code == _IDB_OPTION_TSOFFSET and length >= 8:
+                interface.ts_offset = struct.unpack_from(endian + 'q', value)[0]
+            elif code == _IDB_OPTION_NAME:
+                interface.name = bytes(value).rstrip(b'\0').decode('utf-8', 'replace')
+            offset += (length + 3) & ~3
+        self.interfaces.append(interface)
+        
+        # 文件中所有接口（包括之后的节中的接口）链路类型一致时才有确定的链路类型
+        self._linktypes.add(linktype)
+        self.linktype = linktype if len(self._linktypes) == 1 else None
+        self.snaplen = max(self.snaplen, snaplen)
+        
+    def records_with_interface(self) -> Iterator[Tuple[float, bytes, int]]:
+        """按顺序返回 (时间戳秒, 帧字节, 接口编号)
+        
+        简单数据包块没有时间戳和接口编号，沿用上一个数据包的时间戳，接口编号为0。
+        读取到新的接口描述块或节头块时同步更新linktype。
+        """
+        return self._records()
+        
+    def records_with_linktype(self) -> Iterator[Tuple[float, bytes, Optional[int]]]:
+        """按顺序返回 (时间戳秒, 帧字节, 链路类型)
+        
+        链路类型取帧所属接口的接口描述块，文件中间的接口描述块和节头块读到时即生效，
+        不必事先读完整个文件；帧所属的接口不存在时链路类型为None。
+        """
+        for timestamp, data, interface_id in self._records():
+            interfaces = self.interfaces
+            yield timestamp, data, interfaces[interface_id].linktype if interface_id < len(interfaces) else None
+            
+    def _records(self, with_interface: bool = True) -> Iterator[tuple]:
+        """逐块解析文件
+        
+        块头和数据包块的固定字段用readinto读入固定的缓冲区原地解析，填充、选项和块尾长度
+        读入暂存区丢弃，较长的选项区直接跳过，都不再创建bytes对象。
+        
+        Args:
+            with_interface: 是否返回接口编号，为False时返回 (时间戳秒, 帧字节)
+        """
+        read = self._file.read
+        readinto = self._file.readinto
+        header = self._header_view
+        fixed = self._fixed_view
+        spb_fixed = fixed[:4]
+        # 常见的短尾部（填充加块尾长度）读入暂存区预先切好的视图，不必每块切片
+        scratch = memoryview(bytearray(_TRAILER_SCRATCH))
+        trailers = [scratch[:size] for size in range(_TRAILER_SCRATCH)]
+        block_header = self._block_header
+        last_timestamp = 0.0
+        while True:
+            if self._header_pending:
+                self._header_pending = False
+            elif readinto(header) < 8:
+                return
+            block_type, block_len = block_header.unpack_from(header)
+            
+            if block_type == PCAPNG_BLOCK_SHB:
+                # 新的节，字节序和接口列表都可能变化
+                try:
+                    self._read_section_header()
+                except ValueError:
+                    return
+                block_header = self._block_header
+                continue
+                
+            if block_len < 12 or block_len & 3:
+                # 块长度无效，文件已损坏
+                return
+                
+            if block_type == PCAPNG_BLOCK_EPB and block_len >= 32:
+                if readinto(fixed) < 20:
+                    return
+                interface_id, ts_high, ts_low, cap_len, _ = self._epb_header.unpack_from(fixed)
+                remaining = block_len - 28
+            elif block_type == PCAPNG_BLOCK_PB and block_len >= 32:
+                if readinto(fixed) < 20:
+                    return
+                interface_id, _, ts_high, ts_low, cap_len, _ = self._pb_header.unpack_from(fixed)
+                remaining = block_len - 28
+            elif block_type == PCAPNG_BLOCK_SPB and block_len >= 16:
+                if readinto(spb_fixed) < 4:
+                    return
+                orig_len = self._spb_header.unpack_from(spb_fixed)[0]
+                interface_id = 0
+                remaining = block_len - 12
+                cap_len = min(orig_len, remaining - 4)
+                if self.interfaces and self.interfaces[0].snaplen:
+                    cap_len = min(cap_len, self.interfaces[0].snaplen)
+                ts_high = None
+            elif block_type == PCAPNG_BLOCK_IDB and block_len >= 20:
+                # 文件中间的接口描述块，同时更新linktype
+                body = self._read_block(block_len - 8)
+                if body is None:
+                    return
+                self._add_interface(body)
+                continue
+            else:
+                if not self._skip(block_len - 8):
+                    return
+                continue
+                
+            if cap_len > remaining - 4:
+                return
+            # 帧数据是每个数据包唯一新建的对象，调用方可能保留（如分片批次），不能复用缓冲区
+            data = read(cap_len)
+            if len(data) < cap_len:
+                return
+            # 跳过填充、选项和块尾长度字段
+            trailer = remaining - cap_len
+            if trailer < _TRAILER_SCRATCH:
+                if readinto(trailers[trailer]) < trailer:
+                    # 文件末尾的数据块被截断，丢弃
+                    return
+            elif not self._skip(trailer):
+                return
+                
+            if ts_high is not None:
+                if interface_id >= len(self.interfaces):
+                    continue
+                interface = self.interfaces[interface_id]
+                last_timestamp = ((ts_high << 32) | ts_low) * interface.ts_scale + interface.ts_offset
+            yield (last_timestamp, data, interface_id) if with_interface else (last_timestamp, data)
+            
+    def __iter__(self) -> Iterator[Tuple[float, bytes]]:
+        return self._records(with_interface=False)
+        
+    def scan(self) -> Tuple[int, int, float, float]:
+        """统计剩余的数据包（pcapng的数据块需要逐块解析，帧数据一并读出）
+        
+        Returns:
+            (包数, 字节数, 首包时间戳, 末包时间戳)
+        """
+        packet_count = byte_count = 0
+        first_timestamp = last_timestamp = 0.0
+        for last_timestamp, data in self._records(with_interface=False):
+            if packet_count == 0:
+                first_timestamp = last_timestamp
+            packet_count += 1
+            byte_count += len(data)
+        return packet_count, byte_count, first_timestamp, last_timestamp
+        
+    def close(self):
+        """关闭文件"""
+        self._file.close()
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
\ No newline at end of file
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件预读
+发送当前文件时在后台进程中读取并准备后续文件，缩短文件之间的空闲时间
+"""
+
+from collections import deque
+from typing import Iterator, List, Optional, Tuple
+
+from .compression import estimate_uncompressed_size
+from .frame_buffer import FrameBuffer, discard_shared_frames
+
+# 预读文件占用内存的默认上限（字节）
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+def _load_shared_frames(sender, pcap_file: str, source_ip: Optional[str], dest_ip: Optional[str]) -> tuple:
+    """预读进程入口：读取并改写一个文件，写入共享帧文件后只把句柄传回发送进程"""
+    return sender.load_frame_buffer(pcap_file, source_ip, dest_ip).save_shared()
+
+def _discard_unused(future):
+    """预读器关闭后才完成的预读：删除不会再用到的共享帧文件"""
+    if not future.cancelled() and future.exception() is None:
+        discard_shared_frames(future.result())
+
+class FramePrefetcher:
+    """按顺序预读文件的流水线
+    
+    读取、解析和IP改写在独立的预读进程中用发送器的load_frame_buffer完成，
+    不与发送线程争用GIL；准备好的帧写入共享帧文件，发送进程只收到文件句柄并直接映射，
+    帧数据不经进程间管道序列化和复制。
+    已提交预读但尚未发送完的文件总大小不超过memory_budget，当前文件发送完、
+    取下一个文件时释放它占用的预算。第一个文件以及超过预算的文件不预读，
+    迭代返回的缓冲区为None，由调用方按流式方式发送。
+    """
+    
+    def __init__(self, sender, pcap_files: List[str], source_ip: Optional[str] = None,
+                 dest_ip: Optional[str] = None, memory_budget: int = DEFAULT_MEMORY_BUDGET):
+        """初始化预读器
+        
+        Args:
+            sender: 提供load_frame_buffer方法、可以被pickle的发送器
+            pcap_files: 按发送顺序排列的文件列表
+            source_ip: 可选的源IP地址
+            dest_ip: 可选的目的IP地址
+            memory_budget: 预读文件占用内存的上限（字节）
+        """
+        self.sender = sender
+        self.pcap_files = list(pcap_files)
+        self.source_ip = source_ip
+        self.dest_ip = dest_ip
+        self.memory_budget = memory_budget
+        self._executor = None
+        # 已提交的文件：(路径, future或None, 预算大小)，按发送顺序排列
+        self._pending = deque()
+        self._next_index = 0
+        self._in_use = 0
+        
+    def start(self):
+        """启动预读进程并提交预算允许的文件"""
+        from concurrent.futures import ProcessPoolExecutor
+        
+        self._executor = ProcessPoolExecutor(max_workers=1)
+        self._submit()
+        
+    def close(self):
+        """停止预读，尚未开始的预读任务不再执行，已完成或正在进行的预读写入的共享帧文件被删除"""
+        if self._executor is not None:
+            for _, future, _ in self._pending:
+                if future is not None and not future.cancel():
+                    future.add_done_callback(_discard_unused)
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            
+    def __enter__(self):
+        self.start()
+        return self
+        
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+        
+    def __iter__(self) -> Iterator[Tuple[str, Optional[FrameBuffer]]]:
+        """按顺序返回 (文件路径, 帧缓冲区)
+        
+        返回的缓冲区在取下一个文件之前有效，之后其映射被释放，内存预算释放给后续文件。
+        """
+        while self._pending:
+            pcap_file, future, size = self._pending.popleft()
+            buffer = None
+            if future is not None:
+                try:
+                    buffer = FrameBuffer.open_shared(future.result(), remove=True)
+                except Exception as e:
+                    if future.exception() is None:
+                        discard_shared_frames(future.result())
+                    print(f"预读文件失败，改为直接发送: {pcap_file}: {str(e)}")
+            try:
+                yield pcap_file, buffer
+            finally:
+                if buffer is not None:
+                    buffer.close()
+                buffer = None
+                self._in_use -= size
+                self._submit()
+                
+    def _submit(self):
+        """在预算允许时依次提交后续文件"""
+        while self._next_index < len(self.pcap_files):
+            pcap_file = self.pcap_files[self._next_index]
+            try:
+                # 压缩文件按解压后的大小计入预算
+                size = estimate_uncompressed_size(pcap_file)
+            except OSError:
+                size = 0
+                
+            if self._next_index == 0 or size == 0 or size > self.memory_budget:
+                # 第一个文件没有可以重叠的发送，无法读取或超过预算的文件也交给调用方流式发送
+                self._pending.append((pcap_file, None, 0))
+            elif self._in_use > 0 and self._in_use + size > self.memory_budget:
+                return
+            else:
+                future = self._executor.submit(_load_shared_frames, self.sender, pcap_file,
+                                               self.source_ip, self.dest_ip)
+                self._pending.append((pcap_file, future, size))
+                self._in_use += size
+            self._next_index += 1
\ No newline at end of file
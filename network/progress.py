@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发送进度计数
+发送线程/进程只管累计计数，界面线程定时读取，发送循环中不需要发信号或加锁
+"""
+
+from typing import Tuple
+
+class SendProgress:
+    """整个发送任务的已发包数和字节数
+    
+    被监视的对象是本来就在累计packets_sent/bytes_sent的SendSession，
+    或工作进程共享计数的只读视图，发送循环不需要为进度做任何额外工作。
+    已结束的计数累加到基数中，基数和监视列表放在一个元组里整体替换，
+    读取方不需要加锁也不会读到不一致的中间状态。
+    watch/unwatch只应由发送线程调用，sample可以在任意线程调用。
+    """
+    
+    def __init__(self):
+        # (已结束部分的包数, 字节数, 正在发送的计数来源)
+        self._state = (0, 0, ())
+        
+    def watch(self, source):
+        """开始统计一个计数来源
+        
+        Args:
+            source: 提供packets_sent和bytes_sent属性的对象
+        """
+        packets, byte_count, sources = self._state
+        self._state = (packets, byte_count, sources + (source,))
+        
+    def unwatch(self, source):
+        """停止统计一个计数来源，把它的最终计数累加到基数中
+        
+        Args:
+            source: watch过的计数来源
+        """
+        packets, byte_count, sources = self._state
+        if source not in sources:
+            return
+        self._state = (packets + source.packets_sent, byte_count + source.bytes_sent,
+                       tuple(item for item in sources if item is not source))
+        
+    def sample(self) -> Tuple[int, int]:
+        """读取当前的累计进度
+        
+        Returns:
+            (已发包数, 已发字节数)
+        """
+        packets, byte_count, sources = self._state
+        for source in sources:
+            packets += source.packets_sent
+            byte_count += source.bytes_sent
+        return packets, byte_count
+        
+    def __reduce__(self):
+        # 发送器被传给预读进程时不复制正在监视的会话，子进程得到新的空计数
+        return (SendProgress, ())
\ No newline at end of file
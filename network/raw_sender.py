@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+原始字节发送器
+不经过scapy解析，直接把PCAP文件中的原始帧写到网卡
+"""
+
+import os
+import time
+from typing import Iterator, Optional, Tuple
+
+from .frame_buffer import FrameBuffer
+from .packet_sender import PacketSender, SendSession, load_scapy
+from .pcap_reader import LINKTYPE_ETHERNET, get_pcap_linktype, open_capture
+from .rewrite import IpRewriter
+
+class RawPacketSender(PacketSender):
+    """原始字节发送器类
+    
+    与PacketSender参数相同，可以直接替换使用。逐条读取pcap/pcapng记录并原样发送帧字节，
+    省去scapy的解析、复制和重新组包；需要改写IP地址时在原始字节上替换地址并
+    增量更新校验和。无法识别的文件格式、开头各接口链路类型不一致的pcapng，
+    或需要改写的非以太网抓包，回退到PacketSender的scapy路径；pcapng文件中间
+    出现的非以太网接口，其中的帧在读到时逐帧经scapy改写（见rewrite_record）。
+    """
+    
+    def can_send_raw(self, pcap_file: str, source_ip: Optional[str] = None, dest_ip: Optional[str] = None) -> bool:
+        """判断文件能否走原始字节路径
+        
+        Args:
+            pcap_file: PCAP文件路径
+            source_ip: 可选的源IP地址
+            dest_ip: 可选的目的IP地址
+            
+        Returns:
+            是否可以不经scapy直接发送
+        """
+        # 只检查第一个数据包之前的接口，pcapng文件中间新出现的接口在读取时逐帧处理，不必先读完整个文件
+        linktype = get_pcap_linktype(pcap_file)
+        if linktype is None:
+            return False
+        return linktype == LINKTYPE_ETHERNET or not self.needs_rewrite(source_ip, dest_ip)
+        
+    def rewrite_record(self, frame: bytes, linktype: Optional[int], rewriter: IpRewriter) -> bytes:
+        """按帧所属接口的链路类型改写IP地址
+        
+        以太网帧直接在原始字节上改写；pcapng文件中间出现的其他链路类型的帧回退到scapy，
+        按链路类型解析后由rewrite_packet改写，与scapy路径的结果一致。
+        
+        Args:
+            frame: 原始帧字节
+            linktype: 帧所属接口的链路类型，未知时为None
+            rewriter: IP地址改写器
+            
+        Returns:
+            改写后的帧字节
+        """
+        if linktype == LINKTYPE_ETHERNET:
+            return rewriter.rewrite(frame)
+        load_scapy()
+        from scapy.config import conf
+        # 与scapy的PcapReader一致，无法识别的链路类型按原始数据处理
+        layer = conf.l2types.num2layer.get(linktype, conf.raw_layer)
+        return self.rewrite_packet(layer(frame), rewriter)
+        
+    def _rewrite_records(self, reader, rewriter: IpRewriter) -> Iterator[Tuple[float, bytes]]:
+        """逐帧改写读取器中的记录，改写失败的帧跳过"""
+        for index, (timestamp, frame, linktype) in enumerate(reader.records_with_linktype(), 1):
+            try:
+                frame = self.rewrite_record(frame, linktype, rewriter)
+            except Exception as e:
+                print(f"改写第 {index} 个数据包时出错: {str(e)}")
+                continue
+            yield timestamp, frame
+            
+    def load_frame_buffer(self, pcap_file: str, source_ip: Optional[str] = None,
+                          dest_ip: Optional[str] = None) -> FrameBuffer:
+        """不经scapy把文件中的原始帧装入内存，无法直接读取时回退到scapy路径
+        
+        Args:
+            pcap_file: PCAP文件路径
+            source_ip: 可选的源IP地址
+            dest_ip: 可选的目的IP地址
+            
+        Returns:
+            帧缓冲区
+        """
+        if not self.can_send_raw(pcap_file, source_ip, dest_ip):
+            return super().load_frame_buffer(pcap_file, source_ip, dest_ip)
+            
+        with open_capture(pcap_file) as reader:
+            if not self.needs_rewrite(source_ip, dest_ip):
+                return FrameBuffer.from_records(reader)
+            return FrameBuffer.from_records(self._rewrite_records(reader, IpRewriter(source_ip, dest_ip)))
+            
+    def _send_packets(self, pcap_file: str, interface: str, source_ip: Optional[str], dest_ip: Optional[str],
+                      session: Optional[SendSession], pacer) -> bool:
+        """按原始字节发送文件中的帧，无法直接发送时回退到scapy路径
+        
+        Args:
+            pcap_file: PCAP文件路径
+            interface: 网络接口名称
+            source_ip: 可选的源IP地址
+            dest_ip: 可选的目的IP地址
+            session: 可选的发送会话
+            pacer: 发包调度器（见pacing.create_pacer），None表示全速发送
+            
+        Returns:
+            发送是否成功
+        """
+        if not self.can_send_raw(pcap_file, source_ip, dest_ip):
+            return super()._send_packets(pcap_file, interface, source_ip, dest_ip, session, pacer)
+            
+        own_session = False
+        try:
+            # 检查文件是否存在
+            if not os.path.exists(pcap_file):
+                print(f"PCAP文件不存在: {pcap_file}")
+                return False
+                
+            print(f"正在读取PCAP文件: {pcap_file}")
+            
+            # 需要改写时在原始字节上替换地址并增量更新校验和
+            rewriter = IpRewriter(source_ip, dest_ip) if self.needs_rewrite(source_ip, dest_ip) else None
+            
+            if session is None:
+                session = self.open_session(interface)
+                own_session = True
+                
+            # 发送数据包
+            sent_count = 0
+            total_count = 0
+            start_packets, start_bytes = session.packets_sent, session.bytes_sent
+            start_time = time.perf_counter()
+            send = session.send
+            with open_capture(pcap_file) as reader:
+                # 需要改写时连同每帧所属接口的链路类型一起读取
+                records = reader if rewriter is None else reader.records_with_linktype()
+                for record in records:
+                    total_count += 1
+                    try:
+                        if rewriter is None:
+                            timestamp, frame = record
+                        else:
+                            timestamp, frame, linktype = record
+                            frame = self.rewrite_record(frame, linktype, rewriter)
+                            
+                        on_time = pacer is not None and pacer.wait(timestamp, len(frame))
+                        send(frame)
+                        if on_time:
+                            # 按计划发送的帧不能积压在批量引擎的缓冲区中，落后时则批量追赶
+                            session.flush()
+                        sent_count += 1
+                        
+                    except Exception as e:
+                        print(f"发送第 {total_count} 个数据包时出错: {str(e)}")
+                        continue
+                        
+            # 批量引擎中可能还有未提交的帧
+            session.flush()
+            
+            if total_count == 0:
+                print("PCAP文件中没有数据包")
+                return False
+                
+            print(f"成功发送 {sent_count}/{total_count} 个数据包")
+            stats = self.report_rate(session, start_packets, start_bytes, start_time)
+            if pacer is not None:
+                stats['pacing'] = pacer.report(stats)
+            return sent_count > 0
+            
+        except Exception as e:
+            print(f"发送PCAP文件时出错: {str(e)}")
+            return False
+            
+        finally:
+            if own_session:
+                session.close()
\ No newline at end of file
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+IP地址改写
+直接在原始帧字节上替换IPv4源/目的地址，并按RFC 1624增量更新IP、TCP、UDP校验和
+"""
+
+import array
+import socket
+import sys
+from typing import Optional
+
+ETH_TYPE_IPV4 = 0x0800
+# 802.1Q / 802.1ad VLAN标签
+ETH_TYPE_VLANS = (0x8100, 0x88a8, 0x9100)
+
+IP_PROTO_TCP = 6
+IP_PROTO_UDP = 17
+
+def _address_words(address: bytes) -> int:
+    """返回IPv4地址两个16位字之和"""
+    return ((address[0] << 8) | address[1]) + ((address[2] << 8) | address[3])
+
+def _update_checksum(checksum: int, delta: int) -> int:
+    """按RFC 1624公式 HC' = ~(~HC + ~m + m') 增量更新校验和
+    
+    Args:
+        checksum: 原校验和
+        delta: 所有被修改16位字的 (~m + m') 之和
+        
+    Returns:
+        新校验和
+    """
+    total = (0xffff - checksum) + delta
+    total = (total & 0xffff) + (total >> 16)
+    total = (total & 0xffff) + (total >> 16)
+    return 0xffff - total
+
+def _checksum(data) -> int:
+    """计算互联网校验和（用于原UDP校验和为0时的完整计算）"""
+    if len(data) % 2:
+        data = bytes(data) + b'\0'
+    total = sum(array.array('H', bytes(data)))
+    total = (total & 0xffff) + (total >> 16)
+    total = (total & 0xffff) + (total >> 16)
+    if sys.byteorder == 'little':
+        total = ((total >> 8) & 0xff) | ((total & 0xff) << 8)
+    return 0xffff - total
+
+class IpRewriter:
+    """IPv4地址改写器
+    
+    只替换地址字节并增量修正校验和，不做完整的协议解析和重新组包。
+    输出与scapy改写地址后删除IP和TCP/UDP校验和、重新组包的结果逐字节一致（原校验和正确时）：
+    原UDP校验和为0、分片报文的第一片以及抓包时被截断的帧，scapy按本帧中的传输层字节完整重新计算
+    传输层校验和，这里同样完整计算；后续分片没有传输层头部，只修正IP校验和；非IPv4帧原样返回。
+    """
+    
+    def __init__(self, source_ip: Optional[str] = None, dest_ip: Optional[str] = None):
+        """初始化改写器
+        
+        Args:
+            source_ip: 新的源IP地址，为空则不修改
+            dest_ip: 新的目的IP地址，为空则不修改
+        """
+        self.source = socket.inet_aton(source_ip.strip()) if source_ip and source_ip.strip() else None
+        self.dest = socket.inet_aton(dest_ip.strip()) if dest_ip and dest_ip.strip() else None
+        self._source_words = _address_words(self.source) if self.source else 0
+        self._dest_words = _address_words(self.dest) if self.dest else 0
+        
+    def rewrite(self, frame: bytes, ip: Optional[int] = None) -> bytes:
+        """改写一个帧中的IPv4地址
+        
+        Args:
+            frame: 原始帧字节
+            ip: IPv4头部在帧中的偏移，为None时按以太网帧（可带VLAN标签）查找
+            
+        Returns:
+            改写后的帧字节，不需要修改时返回原帧
+        """
+        length = len(frame)
+        if ip is None:
+            offset = 12
+            if length < 14:
+                return frame
+            ethertype = (frame[12] << 8) | frame[13]
+            while ethertype in ETH_TYPE_VLANS and length >= offset + 6:
+                offset += 4
+                ethertype = (frame[offset] << 8) | frame[offset + 1]
+            if ethertype != ETH_TYPE_IPV4:
+                return frame
+            ip = offset + 2
+        if length < ip + 20 or (frame[ip] >> 4) != 4:
+            return frame
+            
+        # 计算被修改地址字的 ~m + m'
+        delta = 0
+        changed = False
+        source, dest = self.source, self.dest
+        if source is not None and frame[ip + 12:ip + 16] != source:
+            delta += 0x1fffe - _address_words(frame[ip + 12:ip + 16]) + self._source_words
+            changed = True
+        if dest is not None and frame[ip + 16:ip + 20] != dest:
+            delta += 0x1fffe - _address_words(frame[ip + 16:ip + 20]) + self._dest_words
+            changed = True
+            
+        # 找出传输层校验和的位置，后续分片中没有传输层头部
+        fragment = (frame[ip + 6] << 8) | frame[ip + 7]
+        ihl = (frame[ip] & 0x0f) * 4
+        l4 = ip + ihl
+        protocol = frame[ip + 9]
+        position = None
+        if not fragment & 0x1fff:
+            if protocol == IP_PROTO_TCP and length >= l4 + 18:
+                position = l4 + 16
+            elif protocol == IP_PROTO_UDP and length >= l4 + 8:
+                position = l4 + 6
+        # 分片报文的第一片、截断的帧和原UDP校验和为0的报文完整重新计算传输层校验和，地址不变时也是如此
+        recompute = position is not None and (
+            fragment & 0x2000 or length < ip + ((frame[ip + 2] << 8) | frame[ip + 3])
+            or (protocol == IP_PROTO_UDP and frame[position] == 0 and frame[position + 1] == 0))
+        if not changed and not recompute:
+            return frame
+            
+        buf = bytearray(frame)
+        if changed:
+            if source is not None:
+                buf[ip + 12:ip + 16] = source
+            if dest is not None:
+                buf[ip + 16:ip + 20] = dest
+            # IP头部校验和
+            checksum = _update_checksum((buf[ip + 10] << 8) | buf[ip + 11], delta)
+            buf[ip + 10] = checksum >> 8
+            buf[ip + 11] = checksum & 0xff
+        if position is None:
+            return bytes(buf)
+            
+        if recompute:
+            checksum = self._full_checksum(buf, ip, ihl, l4, protocol, position)
+        else:
+            checksum = _update_checksum((buf[position] << 8) | buf[position + 1], delta)
+            if protocol == IP_PROTO_UDP and checksum == 0:
+                checksum = 0xffff
+        buf[position] = checksum >> 8
+        buf[position + 1] = checksum & 0xff
+        return bytes(buf)
+        
+    def _full_checksum(self, buf: bytearray, ip: int, ihl: int, l4: int, protocol: int, position: int) -> int:
+        """与scapy一致完整计算传输层校验和
+        
+        伪头部中的长度取IP报文长度减去头部长度，校验的数据只包括本帧中属于IP报文的传输层字节
+        （UDP再以UDP长度为限），分片报文的第一片因此只按这一片的数据计算。
+        """
+        ip_end = min(ip + ((buf[ip + 2] << 8) | buf[ip + 3]), len(buf))
+        end = ip_end
+        if protocol == IP_PROTO_UDP:
+            end = min(l4 + ((buf[l4 + 4] << 8) | buf[l4 + 5]), ip_end)
+        buf[position] = 0
+        buf[position + 1] = 0
+        ip_payload_len = max(((buf[ip + 2] << 8) | buf[ip + 3]) - ihl, 0)
+        pseudo = bytes(buf[ip + 12:ip + 20]) + bytes((0, protocol)) + ip_payload_len.to_bytes(2, 'big')
+        checksum = _checksum(pseudo + bytes(buf[l4:end]))
+        if protocol == IP_PROTO_UDP and checksum == 0:
+            return 0xffff
+        return checksum
\ No newline at end of file
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发送遥测
+记录已发包数和字节数、按类型统计的发送错误、每次发送调用的耗时直方图以及实际速率随时间的变化，
+可以导出为JSON文件或Prometheus文本格式文件
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from .pacing import PACING_MBPS, PACING_PPS
+
+# 发送耗时直方图的桶数：第i个桶统计耗时在 [2^(i-1), 2^i) 纳秒之间的发送调用，
+# 最后一个桶同时包含更长的耗时（2^31纳秒约2.1秒）
+LATENCY_BUCKETS = 32
+# 速率时间线的统计间隔（秒）
+TIMELINE_INTERVAL = 1.0
+# 速率时间线最多保留的条数
+TIMELINE_HISTORY = 3600
+# 发送过程中在后台写出Prometheus遥测文件的间隔（秒）
+EXPORT_INTERVAL = 1.0
+# 停止定时导出时等待正在进行的导出完成的最长时间（秒）
+EXPORT_STOP_TIMEOUT = 5.0
+# Prometheus指标名前缀
+METRIC_PREFIX = 'playpcap'
+# 遥测导出目录中的Prometheus文件名，每次导出时覆盖（便于node_exporter的textfile收集器读取）
+PROMETHEUS_FILE_NAME = 'playpcap.prom'
+# 遥测导出目录中每次发送的JSON文件名（按开始时间）
+JSON_FILE_NAME = 'playpcap_%Y%m%d_%H%M%S.json'
+
+def _bucket_bound(index: int) -> float:
+    """第index个桶的耗时上限（秒）"""
+    return (1 << index) / 1e9
+
+class SendTelemetry:
+    """一次发送任务的遥测数据
+    
+    由SendSession在每次发送调用前后记录，只做计数和固定大小直方图的累加，
+    内存占用与包数无关。多进程发送时工作进程各自记录，结束后由主进程合并。
+    注意批量引擎（sendmmsg、TX_RING）的send只是把帧放入缓冲区，耗时不包含系统调用。
+    批量提交可能失败的引擎（sendmmsg）设置confirm_window后，最近这么多帧的耗时先暂存，
+    确认发出后才计入直方图，提交失败没有发出的帧不计入。
+    """
+    
+    def __init__(self, pacing: Optional[str] = None, requested_rate: float = 0.0,
+                 interval: float = TIMELINE_INTERVAL):
+        """开始记录
+        
+        Args:
+            pacing: 速率模式，用于对比目标速率
+            requested_rate: pps/Mbps模式下的目标速率
+            interval: 速率时间线的统计间隔（秒）
+        """
+        self.pacing = pacing
+        self.requested_rate = requested_rate
+        self.interval = interval
+        self.packets = 0
+        self.bytes = 0
+        self.errors: Dict[str, int] = {}
+        self.latency_buckets = [0] * LATENCY_BUCKETS
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        # 一次批量提交失败时最多没有发出的帧数，0表示每次发送调用返回时帧已经发出
+        self.confirm_window = 0
+        self._unconfirmed = deque()
+        self.timeline = deque(maxlen=TIMELINE_HISTORY)
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._end = None
+        self._window_start = self._start
+        self._window_end = self._start + interval
+        self._window_packets = 0
+        self._window_bytes = 0
+        # 多进程发送时工作进程尚未合并的实时计数
+        self._pending_packets = 0
+        self._pending_bytes = 0
+        
+    def record_send(self, length: int, started: float, finished: float):
+        """记录一次成功的发送调用
+        
+        Args:
+            length: 帧长度（字节）
+            started: 调用开始时刻（time.perf_counter）
+            finished: 调用结束时刻（time.perf_counter）
+        """
+        latency = finished - started
+        self.packets += 1
+        self.bytes += length
+        if self.confirm_window:
+            # 只有比最近confirm_window帧更早的帧一定已经发出
+            unconfirmed = self._unconfirmed
+            unconfirmed.append(latency)
+            if len(unconfirmed) > self.confirm_window:
+                self._add_latency(unconfirmed.popleft())
+        else:
+            self._add_latency(latency)
+        if finished >= self._window_end:
+            self.tick(finished)
+            
+    def _add_latency(self, latency: float):
+        """把一次已发出的帧的发送耗时计入直方图"""
+        self.latency_sum += latency
+        if latency > self.latency_max:
+            self.latency_max = latency
+        index = int(latency * 1e9).bit_length()
+        self.latency_buckets[index if index < LATENCY_BUCKETS else LATENCY_BUCKETS - 1] += 1
+        
+    def confirm(self):
+        """发送后端中的帧已全部提交（或提交失败已扣除），暂存的耗时全部计入直方图"""
+        unconfirmed = self._unconfirmed
+        while unconfirmed:
+            self._add_latency(unconfirmed.popleft())
+            
+    def record_error(self, error: BaseException):
+        """按异常类型记录一次发送错误"""
+        name = type(error).__name__
+        self.errors[name] = self.errors.get(name, 0) + 1
+        
+    def record_unsent(self, packets: int, byte_count: int):
+        """扣除已记为发送成功、但批量提交失败没有发出的帧，这些帧是最近记录的帧，耗时不计入直方图"""
+        self.packets -= packets
+        self.bytes -= byte_count
+        unconfirmed = self._unconfirmed
+        for _ in range(min(packets, len(unconfirmed))):
+            unconfirmed.pop()
+        
+    def merge(self, packets: int, byte_count: int, latency_buckets: List[int], latency_sum: float,
+              latency_max: float, errors: Dict[str, int]):
+        """合并工作进程记录的遥测数据
+        
+        Args:
+            packets: 已发包数
+            byte_count: 已发字节数
+            latency_buckets: 发送耗时直方图
+            latency_sum: 发送耗时之和（秒）
+            latency_max: 最大发送耗时（秒）
+            errors: 按类型统计的错误数
+        """
+        self.packets += packets
+        self.bytes += byte_count
+        # 合并时工作进程都已结束，实时计数已经包含在合并的数据中
+        self._pending_packets = 0
+        self._pending_bytes = 0
+        for index, count in enumerate(latency_buckets):
+            self.latency_buckets[index] += count
+        self.latency_sum += latency_sum
+        self.latency_max = max(self.latency_max, latency_max)
+        for name, count in errors.items():
+            self.errors[name] = self.errors.get(name, 0) + count
+            
+    def worker_totals(self) -> tuple:
+        """返回需要交给主进程合并的数据，参数顺序与merge一致"""
+        self.confirm()
+        return (self.packets, self.bytes, list(self.latency_buckets), self.latency_sum,
+                self.latency_max, dict(self.errors))
+                
+    def tick(self, now: Optional[float] = None, pending_packets: int = 0, pending_bytes: int = 0):
+        """统计间隔已到时在速率时间线上追加一条记录
+        
+        Args:
+            now: 当前时刻（time.perf_counter），默认取当前时间
+            pending_packets: 尚未合并的已发包数（多进程发送时工作进程的实时计数）
+            pending_bytes: 尚未合并的已发字节数
+        """
+        if now is None:
+            now = time.perf_counter()
+        self._pending_packets = pending_packets
+        self._pending_bytes = pending_bytes
+        if now < self._window_end:
+            return
+        self._append_window(now, self.packets + pending_packets, self.bytes + pending_bytes)
+        
+    def _append_window(self, now: float, packets: int, byte_count: int):
+        """结束当前统计窗口并开始下一个"""
+        elapsed = now - self._window_start
+        if elapsed > 0:
+            self.timeline.append({
+                'offset': self._window_start - self._start,
+                'duration': elapsed,
+                'packets': packets - self._window_packets,
+                'pps': (packets - self._window_packets) / elapsed,
+                'mbps': (byte_count - self._window_bytes) * 8 / elapsed / 1e6,
+            })
+        self._window_start = now
+        self._window_end = now + self.interval
+        self._window_packets = packets
+        self._window_bytes = byte_count
+        
+    def finish(self):
+        """结束记录，最后不足一个间隔的窗口也计入时间线"""
+        if self._end is None:
+            self.confirm()
+            self._end = time.perf_counter()
+            self._append_window(self._end, self.packets + self._pending_packets,
+                                self.bytes + self._pending_bytes)
+            
+    def latency_percentile(self, fraction: float) -> float:
+        """按直方图估算发送耗时的分位数
+        
+        Args:
+            fraction: 分位，例如0.99
+            
+        Returns:
+            分位数所在桶的上限（秒）
+        """
+        total = sum(self.latency_buckets)
+        if total == 0:
+            return 0.0
+        target = total * fraction
+        seen = 0
+        for index, count in enumerate(self.latency_buckets):
+            seen += count
+            if seen >= target:
+                return min(_bucket_bound(index), self.latency_max)
+        return self.latency_max
+        
+    def requested(self) -> Optional[dict]:
+        """目标速率，非pps/Mbps模式返回None"""
+        if self.pacing not in (PACING_PPS, PACING_MBPS):
+            return None
+        return {'mode': self.pacing, 'rate': self.requested_rate,
+                'unit': 'pps' if self.pacing == PACING_PPS else 'Mbps'}
+                
+    def summary(self) -> dict:
+        """返回全部遥测数据（可以直接序列化为JSON）
+        
+        多进程发送过程中包数和字节数包含工作进程的实时计数，耗时直方图和错误统计在每个文件发送结束后合并。
+        """
+        end = self._end if self._end is not None else time.perf_counter()
+        elapsed = end - self._start
+        packets = self.packets + self._pending_packets
+        byte_count = self.bytes + self._pending_bytes
+        pps = packets / elapsed if elapsed > 0 else 0.0
+        mbps = byte_count * 8 / elapsed / 1e6 if elapsed > 0 else 0.0
+        count = sum(self.latency_buckets)
+        requested = self.requested()
+        if requested is not None:
+            achieved = pps if self.pacing == PACING_PPS else mbps
+            requested['achieved'] = achieved
+            requested['deviation_percent'] = (achieved - self.requested_rate) / self.requested_rate * 100
+        return {
+            'started_at': self.started_at,
+            'elapsed': elapsed,
+            'packets': packets,
+            'bytes': byte_count,
+            'pps': pps,
+            'mbps': mbps,
+            'requested': requested,
+            'errors': dict(self.errors),
+            'latency': {
+                'count': count,
+                'mean': self.latency_sum / count if count else 0.0,
+                'p50': self.latency_percentile(0.5),
+                'p99': self.latency_percentile(0.99),
+                'max': self.latency_max,
+                'buckets': [{'le': _bucket_bound(index), 'count': bucket}
+                            for index, bucket in enumerate(self.latency_buckets) if bucket],
+            },
+            'timeline': list(self.timeline),
+        }
+        
+    def to_json(self) -> str:
+        """导出为JSON文本"""
+        return json.dumps(self.summary(), ensure_ascii=False, indent=2)
+        
+    def to_prometheus(self) -> str:
+        """导出为Prometheus文本格式"""
+        summary = self.summary()
+        lines = []
+        
+        def metric(name: str, kind: str, help_text: str, samples):
+            full_name = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for suffix, labels, value in samples:
+                label_text = '{' + ','.join(f'{key}="{val}"' for key, val in labels) + '}' if labels else ''
+                lines.append(f"{full_name}{suffix}{label_text} {value}")
+                
+        metric('packets_sent_total', 'counter', '已发送的数据包数', [('', (), summary['packets'])])
+        metric('bytes_sent_total', 'counter', '已发送的字节数', [('', (), summary['bytes'])])
+        metric('send_errors_total', 'counter', '按异常类型统计的发送错误数',
+               [('', (('type', name),), count) for name, count in sorted(summary['errors'].items())])
+        
+        # 直方图的桶是累计计数
+        cumulative = 0
+        samples = []
+        for index, bucket in enumerate(self.latency_buckets[:-1]):
+            cumulative += bucket
+            samples.append(('_bucket', (('le', repr(_bucket_bound(index))),), cumulative))
+        samples.append(('_bucket', (('le', '+Inf'),), summary['latency']['count']))
+        samples.append(('_sum', (), self.latency_sum))
+        samples.append(('_count', (), summary['latency']['count']))
+        metric('send_latency_seconds', 'histogram', '每次发送调用的耗时', samples)
+        
+        current = self.timeline[-1] if self.timeline else {'pps': 0.0, 'mbps': 0.0}
+        metric('achieved_pps', 'gauge', '实际包速率',
+               [('', (('window', 'average'),), summary['pps']), ('', (('window', 'current'),), current['pps'])])
+        metric('achieved_mbps', 'gauge', '实际比特速率（Mbps）',
+               [('', (('window', 'average'),), summary['mbps']), ('', (('window', 'current'),), current['mbps'])])
+        if summary['requested'] is not None:
+            metric('requested_rate', 'gauge', '目标速率',
+                   [('', (('unit', summary['requested']['unit']),), summary['requested']['rate'])])
+        metric('run_start_time_seconds', 'gauge', '发送开始时间（Unix时间戳）', [('', (), summary['started_at'])])
+        metric('run_elapsed_seconds', 'gauge', '发送已用时间', [('', (), summary['elapsed'])])
+        return '\n'.join(lines) + '\n'
+        
+    def write_json(self, path: str):
+        """写入JSON文件"""
+        _write_atomic(path, self.to_json())
+        
+    def write_prometheus(self, path: str):
+        """写入Prometheus文本格式文件（可由node_exporter的textfile收集器读取）"""
+        _write_atomic(path, self.to_prometheus())
+        
+    def export(self, directory: str, final: bool = False) -> Optional[str]:
+        """导出到遥测目录
+        
+        发送过程中只更新Prometheus文件，结束时再写入本次发送的JSON文件。
+        
+        Args:
+            directory: 遥测导出目录
+            final: 是否为发送结束时的导出
+            
+        Returns:
+            final时返回JSON文件路径，否则返回None
+        """
+        self.write_prometheus(os.path.join(directory, PROMETHEUS_FILE_NAME))
+        if not final:
+            return None
+        json_path = os.path.join(directory, time.strftime(JSON_FILE_NAME, time.localtime(self.started_at)))
+        self.write_json(json_path)
+        return json_path
+
+class TelemetryExporter:
+    """发送过程中在后台线程定时把遥测数据导出到遥测目录
+    
+    写文件不占用界面线程，也不打断发送循环。导出失败不影响发送，由结束时的导出提示。
+    """
+    
+    def __init__(self, telemetry: SendTelemetry, directory: str, interval: float = EXPORT_INTERVAL):
+        """创建导出线程
+        
+        Args:
+            telemetry: 遥测记录
+            directory: 遥测导出目录
+            interval: 导出间隔（秒）
+        """
+        self.telemetry = telemetry
+        self.directory = directory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='telemetry-export', daemon=True)
+        
+    def start(self):
+        """开始定时导出"""
+        self._thread.start()
+        
+    def stop(self):
+        """停止定时导出并等待正在进行的导出完成"""
+        self._stop.set()
+        if self._thread.ident is not None:
+            # 用Event等待而不是join：在QThread中调用join会创建_DummyThread，
+            # 之后fork出的工作进程在退出时会因为threading._shutdown断言失败而返回退出码1
+            self._finished.wait(timeout=EXPORT_STOP_TIMEOUT)
+            
+    def _run(self):
+        """后台线程：按间隔导出，停止后结束"""
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    self.telemetry.export(self.directory)
+                except Exception:
+                    pass
+        finally:
+            self._finished.set()
+                
+    def __enter__(self):
+        self.start()
+        return self
+        
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+        return False
+
+def _write_atomic(path: str, text: str):
+    """先写临时文件再替换，读取方不会读到写了一半的文件"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp_path, path)
\ No newline at end of file
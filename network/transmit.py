@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发送引擎
+提供不同的二层帧发送后端，由SendSession按引擎名称选择
+"""
+
+import ctypes
+import errno
+import mmap
+import os
+import select
+import socket
+import struct
+import time
+
+from .pcap_reader import LINKTYPE_ETHERNET, PCAP_MAGIC_NSEC
+
+# 引擎名称
+ENGINE_SCAPY = 'scapy'
+ENGINE_AF_PACKET = 'afpacket'
+ENGINE_SENDMMSG = 'sendmmsg'
+ENGINE_TX_RING = 'txring'
+
+ENGINES = (ENGINE_SCAPY, ENGINE_AF_PACKET, ENGINE_SENDMMSG, ENGINE_TX_RING)
+
+# 不经网卡的伪接口，选择后忽略发送引擎，不需要root权限
+SINK_NULL = 'null'             # 丢弃所有帧
+SINK_PCAP_PREFIX = 'pcap:'     # pcap:<文件路径>，把要发送的帧连同发送时刻写入抓包文件
+# 伪接口实际使用的"引擎"名称（SendSession.engine）
+ENGINE_NULL = 'null'
+ENGINE_PCAP = 'pcap'
+
+# 引擎不可用时依次尝试的回退顺序
+ENGINE_FALLBACKS = {
+    ENGINE_TX_RING: (ENGINE_TX_RING, ENGINE_SENDMMSG, ENGINE_AF_PACKET, ENGINE_SCAPY),
+    ENGINE_SENDMMSG: (ENGINE_SENDMMSG, ENGINE_AF_PACKET, ENGINE_SCAPY),
+    ENGINE_AF_PACKET: (ENGINE_AF_PACKET, ENGINE_SCAPY),
+    ENGINE_SCAPY: (ENGINE_SCAPY,),
+}
+
+# Linux AF_PACKET 相关常量（socket模块未全部导出）
+SOL_PACKET = getattr(socket, 'SOL_PACKET', 263)
+PACKET_QDISC_BYPASS = 20
+PACKET_VERSION = 10
+PACKET_TX_RING = 13
+TPACKET_V2 = 1
+ETH_P_ALL = 0x0003
+
+# TX_RING帧状态
+TP_STATUS_AVAILABLE = 0
+TP_STATUS_SEND_REQUEST = 1
+TP_STATUS_SENDING = 2
+TP_STATUS_WRONG_FORMAT = 4
+
+# tpacket2_hdr长度，发送时帧数据紧跟在头部之后
+TPACKET2_HDR_LEN = 32
+# tpacket2_hdr中的tp_status以及tp_status/tp_len/tp_snaplen
+_FRAME_STATUS = struct.Struct('I')
+_FRAME_HEADER = struct.Struct('III')
+
+# sendmmsg 默认批量大小
+DEFAULT_BATCH_SIZE = 64
+# sendmmsg 批量缓冲区中每个帧槽的大小，足够容纳9KB巨型帧
+BATCH_SLOT_SIZE = 16384
+# TX_RING 默认帧数和最小帧槽大小
+DEFAULT_RING_FRAMES = 4096
+DEFAULT_RING_FRAME_SIZE = 2048
+# 等待内核释放TX_RING帧槽的最长时间（秒），超时说明接口已停止发送
+TX_RING_SLOT_TIMEOUT = 2.0
+
+# 抓包文件伪接口的写缓冲区大小和文件头中的最大帧长
+SINK_WRITE_BUFFER = 4 * 1024 * 1024
+SINK_SNAPLEN = 262144
+# 纳秒时间戳经典pcap文件头和记录头
+_SINK_FILE_HEADER = struct.pack('<IHHiIII', PCAP_MAGIC_NSEC, 2, 4, 0, 0, SINK_SNAPLEN, LINKTYPE_ETHERNET)
+_SINK_RECORD_HEADER = struct.Struct('<IIII')
+
+class BatchSendError(OSError):
+    """批量提交失败，已交给发送后端的帧中有一部分没有发出
+    
+    packets/bytes是没有发出的帧数和字节数，包括引发这次提交的send调用中的那一帧。
+    """
+    
+    def __init__(self, err: int, packets: int, byte_count: int):
+        super().__init__(err, f"{os.strerror(err)}（{packets} 个数据包未发出）")
+        self.packets = packets
+        self.bytes = byte_count
+
+class ScapyTransmitter:
+    """基于scapy二层socket的发送后端，跨平台可用"""
+    
+    engine = ENGINE_SCAPY
+    
+    def __init__(self, interface: str):
+        """打开scapy二层socket
+        
+        Args:
+            interface: 网络接口名称
+        """
+        from scapy.all import conf
+        self._socket = conf.L2socket(iface=interface)
+        
+    def send(self, frame):
+        """发送一帧"""
+        self._socket.send(frame)
+        
+    def flush(self):
+        """scapy后端没有缓冲，无需刷新"""
+        
+    def close(self):
+        """关闭socket"""
+        self._socket.close()
+
+class AfPacketTransmitter:
+    """基于Linux AF_PACKET原始socket的发送后端，每帧一次系统调用"""
+    
+    engine = ENGINE_AF_PACKET
+    
+    def __init__(self, interface: str, sndbuf: int = 0, qdisc_bypass: bool = False):
+        """打开AF_PACKET socket并绑定到网络接口
+        
+        Args:
+            interface: 网络接口名称
+            sndbuf: socket发送缓冲区大小（字节），0表示使用系统默认值
+            qdisc_bypass: 是否设置PACKET_QDISC_BYPASS，绕过内核排队规则直接交给网卡驱动
+        """
+        if not hasattr(socket, 'AF_PACKET'):
+            raise OSError("当前系统不支持AF_PACKET")
+            
+        self.interface = interface
+        self._socket = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+        try:
+            if sndbuf > 0:
+                self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, sndbuf)
+            if qdisc_bypass:
+                self._socket.setsockopt(SOL_PACKET, PACKET_QDISC_BYPASS, 1)
+            self._socket.bind((interface, 0))
+        except Exception:
+            self._socket.close()
+            raise
+            
+    def send(self, frame):
+        """发送一帧"""
+        self._socket.send(frame)
+        
+    def flush(self):
+        """逐帧发送没有缓冲，无需刷新"""
+        
+    def close(self):
+        """关闭socket"""
+        self._socket.close()
+
+class _IoVec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p),
+                ('iov_len', ctypes.c_size_t)]
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [('msg_name', ctypes.c_void_p),
+                ('msg_namelen', ctypes.c_uint32),
+                ('msg_iov', ctypes.POINTER(_IoVec)),
+                ('msg_iovlen', ctypes.c_size_t),
+                ('msg_control', ctypes.c_void_p),
+                ('msg_controllen', ctypes.c_size_t),
+                ('msg_flags', ctypes.c_int)]
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', _MsgHdr),
+                ('msg_len', ctypes.c_uint)]
+
+_libc = None
+
+def _get_libc():
+    """加载libc并检查sendmmsg是否可用"""
+    global _libc
+    if _libc is None:
+        # ctypes.util会导入subprocess，只在用到sendmmsg时导入
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.sendmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int]
+        libc.sendmmsg.restype = ctypes.c_int
+        _libc = libc
+    return _libc
+
+class SendmmsgTransmitter(AfPacketTransmitter):
+    """基于sendmmsg的批量发送后端
+    
+    帧先复制到预分配的批量缓冲区中，攒满batch_size帧后用一次sendmmsg
+    系统调用提交，减少小包场景下的系统调用开销。
+    """
+    
+    engine = ENGINE_SENDMMSG
+    
+    def __init__(self, interface: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                 sndbuf: int = 0, qdisc_bypass: bool = False):
+        """打开AF_PACKET socket并分配批量缓冲区
+        
+        Args:
+            interface: 网络接口名称
+            batch_size: 每次sendmmsg提交的帧数
+            sndbuf: socket发送缓冲区大小（字节），0表示使用系统默认值
+            qdisc_bypass: 是否设置PACKET_QDISC_BYPASS
+        """
+        self._libc = _get_libc()
+        super().__init__(interface, sndbuf=sndbuf, qdisc_bypass=qdisc_bypass)
+        
+        self.batch_size = max(1, int(batch_size))
+        self._buffer = ctypes.create_string_buffer(self.batch_size * BATCH_SLOT_SIZE)
+        self._view = memoryview(self._buffer).cast('B')
+        self._iovecs = (_IoVec * self.batch_size)()
+        self._msgs = (_MMsgHdr * self.batch_size)()
+        base = ctypes.addressof(self._buffer)
+        for i in range(self.batch_size):
+            self._iovecs[i].iov_base = base + i * BATCH_SLOT_SIZE
+            self._msgs[i].msg_hdr.msg_iov = ctypes.pointer(self._iovecs[i])
+            self._msgs[i].msg_hdr.msg_iovlen = 1
+        self._pending = 0
+        
+    def send(self, frame):
+        """把一帧放入批量缓冲区，缓冲区满时提交
+        
+        Args:
+            frame: 帧字节
+        """
+        length = len(frame)
+        if length > BATCH_SLOT_SIZE:
+            # 超出槽大小的帧先提交已有批次，再单独发送
+            try:
+                self.flush()
+            except BatchSendError as e:
+                raise BatchSendError(e.errno, e.packets + 1, e.bytes + length) from None
+            self._socket.send(frame)
+            return
+            
+        index = self._pending
+        offset = index * BATCH_SLOT_SIZE
+        self._view[offset:offset + length] = frame
+        self._iovecs[index].iov_len = length
+        self._pending = index + 1
+        if self._pending == self.batch_size:
+            self.flush()
+            
+    def flush(self):
+        """用sendmmsg提交缓冲区中的所有帧
+        
+        只发出一部分时从第一个未发出的帧继续提交，直到全部发出。
+        
+        Raises:
+            BatchSendError: sendmmsg出错，未发出的帧被丢弃
+        """
+        done = 0
+        fd = self._socket.fileno()
+        msg_size = ctypes.sizeof(_MMsgHdr)
+        base = ctypes.addressof(self._msgs)
+        while done < self._pending:
+            msgs = ctypes.cast(base + done * msg_size, ctypes.POINTER(_MMsgHdr))
+            result = self._libc.sendmmsg(fd, msgs, self._pending - done, 0)
+            if result < 0:
+                err = ctypes.get_errno()
+                if err in (errno.EAGAIN, errno.ENOBUFS, errno.EINTR):
+                    # 发送队列已满，稍等后重试
+                    time.sleep(0.0001)
+                    continue
+                unsent = sum(self._iovecs[index].iov_len for index in range(done, self._pending))
+                count = self._pending - done
+                self._pending = 0
+                raise BatchSendError(err, count, unsent)
+            done += result
+        self._pending = 0
+        
+    def close(self):
+        """提交剩余帧并关闭socket"""
+        try:
+            self.flush()
+        finally:
+            super().close()
+
+class TxRingTransmitter(AfPacketTransmitter):
+    """基于PACKET_MMAP TX_RING的发送后端
+    
+    在内核与进程共享的mmap环形缓冲区中直接填充帧，攒满batch_size帧后
+    用一次send()通知内核批量发送，省去每帧的数据拷贝系统调用。
+    """
+    
+    engine = ENGINE_TX_RING
+    
+    def __init__(self, interface: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                 ring_frames: int = DEFAULT_RING_FRAMES, sndbuf: int = 0,
+                 qdisc_bypass: bool = False):
+        """打开AF_PACKET socket并建立TX_RING
+        
+        Args:
+            interface: 网络接口名称
+            batch_size: 每次通知内核发送前填充的帧数
+            ring_frames: 环形缓冲区的帧数
+            sndbuf: socket发送缓冲区大小（字节），0表示使用系统默认值
+            qdisc_bypass: 是否设置PACKET_QDISC_BYPASS
+            
+        Raises:
+            OSError: 系统不支持TX_RING或环形缓冲区建立失败
+        """
+        if not hasattr(socket, 'AF_PACKET'):
+            raise OSError("当前系统不支持AF_PACKET")
+            
+        self.interface = interface
+        self._ring = None
+        self._socket = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+        try:
+            if sndbuf > 0:
+                self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, sndbuf)
+            if qdisc_bypass:
+                self._socket.setsockopt(SOL_PACKET, PACKET_QDISC_BYPASS, 1)
+            self._socket.setsockopt(SOL_PACKET, PACKET_VERSION, TPACKET_V2)
+            
+            # 帧槽大小按接口MTU取2的幂，块大小为页大小的整数倍
+            frame_size = DEFAULT_RING_FRAME_SIZE
+            while frame_size < _get_interface_mtu(interface) + 18 + TPACKET2_HDR_LEN:
+                frame_size *= 2
+            block_size = max(mmap.PAGESIZE, frame_size)
+            frames_per_block = block_size // frame_size
+            block_nr = max(1, (ring_frames + frames_per_block - 1) // frames_per_block)
+            self.frame_size = frame_size
+            self.frame_nr = block_nr * frames_per_block
+            self.max_frame_len = frame_size - TPACKET2_HDR_LEN
+            
+            req = struct.pack('IIII', block_size, block_nr, frame_size, self.frame_nr)
+            self._socket.setsockopt(SOL_PACKET, PACKET_TX_RING, req)
+            self._ring = mmap.mmap(self._socket.fileno(), block_size * block_nr,
+                                   mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+            self._socket.bind((interface, 0))
+        except Exception:
+            if self._ring is not None:
+                self._ring.close()
+            self._socket.close()
+            raise
+            
+        self.batch_size = max(1, min(int(batch_size), self.frame_nr))
+        self._index = 0
+        self._pending = 0
+        self.wrong_format = 0
+        # 环形缓冲区中下一个帧槽可用时socket可写
+        self._poller = select.poll()
+        self._poller.register(self._socket.fileno(), select.POLLOUT)
+        
+    def send(self, frame):
+        """把一帧写入环形缓冲区，攒满一批时通知内核发送
+        
+        Args:
+            frame: 帧字节
+            
+        Raises:
+            ValueError: 帧长度超过帧槽容量
+        """
+        length = len(frame)
+        if length > self.max_frame_len:
+            raise ValueError(f"帧长度 {length} 超过TX_RING帧槽容量 {self.max_frame_len}")
+            
+        ring = self._ring
+        offset = self._index * self.frame_size
+        status = _FRAME_STATUS.unpack_from(ring, offset)[0]
+        if status != TP_STATUS_AVAILABLE:
+            status = self._wait_for_slot(offset)
+        if status & TP_STATUS_WRONG_FORMAT:
+            # 内核拒绝了该帧，回收帧槽
+            self.wrong_format += 1
+            
+        # 阻塞的send()返回前内核已处理完上一批，这里可以一次写入整个头部
+        data_offset = offset + TPACKET2_HDR_LEN
+        ring[data_offset:data_offset + length] = frame
+        _FRAME_HEADER.pack_into(ring, offset, TP_STATUS_SEND_REQUEST, length, length)
+        
+        self._index = (self._index + 1) % self.frame_nr
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.flush()
+            
+    def _wait_for_slot(self, offset: int) -> int:
+        """帧槽仍在等待内核发送时，通知内核发送并等待帧槽释放
+        
+        不依赖_pending：上一次通知出错后_pending已清零，但帧槽可能仍由内核持有。
+        
+        Args:
+            offset: 帧槽在环形缓冲区中的偏移
+            
+        Returns:
+            帧槽状态（可用或内核拒绝）
+            
+        Raises:
+            OSError: 超过TX_RING_SLOT_TIMEOUT帧槽仍未释放，或通知内核发送失败
+        """
+        deadline = time.monotonic() + TX_RING_SLOT_TIMEOUT
+        while True:
+            self._kick(wait=False)
+            self._pending = 0
+            status = _FRAME_STATUS.unpack_from(self._ring, offset)[0]
+            if status == TP_STATUS_AVAILABLE or status & TP_STATUS_WRONG_FORMAT:
+                return status
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise OSError(errno.ETIMEDOUT, f"TX_RING帧槽在 {TX_RING_SLOT_TIMEOUT} 秒内没有被内核释放"
+                              f"（接口 {self.interface} 可能已停止发送）")
+            if self._poller.poll(max(1, int(min(remaining, 0.01) * 1000))):
+                # 可写但帧槽仍未释放时稍等，避免空转
+                time.sleep(0.0001)
+                
+    def _kick(self, wait: bool = True):
+        """用send()通知内核发送环形缓冲区中待发送的帧
+        
+        Args:
+            wait: 是否等待内核发送完（发送队列暂时已满时重试），为False时只通知不等待
+        """
+        while True:
+            try:
+                self._socket.send(b'', 0 if wait else socket.MSG_DONTWAIT)
+                return
+            except (BlockingIOError, InterruptedError):
+                pass
+            except OSError as e:
+                if e.errno != errno.ENOBUFS:
+                    raise
+            if not wait:
+                return
+            time.sleep(0.0001)
+            
+    def flush(self):
+        """通知内核发送环形缓冲区中所有待发送的帧"""
+        if self._pending == 0:
+            return
+        try:
+            self._kick()
+        finally:
+            self._pending = 0
+            
+    def close(self):
+        """发送剩余帧并释放环形缓冲区"""
+        try:
+            self.flush()
+        finally:
+            self._ring.close()
+            self._socket.close()
+
+class NullTransmitter:
+    """丢弃所有帧的伪接口，用于在没有网卡和root权限时测试读取、改写、节奏控制和分片的吞吐"""
+    
+    engine = ENGINE_NULL
+    
+    def send(self, frame):
+        """丢弃一帧"""
+        
+    def flush(self):
+        """没有缓冲，无需刷新"""
+        
+    def close(self):
+        """没有需要释放的资源"""
+
+class PcapWriterTransmitter:
+    """把要发送的帧写入经典pcap文件的伪接口
+    
+    每帧记录调用send的时刻（纳秒时间戳），文件内容就是实际会发到网卡上的帧和发送时刻。
+    帧先累积在内存缓冲区中，满SINK_WRITE_BUFFER后一次写入文件；flush不写文件，
+    避免按时间戳回放时每个准点帧都触发一次小写入，缓冲区在关闭时写出。
+    默认清空已有文件重新写入，文件中只有本次发送的帧；并行和扇出发送每个文件都重新
+    打开会话，同一次发送任务中第一个文件之后的会话以append=True接着写入。
+    """
+    
+    engine = ENGINE_PCAP
+    
+    def __init__(self, path: str, append: bool = False, buffer_size: int = SINK_WRITE_BUFFER):
+        """打开输出文件
+        
+        Args:
+            path: 输出文件路径
+            append: 是否接着写入同一次任务中已写入的文件
+            buffer_size: 写缓冲区大小（字节）
+        
+        Raises:
+            ValueError: 接着写入时已有文件不是本后端写入的格式
+        """
+        self.path = path
+        if append and os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb') as f:
+                if f.read(len(_SINK_FILE_HEADER)) != _SINK_FILE_HEADER:
+                    raise ValueError(f"输出文件不是纳秒时间戳的以太网pcap文件，无法接着写入: {path}")
+            self._file = open(path, 'ab', buffering=0)
+            self._buffer = bytearray()
+        else:
+            self._file = open(path, 'wb', buffering=0)
+            self._buffer = bytearray(_SINK_FILE_HEADER)
+        self._buffer_size = buffer_size
+        
+    def send(self, frame):
+        """把一帧和当前时刻追加到写缓冲区"""
+        now = time.time_ns()
+        length = len(frame)
+        buffer = self._buffer
+        buffer += _SINK_RECORD_HEADER.pack(now // 1000000000, now % 1000000000, length, length)
+        buffer += frame
+        if len(buffer) >= self._buffer_size:
+            self._write()
+            
+    def _write(self):
+        """把写缓冲区写入文件"""
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer = bytearray()
+            
+    def flush(self):
+        """帧已经记录在缓冲区中，不单独写文件"""
+        
+    def close(self):
+        """写出缓冲区并关闭文件"""
+        try:
+            self._write()
+        finally:
+            self._file.close()
+
+def is_sink(interface: str) -> bool:
+    """判断接口名是否为不经网卡的伪接口"""
+    return interface == SINK_NULL or interface.startswith(SINK_PCAP_PREFIX)
+
+def shard_sink(interface: str, index: int) -> str:
+    """多个进程发送到同一个抓包文件伪接口时，返回第index个进程各自写入的伪接口
+    
+    例如 pcap:/tmp/out.pcap 的第1个进程写入 pcap:/tmp/out.1.pcap，其他接口原样返回。
+    """
+    if not interface.startswith(SINK_PCAP_PREFIX):
+        return interface
+    root, ext = os.path.splitext(interface[len(SINK_PCAP_PREFIX):])
+    return f"{SINK_PCAP_PREFIX}{root}.{index}{ext or '.pcap'}"
+
+def _get_interface_mtu(interface: str) -> int:
+    """读取接口MTU，读取失败时按1500处理"""
+    try:
+        with open(f"/sys/class/net/{interface}/mtu") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return 1500
+
+def create_transmitter(engine: str, interface: str, sink_append: bool = False, **options):
+    """按引擎名称创建发送后端
+    
+    当前系统不支持所选引擎（例如在Windows上选择AF_PACKET，或TX_RING
+    建立失败）时，按ENGINE_FALLBACKS的顺序自动回退，最终回退到scapy引擎。
+    接口为伪接口（null或pcap:<文件路径>）时忽略引擎和引擎参数。
+    
+    Args:
+        engine: 引擎名称，见ENGINES
+        interface: 网络接口名称或伪接口
+        sink_append: 抓包文件伪接口是否接着写入已有文件，默认清空重写
+        **options: 引擎参数（batch_size、ring_frames、sndbuf、qdisc_bypass）
+        
+    Returns:
+        发送后端对象，提供send/flush/close方法
+    """
+    if interface == SINK_NULL:
+        return NullTransmitter()
+    if interface.startswith(SINK_PCAP_PREFIX):
+        return PcapWriterTransmitter(interface[len(SINK_PCAP_PREFIX):], append=sink_append)
+        
+    if engine not in ENGINE_FALLBACKS:
+        print(f"未知的发送引擎 {engine}，使用scapy引擎")
+        engine = ENGINE_SCAPY
+        
+    for candidate in ENGINE_FALLBACKS[engine]:
+        try:
+            if candidate == ENGINE_TX_RING:
+                return TxRingTransmitter(interface, **options)
+            if candidate == ENGINE_SENDMMSG:
+                return SendmmsgTransmitter(interface, **_pick(options, 'batch_size', 'sndbuf', 'qdisc_bypass'))
+            if candidate == ENGINE_AF_PACKET:
+                return AfPacketTransmitter(interface, **_pick(options, 'sndbuf', 'qdisc_bypass'))
+        except (OSError, AttributeError) as e:
+            print(f"{candidate}引擎不可用，尝试回退: {str(e)}")
+            continue
+    return ScapyTransmitter(interface)
+
+def _pick(options: dict, *keys) -> dict:
+    """从引擎参数中挑出指定引擎支持的参数"""
+    return {key: options[key] for key in keys if key in options}
\ No newline at end of file
@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试用例文件夹树的数据模型和发包按钮委托
+数据只保存在轻量的节点中，视图只为可见的行取数据和绘制，不为每一行创建控件；
+文件夹展开时才列出其中的子文件夹和文件，展开前显示索引中缓存的汇总
+"""
+
+import os
+
+from PyQt5.QtCore import (Qt, QAbstractItemModel, QModelIndex, QPersistentModelIndex, QRect,
+                          QEvent, pyqtSignal)
+from PyQt5.QtGui import QColor, QFont
+from PyQt5.QtWidgets import QStyledItemDelegate
+
+# 文件夹树的列
+TREE_HEADERS = ["名称", "路径", "PCAP文件数", "数据包数", "大小", "时长", "操作"]
+ACTION_COLUMN = 6
+SUMMARY_COLUMNS = (3, 4, 5)
+FOLDER_ITEM_FLAGS = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+FILE_ITEM_FLAGS = FOLDER_ITEM_FLAGS | Qt.ItemNeverHasChildren
+
+# 发包按钮的文字、尺寸和颜色（普通, 悬停, 按下）
+SEND_BUTTON_TEXT = "📤 发包"
+SEND_BUTTON_SIZE = (100, 32)
+FOLDER_BUTTON_COLORS = ('#4299e1', '#3182ce', '#2c5aa0')
+FILE_BUTTON_COLORS = ('#2b6cb0', '#2c5aa0', '#2a4d8d')
+
+def format_bytes(byte_count: float) -> str:
+    """把字节数格式化为便于阅读的大小"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if byte_count < 1024:
+            return f"{byte_count:.0f} {unit}" if unit == 'B' else f"{byte_count:.1f} {unit}"
+        byte_count /= 1024
+    return f"{byte_count:.1f} TB"
+
+def format_duration(seconds: float) -> str:
+    """把秒数格式化为时长，一分钟以上显示为 时:分:秒"""
+    if seconds < 60:
+        return f"{seconds:.2f} 秒"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+class TreeNode:
+    """文件夹树中的一个文件夹或文件"""
+    __slots__ = ('path', 'name', 'is_folder', 'parent', 'children', 'row', 'rows_valid', 'alias',
+                 'summary', 'error', 'size', 'mtime_ns', 'totals', 'file_count', 'loaded', 'loading',
+                 'placeholder')
+    
+    def __init__(self, path: str, is_folder: bool, parent=None):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.is_folder = is_folder
+        self.parent = parent
+        self.children = []
+        self.row = 0
+        # 子节点插入或删除后行号在下次用到时重新编号
+        self.rows_valid = True
+        self.alias = None
+        self.summary = None  # 文件的摘要（数据包数、字节数、时长等）
+        self.error = None  # 文件无法读取的原因
+        self.size = 0
+        self.mtime_ns = 0
+        # 文件夹（含各级子文件夹）中已索引文件的 [数据包数, 字节数, 时长, 文件数]
+        self.totals = [0, 0, 0.0, 0]
+        self.file_count = 0  # 文件夹（含各级子文件夹）中的抓包文件数
+        # 文件夹是否已列出子节点，文件没有子节点
+        self.loaded = not is_folder
+        # 已展开、正在后台列出子节点的文件夹
+        self.loading = False
+        # 展开前显示的索引汇总 (文件数, [数据包数, 字节数, 时长, 文件数])，已计入本节点和上级文件夹的合计
+        self.placeholder = None
+        
+    def display_name(self) -> str:
+        """名称列显示的文字"""
+        if self.alias:
+            return f"{self.alias} ({self.name})"
+        return self.name
+
+class FolderTreeModel(QAbstractItemModel):
+    """测试用例文件夹树模型
+    
+    节点按路径登记，首页按路径增删节点、更新摘要；兄弟节点按名称有序插入，文件夹排在文件前面。
+    文件夹第一次展开时发出fetch_requested，由首页在后台列出其中的子文件夹和文件，加入后调用finish_loading。
+    """
+    fetch_requested = pyqtSignal(str)  # 需要列出子节点的文件夹路径
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = TreeNode('', True)
+        self.root.loaded = True
+        self.nodes = {}  # 路径 -> 节点
+        self.headers = list(TREE_HEADERS)
+        self.sort_order = Qt.DescendingOrder
+        
+    # index、hasChildren和flags在展开文件夹后重新布局时对每个可见行都会调用，尽量少做额外的调用
+    def index(self, row, column, parent=QModelIndex()):
+        children = parent.internalPointer().children if parent.isValid() else self.root.children
+        if 0 <= row < len(children) and 0 <= column < len(self.headers):
+            return self.createIndex(row, column, children[row])
+        return QModelIndex()
+        
+    def parent(self, index):
+        node = self.node_from_index(index)
+        if node is None or node.parent is self.root or node.parent is None:
+            return QModelIndex()
+        return self.createIndex(self.row_of(node.parent), 0, node.parent)
+        
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        node = self.node_from_index(parent) or self.root
+        return len(node.children)
+        
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.headers)
+        
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self.root.children)
+        if parent.column() > 0:
+            return False
+        node = parent.internalPointer()
+        # 未展开过或正在列出子节点的文件夹先显示展开标记
+        return not node.loaded or node.loading or bool(node.children)
+        
+    def canFetchMore(self, parent):
+        node = self.node_from_index(parent)
+        return node is not None and not node.loaded
+        
+    def fetchMore(self, parent):
+        node = self.node_from_index(parent)
+        if node is None or node.loaded:
+            return
+        node.loaded = True
+        node.loading = True
+        self.fetch_requested.emit(node.path)
+        
+    def finish_loading(self, folder_path: str):
+        """文件夹的子节点已全部加入，去掉展开前显示的索引汇总"""
+        node = self.nodes.get(folder_path)
+        if node is None or not node.loading:
+            return
+        node.loading = False
+        # 缓存的汇总换成由实际列出的文件和子文件夹累计的合计
+        self._set_placeholder(node, None)
+        if not node.children:
+            # 空文件夹去掉展开标记
+            self._row_changed(node, (0,))
+            
+    def data(self, index, role=Qt.DisplayRole):
+        node = self.node_from_index(index)
+        if node is None:
+            return None
+        if role == Qt.DisplayRole:
+            return self.display_text(node, index.column())
+        if role == Qt.ToolTipRole and index.column() == 3 and node.error:
+            return node.error
+        if role == Qt.UserRole:
+            return node.path
+        return None
+        
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and 0 <= section < len(self.headers):
+            return self.headers[section]
+        return None
+        
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        # 文件没有子节点，视图不必再询问hasChildren
+        return FOLDER_ITEM_FLAGS if index.internalPointer().is_folder else FILE_ITEM_FLAGS
+        
+    def sort(self, column, order=Qt.AscendingOrder):
+        """按名称排序（其他列不支持排序），保持展开和选中状态"""
+        if column != 0:
+            return
+        self.layoutAboutToBeChanged.emit()
+        old_indexes = self.persistentIndexList()
+        old_nodes = [(index.internalPointer(), index.column()) for index in old_indexes]
+        self.sort_order = order
+        self._sort_children(self.root)
+        new_indexes = [self.createIndex(self.row_of(node), column, node) for node, column in old_nodes]
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+        
+    def display_text(self, node: TreeNode, column: int):
+        """返回节点在某一列显示的文字"""
+        if column == 0:
+            return node.display_name()
+        if column == 1:
+            return node.path
+        if column == 2:
+            if not node.is_folder:
+                return "1"
+            # 未展开且索引中没有记录的文件夹，文件数未知
+            return str(node.file_count) if node.loaded or node.placeholder else ""
+        if column in SUMMARY_COLUMNS:
+            if node.is_folder:
+                packets, byte_count, duration, indexed = node.totals
+                if not indexed:
+                    return ""
+                values = (str(packets), format_bytes(byte_count), format_duration(duration))
+            elif node.error:
+                return "无法读取" if column == 3 else ""
+            elif node.summary is None:
+                return ""
+            else:
+                values = (str(node.summary['packet_count']), format_bytes(node.summary['byte_count']),
+                          format_duration(node.summary['duration']))
+            return values[column - 3]
+        return None
+        
+    def set_headers(self, headers):
+        """更新表头文字"""
+        self.headers = list(headers)
+        self.headerDataChanged.emit(Qt.Horizontal, 0, len(self.headers) - 1)
+        
+    def node_from_index(self, index):
+        """返回索引对应的节点，无效索引返回None"""
+        if not index.isValid():
+            return None
+        return index.internalPointer()
+        
+    def index_of(self, node: TreeNode, column: int = 0) -> QModelIndex:
+        """返回节点的索引"""
+        if node is None or node is self.root:
+            return QModelIndex()
+        return self.createIndex(self.row_of(node), column, node)
+        
+    def row_of(self, node: TreeNode) -> int:
+        """返回节点在父节点中的行号，必要时先重新编号"""
+        parent = node.parent
+        if not parent.rows_valid:
+            for row, child in enumerate(parent.children):
+                child.row = row
+            parent.rows_valid = True
+        return node.row
+        
+    def node(self, path: str):
+        """按路径返回节点，不存在时返回None"""
+        return self.nodes.get(path)
+        
+    def folder_paths(self, parent_path=None) -> list:
+        """返回文件夹中直接包含的子文件夹路径，parent_path为None时返回顶层文件夹"""
+        parent = self.nodes.get(parent_path) if parent_path is not None else self.root
+        if parent is None:
+            return []
+        return [child.path for child in parent.children if child.is_folder]
+        
+    def loaded_folder_paths(self, folder_path: str) -> list:
+        """返回文件夹及其各级子文件夹中已列出子节点的文件夹路径"""
+        folder = self.nodes.get(folder_path)
+        if folder is None or not folder.loaded:
+            return []
+        paths = [folder_path]
+        for child in folder.children:
+            if child.is_folder:
+                paths.extend(self.loaded_folder_paths(child.path))
+        return paths
+        
+    def file_paths(self, folder_path: str) -> list:
+        """返回文件夹中直接包含的文件路径"""
+        folder = self.nodes.get(folder_path)
+        if folder is None:
+            return []
+        return [child.path for child in folder.children if not child.is_folder]
+        
+    def summary(self, pcap_file: str):
+        """返回文件的摘要，没有索引时返回None"""
+        node = self.nodes.get(pcap_file)
+        return node.summary if node is not None else None
+        
+    def clear(self):
+        """清空所有节点"""
+        self.beginResetModel()
+        self.root.children = []
+        self.root.rows_valid = True
+        self.nodes.clear()
+        self.endResetModel()
+        
+    def add_folder(self, folder_path: str, alias=None, parent_path=None, summary=None) -> TreeNode:
+        """添加未展开的文件夹节点
+        
+        Args:
+            folder_path: 文件夹路径
+            alias: 文件夹别名
+            parent_path: 父文件夹路径，为None时添加到顶层
+            summary: 索引中该文件夹的汇总（见DatabaseManager.get_folder_summaries），展开前显示
+        """
+        parent = self.nodes.get(parent_path) if parent_path is not None else self.root
+        node = TreeNode(folder_path, True, parent)
+        node.alias = alias
+        self._insert(parent, node)
+        if summary:
+            self._set_placeholder(node, (summary['file_count'],
+                                         [summary['packet_count'], summary['byte_count'],
+                                          summary['duration'], summary['indexed_count']]))
+        return node
+        
+    def add_file(self, folder_path: str, pcap_file: str, size: int = 0, mtime_ns: int = 0) -> TreeNode:
+        """在文件夹节点下添加文件节点"""
+        parent = self.nodes[folder_path]
+        node = TreeNode(pcap_file, False, parent)
+        node.size = size
+        node.mtime_ns = mtime_ns
+        self._insert(parent, node)
+        self._propagate(parent, 1)
+        return node
+        
+    def remove(self, path: str):
+        """删除文件夹（连同其中的所有节点）或文件节点"""
+        node = self.nodes.get(path)
+        if node is None:
+            return
+        if node.is_folder:
+            # 从上级文件夹的合计中去掉整个文件夹
+            self._propagate(node.parent, -node.file_count, [-value for value in node.totals])
+        else:
+            self.clear_summary(path)
+            self._propagate(node.parent, -1)
+        parent = node.parent
+        row = self.row_of(node)
+        self.beginRemoveRows(self.index_of(parent), row, row)
+        del parent.children[row]
+        parent.rows_valid = False
+        self._unregister(node)
+        self.endRemoveRows()
+        
+    def _insert(self, parent: TreeNode, node: TreeNode):
+        """按当前排序把节点插入到父节点中"""
+        row = self._insert_position(parent.children, node)
+        self.beginInsertRows(self.index_of(parent), row, row)
+        parent.children.insert(row, node)
+        parent.rows_valid = False
+        self.nodes[node.path] = node
+        self.endInsertRows()
+        
+    def _insert_position(self, siblings, node: TreeNode) -> int:
+        """二分查找节点在有序兄弟节点中的插入位置"""
+        low, high = 0, len(siblings)
+        while low < high:
+            middle = (low + high) // 2
+            if self._precedes(node, siblings[middle]):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+        
+    def _precedes(self, a: TreeNode, b: TreeNode) -> bool:
+        """按当前排序a是否排在b前面"""
+        if a.is_folder != b.is_folder:
+            return a.is_folder
+        if self.sort_order == Qt.AscendingOrder:
+            return a.display_name() < b.display_name()
+        return a.display_name() > b.display_name()
+        
+    def _sort_children(self, node: TreeNode):
+        """递归排序子节点，文件夹排在文件前面"""
+        node.children.sort(key=TreeNode.display_name, reverse=self.sort_order == Qt.DescendingOrder)
+        node.children.sort(key=lambda child: not child.is_folder)
+        node.rows_valid = False
+        for child in node.children:
+            if child.children:
+                self._sort_children(child)
+                
+    def _unregister(self, node: TreeNode):
+        """从路径表中删除节点及其所有子节点"""
+        self.nodes.pop(node.path, None)
+        for child in node.children:
+            self._unregister(child)
+            
+    def set_alias(self, folder_path: str, alias):
+        """设置文件夹别名并保持排序"""
+        node = self.nodes.get(folder_path)
+        if node is None:
+            return
+        node.alias = alias
+        self._row_changed(node, (0,))
+        self.sort(0, self.sort_order)
+        
+    def set_summary(self, pcap_file: str, summary: dict):
+        """显示文件摘要（summary中有error时显示为无法读取），并更新所属文件夹的合计"""
+        node = self.nodes.get(pcap_file)
+        if node is None:
+            return
+        self.clear_summary(pcap_file)
+        if summary.get('error'):
+            node.error = summary['error']
+        else:
+            node.summary = summary
+            self._propagate(node.parent, 0, self._summary_totals(summary, 1))
+        self._row_changed(node, SUMMARY_COLUMNS)
+        
+    def clear_summary(self, pcap_file: str):
+        """去掉文件的摘要和文件夹合计中该文件的部分，返回原来的摘要"""
+        node = self.nodes.get(pcap_file)
+        if node is None:
+            return None
+        summary, node.summary, node.error = node.summary, None, None
+        if summary is not None:
+            self._propagate(node.parent, 0, self._summary_totals(summary, -1))
+        self._row_changed(node, SUMMARY_COLUMNS)
+        return summary
+        
+    def _set_placeholder(self, folder: TreeNode, placeholder):
+        """替换文件夹展开前显示的索引汇总"""
+        if folder.placeholder is not None:
+            file_count, totals = folder.placeholder
+            self._propagate(folder, -file_count, [-value for value in totals])
+        folder.placeholder = placeholder
+        if placeholder is not None:
+            self._propagate(folder, *placeholder)
+            
+    @staticmethod
+    def _summary_totals(summary: dict, sign: int) -> list:
+        """文件摘要在文件夹合计中所占的部分，sign为-1时为减去的部分"""
+        return [sign * summary['packet_count'], sign * summary['byte_count'], sign * summary['duration'], sign]
+        
+    def _propagate(self, folder: TreeNode, file_count: int, totals=None):
+        """把文件数和合计的变化加到文件夹及其各级上级文件夹上"""
+        columns = (2,) + SUMMARY_COLUMNS if totals else (2,)
+        while folder is not None and folder is not self.root:
+            folder.file_count += file_count
+            if totals:
+                for i, value in enumerate(totals):
+                    folder.totals[i] += value
+            self._row_changed(folder, columns)
+            folder = folder.parent
+            
+    def _row_changed(self, node: TreeNode, columns):
+        """通知节点所在行的某些列已变化"""
+        row = self.row_of(node)
+        self.dataChanged.emit(self.createIndex(row, min(columns), node), self.createIndex(row, max(columns), node))
+
+class SendButtonDelegate(QStyledItemDelegate):
+    """在操作列绘制发包按钮，点击按钮时发出send_requested信号
+    
+    按钮直接绘制，不创建控件；悬停状态由视图viewport上的事件过滤器跟踪。
+    """
+    send_requested = pyqtSignal(str, bool)  # 路径, 是否为文件夹
+    
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+        self.hover_index = QPersistentModelIndex()
+        self.pressed_index = QPersistentModelIndex()
+        view.setMouseTracking(True)
+        view.viewport().installEventFilter(self)
+        
+    def button_rect(self, cell: QRect) -> QRect:
+        """按钮在单元格中的位置（居中）"""
+        width, height = SEND_BUTTON_SIZE
+        width = min(width, cell.width() - 4)
+        height = min(height, cell.height() - 4)
+        return QRect(cell.x() + (cell.width() - width) // 2, cell.y() + (cell.height() - height) // 2, width, height)
+        
+    def paint(self, painter, option, index):
+        # 先绘制背景（交替行颜色、选中状态），再绘制按钮
+        super().paint(painter, option, index)
+        node = index.model().node_from_index(index)
+        if node is None:
+            return
+        colors = FOLDER_BUTTON_COLORS if node.is_folder else FILE_BUTTON_COLORS
+        if self.pressed_index.isValid() and self.pressed_index == index:
+            color = colors[2]
+        elif self.hover_index.isValid() and self.hover_index == index:
+            color = colors[1]
+        else:
+            color = colors[0]
+        rect = self.button_rect(option.rect)
+        painter.save()
+        painter.setRenderHint(painter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(color))
+        painter.drawRoundedRect(rect, 6, 6)
+        font = QFont(option.font)
+        font.setPixelSize(12)
+        font.setWeight(QFont.Medium)
+        painter.setFont(font)
+        painter.setPen(QColor('white'))
+        painter.drawText(rect, Qt.AlignCenter, SEND_BUTTON_TEXT)
+        painter.restore()
+        
+    def editorEvent(self, event, model, option, index):
+        """处理按钮的按下和释放"""
+        event_type = event.type()
+        if event_type not in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease, QEvent.MouseButtonDblClick):
+            return False
+        if event.button() != Qt.LeftButton:
+            return False
+        inside = self.button_rect(option.rect).contains(event.pos())
+        if event_type == QEvent.MouseButtonPress:
+            if inside:
+                self.pressed_index = QPersistentModelIndex(index)
+                self.view.viewport().update(option.rect)
+            return inside
+        if event_type == QEvent.MouseButtonDblClick:
+            # 双击按钮不展开或折叠文件夹
+            return inside
+        pressed = self.pressed_index.isValid() and self.pressed_index == index
+        self.pressed_index = QPersistentModelIndex()
+        self.view.viewport().update(option.rect)
+        if pressed and inside:
+            node = model.node_from_index(index)
+            self.send_requested.emit(node.path, node.is_folder)
+            return True
+        return False
+        
+    def eventFilter(self, obj, event):
+        """跟踪鼠标悬停的按钮"""
+        event_type = event.type()
+        if event_type == QEvent.MouseMove:
+            index = self.view.indexAt(event.pos())
+            if index.column() != ACTION_COLUMN or not self.button_rect(self.view.visualRect(index)).contains(event.pos()):
+                index = QModelIndex()
+            self.set_hover_index(index)
+        elif event_type == QEvent.Leave:
+            self.set_hover_index(QModelIndex())
+        return False
+        
+    def set_hover_index(self, index):
+        """更新悬停的按钮，只重绘变化的单元格"""
+        if index == QModelIndex(self.hover_index):
+            return
+        for changed in (QModelIndex(self.hover_index), index):
+            if changed.isValid():
+                self.view.viewport().update(self.view.visualRect(changed))
+        self.hover_index = QPersistentModelIndex(index)
+        if index.isValid():
+            self.view.viewport().setCursor(Qt.PointingHandCursor)
+        else:
+            self.view.viewport().unsetCursor()
\ No newline at end of file
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试用例文件夹监视
+监视目标文件夹和各子文件夹（Linux下基于inotify），把短时间内的变化合并后通知首页增量更新
+"""
+
+import os
+import re
+import sys
+
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+# 合并变化通知的等待时间（毫秒），复制大量文件时只处理一次
+WATCH_DEBOUNCE_INTERVAL = 300
+# 网络文件系统上其他主机的修改不会产生inotify事件，这些文件系统上刷新时仍完整扫描
+REMOTE_FILESYSTEMS = {'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'ceph', 'glusterfs', 'fuse.sshfs', '9p'}
+
+def filesystem_type(path: str) -> str:
+    """返回路径所在的文件系统类型（读取/proc/self/mounts，非Linux或读取失败时返回空字符串）"""
+    if not sys.platform.startswith('linux'):
+        return ''
+    path = os.path.realpath(path)
+    best_mount, best_type = '', ''
+    try:
+        with open('/proc/self/mounts', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                # 挂载点中的空格等字符以八进制转义
+                mount_point = re.sub(r'\\([0-7]{3})', lambda m: chr(int(m.group(1), 8)), fields[1])
+                inside = path == mount_point or path.startswith(mount_point.rstrip('/') + '/')
+                if inside and len(mount_point) >= len(best_mount):
+                    best_mount, best_type = mount_point, fields[2]
+    except OSError:
+        return ''
+    return best_type
+
+class FolderWatcher(QObject):
+    """监视目标文件夹及其子文件夹
+    
+    只在文件夹中有文件或子文件夹新增、删除、改名时通知，文件内容原地修改不会通知。
+    监视数超出系统上限或目标文件夹在网络文件系统上时，reliable为False，调用方应回退到完整扫描。
+    """
+    folders_changed = pyqtSignal(object)  # 发生变化的文件夹路径集合
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.target_folder = None
+        self.reliable = False
+        self.failed_count = 0  # 无法监视的文件夹数
+        self.pending = set()
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(WATCH_DEBOUNCE_INTERVAL)
+        self.timer.timeout.connect(self.flush)
+        
+    def start(self, target_folder: str):
+        """开始监视目标文件夹，子文件夹由add_folders逐批加入"""
+        self.stop()
+        self.target_folder = target_folder
+        fs_type = filesystem_type(target_folder)
+        self.reliable = fs_type not in REMOTE_FILESYSTEMS
+        if not self.reliable:
+            print(f"目标文件夹位于网络文件系统（{fs_type}）上，其他主机的修改需要手动刷新")
+        self.add_folders([target_folder])
+        
+    def stop(self):
+        """停止监视并丢弃未处理的变化"""
+        directories = self.watcher.directories()
+        if directories:
+            self.watcher.removePaths(directories)
+        self.timer.stop()
+        self.pending.clear()
+        self.target_folder = None
+        self.reliable = False
+        self.failed_count = 0
+        
+    def add_folders(self, folder_paths):
+        """监视一批文件夹"""
+        if not folder_paths:
+            return
+        failed = self.watcher.addPaths(folder_paths)
+        if failed:
+            # 通常是超出了inotify监视数上限（/proc/sys/fs/inotify/max_user_watches）
+            self.failed_count += len(failed)
+            self.reliable = False
+            
+    def remove_folders(self, folder_paths):
+        """停止监视一批文件夹（已删除的文件夹会自动移除）"""
+        watched = set(self.watcher.directories())
+        folder_paths = [path for path in folder_paths if path in watched]
+        if folder_paths:
+            self.watcher.removePaths(folder_paths)
+            
+    def is_watching(self, target_folder: str) -> bool:
+        """是否正在可靠地监视该目标文件夹"""
+        return self.reliable and self.target_folder == target_folder
+        
+    def on_directory_changed(self, path: str):
+        """记录发生变化的文件夹，等待一段时间后合并通知"""
+        self.pending.add(path)
+        self.timer.start()
+        
+    def flush(self):
+        """立即通知已记录的变化"""
+        self.timer.stop()
+        if self.pending:
+            changed, self.pending = self.pending, set()
+            self.folders_changed.emit(changed)
\ No newline at end of file
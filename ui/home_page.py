@@ -6,58 +6,484 @@
 """
 
 import os
-import glob
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTreeWidget, 
-                             QTreeWidgetItem, QPushButton, QLabel, QMessageBox,
+import time
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTreeView,
+                             QPushButton, QLabel, QMessageBox,
                              QInputDialog, QProgressBar, QTextEdit, QSplitter,
-                             QGroupBox, QFrame)
+                             QGroupBox, QFrame, QApplication)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
 from PyQt5.QtGui import QFont, QIcon
 
 from database.db_manager import DatabaseManager
-from network.packet_sender import PacketSender
+from network.compression import scan_folder, walk_capture_files
+from network.pcap_reader import scan_capture
+from network.job import SendJob, read_send_settings, target_interfaces
+from network.telemetry import TelemetryExporter
 from .settings_page import ModernMessageBox, ModernQuestionBox
+from .folder_watcher import FolderWatcher
+from .folder_model import (FolderTreeModel, SendButtonDelegate, TREE_HEADERS, ACTION_COLUMN,
+                           format_bytes, format_duration)
 
+# 按数据包计算进度时进度条的刻度数
+PROGRESS_SCALE = 1000
+# 发送过程中读取进度计数的间隔（毫秒）
+PROGRESS_SAMPLE_INTERVAL = 100
+# 显示速率的平滑系数，越小越平稳
+RATE_SMOOTHING = 0.3
+# 后台扫描文件夹时，每扫描到这么多个子文件夹或经过这么长时间（秒）就把结果交给界面显示
+SCAN_BATCH_SIZE = 50
+SCAN_BATCH_INTERVAL = 0.2
 
-        
-
+def packet_totals(summaries):
+    """按各文件的摘要返回各文件发送完成时的累计包数，有文件没有摘要时返回None"""
+    totals = [0]
+    for summary in summaries:
+        if summary is None:
+            return None
+        totals.append(totals[-1] + summary['packet_count'])
+    return totals if totals[-1] > 0 else None
 
 class PacketSendThread(QThread):
     """发包线程"""
     progress_updated = pyqtSignal(int, int)  # 当前进度, 总数
     file_processed = pyqtSignal(str)  # 处理的文件名
     finished_signal = pyqtSignal(bool, str)  # 是否成功, 消息
+    interface_progress = pyqtSignal(str, int, int)  # 接口名, 已发包数, 已发字节数（多接口发送时）
     
-    def __init__(self, pcap_files, network_interface, source_ip, dest_ip=None):
+    def __init__(self, pcap_files, network_interface, source_ip, dest_ip=None, send_options=None,
+                 loop_count=1, loop_duration=0, workers=1, prefetch_budget=0, telemetry_dir=''):
         super().__init__()
-        self.pcap_files = pcap_files
-        self.network_interface = network_interface
-        self.source_ip = source_ip
-        self.dest_ip = dest_ip
-        self.packet_sender = PacketSender()
+        # 发送逻辑在不依赖Qt的SendJob中，本线程只负责把进度转成信号
+        self.job = SendJob(pcap_files, network_interface, source_ip, dest_ip, send_options,
+                           loop_count, loop_duration, workers, prefetch_budget, bool(telemetry_dir))
+        self.job.file_started = lambda pcap_file: self.file_processed.emit(os.path.basename(pcap_file))
+        self.job.file_finished = self.progress_updated.emit
+        self.interfaces = self.job.interfaces
+        self.packet_sender = self.job.packet_sender
+        if len(self.interfaces) > 1:
+            self.packet_sender.interface_progress_callback = self.interface_progress.emit
+        # 已发包数和字节数由发送会话（或工作进程的共享计数）累计，界面定时读取，不逐包发信号
+        self.progress = self.job.progress
+        # 可选的遥测记录（发送耗时直方图、错误统计、速率时间线），发送过程中由后台线程定时导出
+        self.telemetry = self.job.telemetry
+        self.telemetry_dir = telemetry_dir
+        self.telemetry_path = None  # 结束时导出的JSON文件路径
+        self.telemetry_error = None  # 结束时导出失败的错误信息
         
     def run(self):
         """运行发包任务"""
+        exporter = None
+        if self.telemetry is not None:
+            exporter = TelemetryExporter(self.telemetry, self.telemetry_dir)
+            exporter.start()
         try:
-            total_files = len(self.pcap_files)
-            for i, pcap_file in enumerate(self.pcap_files):
-                self.file_processed.emit(os.path.basename(pcap_file))
-                
-                # 发送PCAP文件
-                success = self.packet_sender.send_pcap_file(
-                    pcap_file, self.network_interface, self.source_ip, self.dest_ip
-                )
+            success, message = self.job.run()
+        except Exception as e:
+            success, message = False, f"发包过程中出现错误: {str(e)}"
+        if exporter is not None:
+            exporter.stop()
+            self.export_final_telemetry()
+        self.finished_signal.emit(success, message)
+        
+    def export_final_telemetry(self):
+        """发送结束后在本线程中写入最终的Prometheus文件和本次发送的JSON文件"""
+        self.telemetry.finish()
+        try:
+            self.telemetry_path = self.telemetry.export(self.telemetry_dir, final=True)
+        except Exception as e:
+            self.telemetry_error = str(e)
+
+class PcapIndexThread(QThread):
+    """后台扫描PCAP文件摘要的线程
+    
+    只处理索引中没有或大小、修改时间已变化的文件，扫描结果写入pcap_index表。
+    """
+    file_indexed = pyqtSignal(str, object)  # 文件路径, 摘要字典
+    
+    def __init__(self, db_manager, pending, parent=None):
+        """初始化扫描线程
+        
+        Args:
+            db_manager: 数据库管理器
+            pending: 待扫描的 (文件路径, 文件大小, 修改时间纳秒) 列表
+            parent: 父对象，刷新列表时线程可以在后台结束后再释放
+        """
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.pending = pending
+        
+    def run(self):
+        """逐个扫描文件，刷新文件夹列表时中止"""
+        for pcap_file, size, mtime_ns in self.pending:
+            if self.isInterruptionRequested():
+                return
+            try:
+                summary = scan_capture(pcap_file)
+            except Exception as e:
+                # 无法读取的文件也记入索引，文件不变时不再重复扫描
+                print(f"扫描PCAP文件时出错: {pcap_file}: {str(e)}")
+                summary = {'packet_count': 0, 'byte_count': 0, 'duration': 0.0, 'error': str(e)}
+            try:
+                self.db_manager.set_pcap_index(pcap_file, size, mtime_ns, summary)
+            except Exception as e:
+                print(f"保存PCAP文件索引时出错: {str(e)}")
+            self.file_indexed.emit(pcap_file, summary)
+
+class FolderScanThread(QThread):
+    """后台扫描目标文件夹的线程
+    
+    只列出目标文件夹下的子文件夹，不进入子文件夹；别名和索引中缓存的各子文件夹汇总也在线程中查询，
+    扫描结果分批发给界面，界面可以先显示已扫描到的部分。子文件夹中的内容在展开时再列出。
+    """
+    folders_found = pyqtSignal(object)  # 子文件夹列表，每项为 {'path', 'alias', 'parent', 'summary'}
+    
+    def __init__(self, db_manager, target_folder: str, parent=None):
+        """初始化扫描线程
+        
+        Args:
+            db_manager: 数据库管理器
+            target_folder: 目标文件夹路径
+            parent: 父对象，刷新列表时线程可以在后台结束后再释放
+        """
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.target_folder = target_folder
+        self.folder_count = 0
+        self.error = None  # 无法读取目标文件夹时的错误信息
+        
+    def run(self):
+        """扫描子文件夹，刷新文件夹列表时中止"""
+        try:
+            aliases = dict(self.db_manager.get_all_folder_aliases())
+            summaries = self.db_manager.get_folder_summaries(self.target_folder)
+        except Exception as e:
+            print(f"读取文件夹别名和索引时出错: {str(e)}")
+            aliases, summaries = {}, {}
+            
+        batch = []
+        last_emit = time.monotonic()
+        try:
+            with os.scandir(self.target_folder) as entries:
+                for entry in entries:
+                    if self.isInterruptionRequested():
+                        return
+                    if not entry.is_dir():
+                        continue
+                    batch.append({'path': entry.path, 'alias': aliases.get(entry.path), 'parent': None,
+                                  'summary': summaries.pop(entry.path, None)})
+                    
+                    if len(batch) >= SCAN_BATCH_SIZE or time.monotonic() - last_emit >= SCAN_BATCH_INTERVAL:
+                        self.emit_batch(batch)
+                        batch = []
+                        last_emit = time.monotonic()
+        except OSError as e:
+            self.error = str(e)
+            return
+            
+        if not self.isInterruptionRequested():
+            self.emit_batch(batch)
+            # 已不存在的子文件夹（程序未运行时被删除或改名）从索引中删除
+            try:
+                for folder_path in summaries:
+                    self.db_manager.delete_pcap_index_under(folder_path)
+            except Exception as e:
+                print(f"删除PCAP文件索引时出错: {str(e)}")
                 
-                if not success:
-                    self.finished_signal.emit(False, f"发送文件失败: {pcap_file}")
+    def emit_batch(self, batch):
+        """把一批子文件夹发给界面"""
+        if not batch:
+            return
+        self.folder_count += len(batch)
+        self.folders_found.emit(batch)
+
+class FolderLoadThread(QThread):
+    """后台列出展开的文件夹中内容的线程
+    
+    列出子文件夹和抓包文件并读取文件大小和修改时间，同时查询别名、索引中缓存的文件摘要和子文件夹汇总，
+    界面只把结果加入文件夹树。已不存在的文件和子文件夹在线程中从索引中删除。
+    """
+    folder_loaded = pyqtSignal(str, object)  # 文件夹路径, 列出的内容（见list_folder）
+    
+    def __init__(self, db_manager, folder_paths, parent=None):
+        """初始化线程
+        
+        Args:
+            db_manager: 数据库管理器
+            folder_paths: 要列出的文件夹路径列表
+            parent: 父对象，刷新列表时线程可以在后台结束后再释放
+        """
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.folder_paths = folder_paths
+        
+    def run(self):
+        """逐个列出文件夹，刷新文件夹列表时中止"""
+        try:
+            aliases = dict(self.db_manager.get_all_folder_aliases())
+        except Exception as e:
+            print(f"读取文件夹别名时出错: {str(e)}")
+            aliases = {}
+        for folder_path in self.folder_paths:
+            if self.isInterruptionRequested():
+                return
+            self.folder_loaded.emit(folder_path, self.list_folder(folder_path, aliases))
+            
+    def list_folder(self, folder_path: str, aliases: dict) -> dict:
+        """列出一个文件夹
+        
+        Args:
+            folder_path: 文件夹路径
+            aliases: 文件夹路径 -> 别名
+            
+        Returns:
+            {'folders': 子文件夹列表（格式同FolderScanThread）,
+             'files': [(文件路径, 文件大小, 修改时间纳秒, 索引中的摘要，没有或文件已变化时为None)]}，
+            无法读取时为 {'error': 错误信息}
+        """
+        try:
+            folders, files = scan_folder(folder_path)
+            files = [(entry.path, entry.stat()) for entry in files]
+        except OSError as e:
+            return {'error': str(e)}
+        try:
+            summaries = self.db_manager.get_folder_summaries(folder_path)
+            cached = self.db_manager.get_pcap_index_under(folder_path, recursive=False)
+        except Exception as e:
+            print(f"读取PCAP文件索引时出错: {str(e)}")
+            summaries, cached = {}, {}
+            
+        result = {'folders': [{'path': path, 'alias': aliases.get(path), 'parent': folder_path,
+                               'summary': summaries.pop(path, None)} for path in folders],
+                  'files': []}
+        for pcap_file, stat in files:
+            entry = cached.pop(pcap_file, None)
+            if entry and (entry['size'], entry['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+                entry = None
+            result['files'].append((pcap_file, stat.st_size, stat.st_mtime_ns, entry))
+            
+        # 已不存在的文件和子文件夹从索引中删除，避免上级文件夹的汇总中一直计入
+        try:
+            self.db_manager.delete_pcap_index(cached)
+            for subfolder in summaries:
+                self.db_manager.delete_pcap_index_under(subfolder)
+        except Exception as e:
+            print(f"删除PCAP文件索引时出错: {str(e)}")
+        return result
+
+class NewFolderThread(QThread):
+    """后台准备文件监视发现的新子文件夹的线程
+    
+    改名或移动过来的文件夹中的文件按大小和修改时间沿用原来的摘要写入索引，
+    再查询别名和索引中的汇总，新子文件夹展开前就能显示汇总。
+    """
+    folders_found = pyqtSignal(object)  # 子文件夹列表，格式同FolderScanThread
+    
+    def __init__(self, db_manager, target_folder: str, added_folders, moved_summaries, parent=None):
+        """初始化线程
+        
+        Args:
+            db_manager: 数据库管理器
+            target_folder: 目标文件夹路径
+            added_folders: (父文件夹路径, 子文件夹路径) 列表，父文件夹为目标文件夹时为None
+            moved_summaries: (文件大小, 修改时间纳秒) -> 摘要，刚从列表中删除的文件的摘要
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.target_folder = target_folder
+        self.added_folders = added_folders
+        self.moved_summaries = moved_summaries
+        
+    def run(self):
+        """找回改名文件的摘要后把新子文件夹发给界面，刷新文件夹列表时中止"""
+        if self.moved_summaries:
+            for _, folder_path in self.added_folders:
+                for pcap_file in walk_capture_files(folder_path):
+                    if self.isInterruptionRequested():
+                        return
+                    try:
+                        stat = os.stat(pcap_file)
+                    except OSError:
+                        continue
+                    summary = self.moved_summaries.pop((stat.st_size, stat.st_mtime_ns), None)
+                    if summary is None:
+                        continue
+                    try:
+                        self.db_manager.set_pcap_index(pcap_file, stat.st_size, stat.st_mtime_ns, summary)
+                    except Exception as e:
+                        print(f"保存PCAP文件索引时出错: {str(e)}")
+                        
+        aliases, summaries = {}, {}
+        try:
+            aliases = dict(self.db_manager.get_all_folder_aliases())
+            for parent_path in {parent_path for parent_path, _ in self.added_folders}:
+                summaries[parent_path] = self.db_manager.get_folder_summaries(
+                    parent_path if parent_path is not None else self.target_folder)
+        except Exception as e:
+            print(f"读取文件夹别名和索引时出错: {str(e)}")
+        self.folders_found.emit([{'path': folder_path, 'alias': aliases.get(folder_path), 'parent': parent_path,
+                                  'summary': summaries.get(parent_path, {}).get(folder_path)}
+                                 for parent_path, folder_path in self.added_folders])
+
+class FolderChangeThread(QThread):
+    """后台对比文件监视发现的变化的线程
+    
+    重新列出发生变化的文件夹并读取文件大小和修改时间，与界面传入的文件夹树快照对比；
+    已删除的子文件夹和文件从索引中删除，改名或移动的文件按大小和修改时间沿用原来的摘要写入索引。
+    界面只把对比结果更新到文件夹树中。
+    """
+    changes_found = pyqtSignal(object)  # 对比结果（见run）
+    
+    def __init__(self, db_manager, snapshot, parent=None):
+        """初始化线程
+        
+        Args:
+            db_manager: 数据库管理器
+            snapshot: [(文件夹路径, 父文件夹路径（目标文件夹为None）, 树中的子文件夹路径列表,
+                       树中的文件 [(文件路径, 文件大小, 修改时间纳秒, 摘要)])]
+            parent: 父对象，刷新列表时线程可以在后台结束后再释放
+        """
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.snapshot = snapshot
+        
+    def run(self):
+        """对比变化并更新索引，刷新文件夹列表时中止
+        
+        先处理所有删除再处理新增，这样改名或移动到其他位置的文件可以沿用原来的摘要。
+        发出的结果为 {'removed_folders': 已删除的子文件夹路径列表,
+        'added_folders': [(父文件夹路径, 新子文件夹路径)], 'removed_files': 已删除的文件路径列表,
+        'changed_files': [(文件路径, 文件大小, 修改时间纳秒, 摘要)]（被替换的文件）,
+        'added_files': [(文件夹路径, 文件路径, 文件大小, 修改时间纳秒, 摘要)],
+        'moved_summaries': 没有用上的 (文件大小, 修改时间纳秒) -> 摘要}，
+        摘要在索引中没有或文件已变化时为None；目标文件夹无法读取时为 {'error': 错误信息}。
+        """
+        moved_summaries = {}
+        result = {'removed_folders': [], 'added_folders': [], 'removed_files': [],
+                  'changed_files': [], 'added_files': []}
+        changed = []
+        additions = []
+        for folder_path, parent_path, existing, files in self.snapshot:
+            if self.isInterruptionRequested():
+                return
+            try:
+                folders, entries = scan_folder(folder_path)
+                current = {entry.path: entry.stat() for entry in entries}
+            except OSError as e:
+                if parent_path is None:
+                    self.changes_found.emit({'error': str(e)})
                     return
+                # 子文件夹已被删除或改名，由上级文件夹的变化处理
+                continue
                 
-                self.progress_updated.emit(i + 1, total_files)
+            for subfolder in set(existing).difference(folders):
+                result['removed_folders'].append(subfolder)
+                # 索引中该文件夹下的摘要留给可能改名或移动后的同一文件使用
+                try:
+                    for entry in self.db_manager.get_pcap_index_under(subfolder).values():
+                        moved_summaries[(entry['size'], entry['mtime_ns'])] = entry
+                    self.db_manager.delete_pcap_index_under(subfolder)
+                except Exception as e:
+                    print(f"删除PCAP文件索引时出错: {str(e)}")
+            result['added_folders'].extend((parent_path, path) for path in set(folders).difference(existing))
+            if parent_path is None:
+                # 目标文件夹中直接存放的文件不显示
+                continue
                 
-            self.finished_signal.emit(True, f"成功发送 {total_files} 个文件")
+            for pcap_file, size, mtime_ns, summary in files:
+                stat = current.pop(pcap_file, None)
+                if stat is None:
+                    result['removed_files'].append(pcap_file)
+                    if summary is not None:
+                        moved_summaries[(size, mtime_ns)] = summary
+                elif (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                    # 文件被替换，重新索引
+                    changed.append((pcap_file, stat))
+            additions.extend((folder_path, path, stat) for path, stat in current.items())
+            
+        try:
+            cached = self.db_manager.get_pcap_index(path for _, path, _ in additions)
+        except Exception as e:
+            print(f"读取PCAP文件索引时出错: {str(e)}")
+            cached = {}
+        for pcap_file, stat in changed:
+            summary = self.moved_summary(moved_summaries, pcap_file, stat)
+            result['changed_files'].append((pcap_file, stat.st_size, stat.st_mtime_ns, summary))
+        for folder_path, pcap_file, stat in additions:
+            entry = cached.get(pcap_file)
+            if entry and (entry['size'], entry['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+                entry = None
+            if entry is None:
+                entry = self.moved_summary(moved_summaries, pcap_file, stat)
+            result['added_files'].append((folder_path, pcap_file, stat.st_size, stat.st_mtime_ns, entry))
+            
+        # 已删除的文件从索引中删除，改名的文件在上面已经以新路径写入
+        try:
+            self.db_manager.delete_pcap_index(result['removed_files'])
+        except Exception as e:
+            print(f"删除PCAP文件索引时出错: {str(e)}")
+        result['moved_summaries'] = moved_summaries
+        if not self.isInterruptionRequested():
+            self.changes_found.emit(result)
             
+    def moved_summary(self, moved_summaries: dict, pcap_file: str, stat):
+        """改名或移动的文件大小和修改时间不变，沿用原来的摘要并以新路径写入索引，没有时返回None"""
+        summary = moved_summaries.pop((stat.st_size, stat.st_mtime_ns), None)
+        if summary is not None:
+            try:
+                self.db_manager.set_pcap_index(pcap_file, stat.st_size, stat.st_mtime_ns, summary)
+            except Exception as e:
+                print(f"保存PCAP文件索引时出错: {str(e)}")
+        return summary
+
+class SendFileListThread(QThread):
+    """后台列出要发送的文件夹中所有抓包文件的线程
+    
+    同时按索引计算各文件发送完成时的累计包数，所有文件都已索引且未变化时可以按数据包显示进度。
+    """
+    files_listed = pyqtSignal(object, object)  # 文件路径列表, 累计包数列表（无法计算时为None）
+    
+    def __init__(self, db_manager, folder_path: str, parent=None):
+        """初始化线程
+        
+        Args:
+            db_manager: 数据库管理器
+            folder_path: 要发送的文件夹路径
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.folder_path = folder_path
+        
+    def run(self):
+        """列出文件并计算累计包数"""
+        pcap_files = walk_capture_files(self.folder_path)
+        try:
+            cached = self.db_manager.get_pcap_index(pcap_files)
         except Exception as e:
-            self.finished_signal.emit(False, f"发包过程中出现错误: {str(e)}")
+            print(f"读取PCAP文件索引时出错: {str(e)}")
+            cached = {}
+        summaries = []
+        for pcap_file in pcap_files:
+            summary = self.current_summary(pcap_file, cached.get(pcap_file))
+            summaries.append(summary)
+            if summary is None:
+                # 有文件尚未索引或已变化，无法计算累计包数，其余文件不必再检查
+                break
+        self.files_listed.emit(pcap_files, packet_totals(summaries))
+        
+    @staticmethod
+    def current_summary(pcap_file: str, summary):
+        """索引中的摘要与文件当前的大小和修改时间一致时返回摘要，否则返回None"""
+        if summary is None or summary.get('error'):
+            return None
+        try:
+            stat = os.stat(pcap_file)
+        except OSError:
+            return None
+        if (summary['size'], summary['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+            return None
+        return summary
 
 class HomePage(QWidget):
     """首页类"""
@@ -66,6 +492,30 @@ class HomePage(QWidget):
         super().__init__()
         self.db_manager = db_manager
         self.send_thread = None
+        self.scan_thread = None
+        self.index_thread = None
+        self.load_thread = None
+        self.pending_loads = []  # 已展开、等待后台列出内容的文件夹路径
+        self.new_folder_thread = None
+        self.change_thread = None  # 后台对比文件监视发现的变化的线程
+        self.file_list_thread = None  # 发送文件夹前在后台列出其中文件的线程
+        self.pending_index = []  # 需要重新扫描的 (文件路径, 文件大小, 修改时间纳秒)
+        # 文件夹监视：只把新增、删除、改名的文件夹和文件更新到列表中
+        self.folder_watcher = FolderWatcher(self)
+        self.folder_watcher.folders_changed.connect(self.apply_folder_changes)
+        self.changed_folders = set()  # 扫描过程中收到、等扫描结束后再处理的变化
+        self.send_packet_totals = None  # 发送任务中各文件发送完成时的累计包数
+        self.send_start_time = 0.0
+        self.files_done = 0
+        self.files_total = 0
+        self.last_sample = (0.0, 0, 0)  # 上次读取进度的 (时刻, 包数, 字节数)
+        self.smoothed_rate = None  # 平滑后的 (pps, Mbps)
+        
+        # 发送过程中定时读取进度计数
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setInterval(PROGRESS_SAMPLE_INTERVAL)
+        self.progress_timer.timeout.connect(self.sample_progress)
+        self.interface_stats = {}  # 多接口发送时各接口的已发包数
         self.sort_order = Qt.DescendingOrder  # 排序状态：升序/降序
         
         # 设置首页背景
@@ -108,7 +558,8 @@ class HomePage(QWidget):
         toolbar_layout = QHBoxLayout()
         
         self.refresh_btn = QPushButton("🔄 刷新列表")
-        self.refresh_btn.clicked.connect(self.refresh_folder_list)
+        self.refresh_btn.setToolTip("文件夹的变化会自动更新到列表中；按住Shift点击重新完整扫描")
+        self.refresh_btn.clicked.connect(self.on_refresh_clicked)
         self.refresh_btn.setStyleSheet("""
             QPushButton {
                 background-color: #28a745;
@@ -153,17 +604,21 @@ class HomePage(QWidget):
         tree_layout.addLayout(toolbar_layout)
         
         # 文件夹树
-        self.folder_tree = QTreeWidget()
-        self.folder_tree.setHeaderLabels(["名称", "路径", "PCAP文件数", "操作"])
+        # 数据保存在模型中，视图只绘制可见的行，发包按钮由委托直接绘制，不为每一行创建控件
+        self.folder_model = FolderTreeModel(self)
+        self.folder_model.sort_order = self.sort_order  # 默认按名称降序排序
+        self.folder_model.fetch_requested.connect(self.load_folder)
+        self.folder_tree = QTreeView()
+        self.folder_tree.setModel(self.folder_model)
+        self.folder_tree.setUniformRowHeights(True)
         self.folder_tree.setAlternatingRowColors(True)
-        self.folder_tree.itemDoubleClicked.connect(self.on_item_double_clicked)
-        
-        # 启用排序功能
-        self.folder_tree.setSortingEnabled(True)
-        self.folder_tree.sortByColumn(0, self.sort_order)  # 默认按名称降序排序
+        self.send_delegate = SendButtonDelegate(self.folder_tree)
+        self.send_delegate.send_requested.connect(self.on_send_requested)
+        self.folder_tree.setItemDelegateForColumn(ACTION_COLUMN, self.send_delegate)
         
-        # 连接表头点击事件
+        # 连接表头点击事件，只对名称列排序
         header = self.folder_tree.header()
+        header.setSectionsClickable(True)
         header.sectionClicked.connect(self.on_header_clicked)
         
         # 初始化表头显示排序状态
@@ -173,11 +628,14 @@ class HomePage(QWidget):
         self.folder_tree.setColumnWidth(0, 250)  # 名称列更宽
         self.folder_tree.setColumnWidth(1, 300)  # 路径列适中
         self.folder_tree.setColumnWidth(2, 100)  # 文件数列较窄
-        self.folder_tree.setColumnWidth(3, 120)  # 操作列足够宽显示按钮
+        self.folder_tree.setColumnWidth(3, 100)  # 数据包数
+        self.folder_tree.setColumnWidth(4, 90)  # 大小
+        self.folder_tree.setColumnWidth(5, 90)  # 时长
+        self.folder_tree.setColumnWidth(ACTION_COLUMN, 120)  # 操作列足够宽显示按钮
         
         # 设置表格样式，增加行高
         self.folder_tree.setStyleSheet("""
-            QTreeWidget {
+            QTreeView {
                 background-color: #ffffff;
                 border: none;
                 border-radius: 8px;
@@ -185,16 +643,16 @@ class HomePage(QWidget):
                 selection-background-color: #e3f2fd;
                 alternate-background-color: #f8f9fa;
             }
-            QTreeWidget::item {
+            QTreeView::item {
                 padding: 12px 8px;
                 border-bottom: 1px solid #e9ecef;
                 min-height: 40px;
             }
-            QTreeWidget::item:selected {
+            QTreeView::item:selected {
                 background-color: #e3f2fd;
                 color: #1976d2;
             }
-            QTreeWidget::item:hover {
+            QTreeView::item:hover {
                 background-color: #f5f5f5;
             }
             QHeaderView::section {
@@ -300,135 +758,366 @@ class HomePage(QWidget):
         # 设置分割器比例
         splitter.setSizes([500, 200])
         
-    def refresh_folder_list(self):
-        """刷新文件夹列表"""
-        self.folder_tree.clear()
+    def on_refresh_clicked(self):
+        """刷新按钮点击事件，按住Shift时重新完整扫描"""
+        self.refresh_folder_list(force=bool(QApplication.keyboardModifiers() & Qt.ShiftModifier))
         
+    def refresh_folder_list(self, force: bool = False):
+        """刷新文件夹列表
+        
+        正在可靠地监视目标文件夹时，变化已经自动更新到列表中，只需立即处理还在等待的变化；
+        否则在后台重新扫描，扫描到一批就显示一批。
+        
+        Args:
+            force: 是否重新完整扫描
+        """
         # 获取目标文件夹路径
         target_folder = self.db_manager.get_setting('target_folder')
+        if not force and target_folder:
+            if self.scan_thread is not None and self.scan_thread.target_folder == target_folder:
+                self.log_message("正在扫描文件夹，请稍候")
+                return
+            if self.folder_watcher.is_watching(target_folder):
+                self.folder_watcher.flush()
+                self.log_message("文件夹列表已是最新")
+                return
+                
+        self.stop_scan_thread()
+        self.stop_index_thread()
+        self.stop_folder_threads()
+        self.folder_watcher.stop()
+        self.folder_model.clear()
+        self.changed_folders.clear()
+        self.pending_index = []
+        
         if not target_folder or not os.path.exists(target_folder):
             self.log_message("请先在设置中配置目标文件夹路径")
             return
             
         self.log_message(f"正在扫描文件夹: {target_folder}")
+        # 扫描前开始监视，扫描过程中的变化在扫描结束后处理
+        self.folder_watcher.start(target_folder)
+        self.start_scan_thread(target_folder)
+        
+    def start_scan_thread(self, target_folder: str):
+        """在后台列出目标文件夹下的子文件夹"""
+        self.scan_thread = FolderScanThread(self.db_manager, target_folder, self)
+        self.scan_thread.folders_found.connect(self.add_folder_items)
+        self.scan_thread.finished.connect(self.on_scan_finished)
+        self.scan_thread.finished.connect(self.scan_thread.deleteLater)
+        self.scan_thread.start()
+        
+    def stop_scan_thread(self, wait: bool = False):
+        """中止正在进行的文件夹扫描，线程在当前子文件夹扫描完后自行结束
+        
+        Args:
+            wait: 是否等待线程结束（程序退出时）
+        """
+        if self.scan_thread is not None:
+            self.stop_thread(self.scan_thread, self.scan_thread.folders_found, self.on_scan_finished, wait)
+            self.scan_thread = None
+            
+    def stop_folder_threads(self, wait: bool = False):
+        """中止正在后台列出展开的文件夹、对比文件夹变化和准备新子文件夹的线程
         
-        # 扫描子文件夹
+        Args:
+            wait: 是否等待线程结束（程序退出时）
+        """
+        self.pending_loads = []
+        if self.load_thread is not None:
+            self.stop_thread(self.load_thread, self.load_thread.folder_loaded, self.on_load_finished, wait)
+            self.load_thread = None
+        if self.new_folder_thread is not None:
+            self.stop_thread(self.new_folder_thread, self.new_folder_thread.folders_found,
+                             self.on_new_folders_finished, wait)
+            self.new_folder_thread = None
+        if self.change_thread is not None:
+            self.stop_thread(self.change_thread, self.change_thread.changes_found, self.on_changes_finished, wait)
+            self.change_thread = None
+            
+    def stop_file_list_thread(self, wait: bool = False):
+        """中止发送前正在列出文件的线程
+        
+        Args:
+            wait: 是否等待线程结束（程序退出时）
+        """
+        if self.file_list_thread is not None:
+            self.stop_thread(self.file_list_thread, self.file_list_thread.files_listed, self.on_file_list_finished,
+                             wait)
+            self.file_list_thread = None
+            
+    def stop_thread(self, thread: QThread, result_signal, on_finished, wait: bool):
+        """断开后台线程的结果信号并请求中止，线程在当前步骤完成后自行结束
+        
+        Args:
+            thread: 后台线程
+            result_signal: 线程发出结果的信号
+            on_finished: 连接到线程finished信号的处理函数，没有时为None
+            wait: 是否等待线程结束（程序退出时）
+        """
         try:
-            folder_count = 0
-            for item in os.listdir(target_folder):
-                item_path = os.path.join(target_folder, item)
-                if os.path.isdir(item_path):
-                    self.add_folder_item(item_path)
-                    folder_count += 1
-                    self.log_message(f"添加文件夹: {item}")
-                    
-            self.log_message(f"文件夹列表刷新完成，共找到 {folder_count} 个子文件夹")
+            result_signal.disconnect()
+            if on_finished is not None:
+                thread.finished.disconnect(on_finished)
+            thread.requestInterruption()
+            if wait:
+                thread.wait()
+        except RuntimeError:
+            # 线程已结束并被释放
+            pass
             
-            # 强制更新UI显示
-            self.folder_tree.update()
-            self.folder_tree.repaint()
+    def on_scan_finished(self):
+        """文件夹扫描完成，处理扫描过程中发生的变化"""
+        scan_thread, self.scan_thread = self.scan_thread, None
+        if scan_thread.error:
+            # 目标文件夹无法读取，之后刷新时重新完整扫描
+            self.folder_watcher.stop()
+            self.log_message(f"扫描文件夹时出错: {scan_thread.error}", "red")  # 错误用红色
+            return
+        self.log_message(f"文件夹列表刷新完成，共找到 {scan_thread.folder_count} 个子文件夹")
+        
+        # 处理扫描过程中发生的变化
+        self.apply_pending_changes()
+        
+    def folder_threads_running(self) -> bool:
+        """是否有正在列出文件夹或对比变化的后台线程，线程结束前文件监视发现的变化暂不处理"""
+        return (self.scan_thread is not None or self.load_thread is not None
+                or self.new_folder_thread is not None or self.change_thread is not None)
+        
+    def apply_pending_changes(self):
+        """后台线程都结束后处理期间收到的文件夹变化"""
+        if self.changed_folders and not self.folder_threads_running():
+            changed, self.changed_folders = self.changed_folders, set()
+            self.apply_folder_changes(changed)
             
-        except Exception as e:
-            self.log_message(f"扫描文件夹时出错: {str(e)}", "red")  # 错误用红色
+    def add_folder_items(self, folders):
+        """把后台列出的一批子文件夹加入文件夹树，子文件夹中的内容在展开时再列出"""
+        for folder in folders:
+            self.folder_model.add_folder(folder['path'], folder['alias'], folder['parent'], folder['summary'])
             
-    def add_folder_item(self, folder_path: str):
-        """添加文件夹项到树形控件"""
-        folder_name = os.path.basename(folder_path)
+    def load_folder(self, folder_path: str):
+        """文件夹第一次展开时在后台列出其中的子文件夹和文件
+        
+        文件夹先加入文件监视，列出期间发生的变化等列出后再处理，不会遗漏。
+        
+        Args:
+            folder_path: 文件夹路径
+        """
+        failed_count = self.folder_watcher.failed_count
+        self.folder_watcher.add_folders([folder_path])
+        if self.folder_watcher.failed_count > failed_count:
+            self.log_message(f"文件夹无法监视（可能超出inotify监视数上限），刷新时将重新完整扫描: {folder_path}", "orange")
+        self.pending_loads.append(folder_path)
+        self.start_load_thread()
         
-        # 获取别名并格式化显示名称
-        alias = self.db_manager.get_folder_alias(folder_path)
-        if alias:
-            display_name = f"{alias} ({folder_name})"
+    def start_load_thread(self):
+        """在后台列出等待中的文件夹，正在列出时等当前线程结束后再开始"""
+        if not self.pending_loads or self.load_thread is not None:
+            return
+        self.load_thread = FolderLoadThread(self.db_manager, self.pending_loads, self)
+        self.load_thread.folder_loaded.connect(self.on_folder_loaded)
+        self.load_thread.finished.connect(self.on_load_finished)
+        self.load_thread.finished.connect(self.load_thread.deleteLater)
+        self.pending_loads = []
+        self.load_thread.start()
+        
+    def on_folder_loaded(self, folder_path: str, result: dict):
+        """把后台列出的内容加入文件夹树
+        
+        子文件夹先显示索引中缓存的汇总，同样在展开时再列出；文件显示已索引的摘要，
+        没有或已变化的文件交给后台扫描。
+        
+        Args:
+            folder_path: 文件夹路径
+            result: 列出的内容（见FolderLoadThread.list_folder）
+        """
+        folder = self.folder_model.node(folder_path)
+        if folder is None or not folder.loading:
+            # 列出期间文件夹已从列表中删除
+            return
+        if 'error' in result:
+            self.log_message(f"读取文件夹时出错: {result['error']}", "red")
         else:
-            display_name = folder_name
-        
-        # 统计PCAP文件数量
-        pcap_files = glob.glob(os.path.join(folder_path, "*.pcap"))
-        pcap_files.extend(glob.glob(os.path.join(folder_path, "*.pcapng")))
-        pcap_count = len(pcap_files)
-        
-        # 创建树形项
-        item = QTreeWidgetItem(self.folder_tree)
-        item.setText(0, display_name)
-        item.setText(1, folder_path)
-        item.setText(2, str(pcap_count))
-        item.setData(0, Qt.UserRole, folder_path)  # 存储完整路径
-        
-        # 添加发包按钮
-        send_btn = QPushButton("📤 发包")
-        send_btn.setMinimumWidth(100)  # 设置最小宽度
-        send_btn.setMaximumWidth(110)  # 增加最大宽度
-        send_btn.setMinimumHeight(32)  # 设置最小高度
-        send_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #4299e1;
-                color: white;
-                border: none;
-                border-radius: 6px;
-                padding: 8px 14px;
-                font-weight: 500;
-                font-size: 12px;
-                text-align: center;
-            }
-            QPushButton:hover {
-                background-color: #3182ce;
-            }
-            QPushButton:pressed {
-                background-color: #2c5aa0;
-            }
-        """)
-        send_btn.clicked.connect(lambda: self.send_folder_packets(folder_path))
-        self.folder_tree.setItemWidget(item, 3, send_btn)
+            self.add_folder_items(result['folders'])
+            for pcap_file, size, mtime_ns, entry in result['files']:
+                self.folder_model.add_file(folder_path, pcap_file, size, mtime_ns)
+                self.record_file(pcap_file, size, mtime_ns, entry)
+        self.folder_model.finish_loading(folder_path)
+        self.start_index_thread()
+        
+    def on_load_finished(self):
+        """列出完成，继续列出期间又展开的文件夹，之后处理期间发生的变化"""
+        self.load_thread = None
+        self.start_load_thread()
+        self.apply_pending_changes()
+        
+    def record_file(self, pcap_file: str, size: int, mtime_ns: int, summary=None):
+        """显示文件摘要或把文件加入后台索引
+        
+        Args:
+            pcap_file: 文件路径
+            size: 文件大小
+            mtime_ns: 修改时间（纳秒）
+            summary: 索引中的摘要，没有或文件已变化时为None
+        """
+        if summary is not None:
+            self.apply_file_summary(pcap_file, summary)
+        else:
+            self.pending_index.append((pcap_file, size, mtime_ns))
+            
+    def start_index_thread(self):
+        """在后台扫描需要重新索引的文件，正在索引时等当前线程结束后再开始"""
+        if not self.pending_index or self.index_thread is not None:
+            return
+        self.log_message(f"正在后台索引 {len(self.pending_index)} 个PCAP文件")
+        self.index_thread = PcapIndexThread(self.db_manager, self.pending_index, self)
+        self.index_thread.file_indexed.connect(self.apply_file_summary)
+        self.index_thread.finished.connect(self.on_index_finished)
+        self.index_thread.finished.connect(self.index_thread.deleteLater)
+        self.pending_index = []
+        self.index_thread.start()
+        
+    def on_index_finished(self):
+        """后台索引完成，索引过程中又发现的文件继续索引"""
+        self.index_thread = None
+        self.start_index_thread()
+        
+    def stop_index_thread(self, wait: bool = False):
+        """中止正在进行的后台索引，线程在当前文件扫描完后自行结束
+        
+        Args:
+            wait: 是否等待线程结束（程序退出时）
+        """
+        if self.index_thread is not None:
+            self.stop_thread(self.index_thread, self.index_thread.file_indexed, self.on_index_finished, wait)
+            self.index_thread = None
+            
+    def apply_file_summary(self, pcap_file: str, summary: dict):
+        """在文件和所属文件夹上显示文件摘要"""
+        self.folder_model.set_summary(pcap_file, summary)
+        
+    def apply_folder_changes(self, changed_folders):
+        """在后台对比文件监视发现的变化，对比结果再更新到列表中
+        
+        只监视目标文件夹和已展开的文件夹。界面线程只记下这些文件夹在文件夹树中的子文件夹和文件，
+        列出文件夹、读取文件信息和更新索引都在FolderChangeThread中进行。
+        
+        Args:
+            changed_folders: 发生变化的文件夹路径集合
+        """
+        if self.folder_threads_running():
+            # 后台线程结束后再处理
+            self.changed_folders |= changed_folders
+            return
+        target_folder = self.folder_watcher.target_folder
+        if target_folder is None:
+            return
+            
+        snapshot = []
+        for folder_path in changed_folders:
+            parent_path = None if folder_path == target_folder else folder_path
+            files = []
+            if parent_path is not None:
+                folder = self.folder_model.node(folder_path)
+                if folder is None or not folder.is_folder or not folder.loaded:
+                    continue
+                for pcap_file in self.folder_model.file_paths(folder_path):
+                    node = self.folder_model.node(pcap_file)
+                    files.append((pcap_file, node.size, node.mtime_ns, node.summary))
+            snapshot.append((folder_path, parent_path, self.folder_model.folder_paths(parent_path), files))
+        if not snapshot:
+            return
+        self.change_thread = FolderChangeThread(self.db_manager, snapshot, self)
+        self.change_thread.changes_found.connect(self.on_changes_found)
+        self.change_thread.finished.connect(self.on_changes_finished)
+        self.change_thread.finished.connect(self.change_thread.deleteLater)
+        self.change_thread.start()
+        
+    def on_changes_found(self, result: dict):
+        """把后台对比出的变化更新到文件夹树中
+        
+        先删除再添加，新增的子文件夹交给NewFolderThread准备，同样在展开时再列出。
+        
+        Args:
+            result: 对比结果（见FolderChangeThread.run）
+        """
+        if 'error' in result:
+            self.folder_watcher.stop()
+            self.log_message(f"目标文件夹无法读取，刷新时将重新完整扫描: {result['error']}", "red")
+            return
+        for folder_path in result['removed_folders']:
+            self.remove_folder_item(folder_path)
+        for pcap_file in result['removed_files']:
+            self.folder_model.remove(pcap_file)
+        for pcap_file, size, mtime_ns, summary in result['changed_files']:
+            node = self.folder_model.node(pcap_file)
+            if node is None:
+                continue
+            self.folder_model.clear_summary(pcap_file)
+            node.size, node.mtime_ns = size, mtime_ns
+            self.record_file(pcap_file, size, mtime_ns, summary)
+        for folder_path, pcap_file, size, mtime_ns, summary in result['added_files']:
+            folder = self.folder_model.node(folder_path)
+            if folder is None or self.folder_model.node(pcap_file) is not None:
+                continue
+            self.folder_model.add_file(folder_path, pcap_file, size, mtime_ns)
+            self.record_file(pcap_file, size, mtime_ns, summary)
+            
+        added_files, removed_files = len(result['added_files']), len(result['removed_files'])
+        if added_files or removed_files:
+            self.log_message(f"检测到文件变化：新增 {added_files} 个，删除 {removed_files} 个PCAP文件")
+        added_folders = result['added_folders']
+        self.add_new_folders(added_folders, result['moved_summaries'])
+        removed_folder_count = len(result['removed_folders'])
+        if added_folders or removed_folder_count:
+            self.log_message(f"检测到文件夹变化：新增 {len(added_folders)} 个，删除 {removed_folder_count} 个子文件夹")
+        self.pending_index = [entry for entry in self.pending_index if self.folder_model.node(entry[0]) is not None]
+        self.start_index_thread()
+        
+    def on_changes_finished(self):
+        """变化对比完成，没有新子文件夹要准备时处理期间又发生的变化"""
+        self.change_thread = None
+        self.apply_pending_changes()
+        
+    def add_new_folders(self, added_folders, moved_summaries):
+        """在后台准备文件监视发现的新子文件夹，准备好后加入文件夹树
+        
+        改名或移动过来的文件夹中的文件沿用原来的摘要写入索引，展开前就能显示汇总。
+        线程结束前文件监视发现的变化暂不处理，之后再与加入后的文件夹树对比。
+        
+        Args:
+            added_folders: (父文件夹路径, 子文件夹路径) 列表，父文件夹为目标文件夹时为None
+            moved_summaries: (文件大小, 修改时间纳秒) -> 摘要，刚删除的文件和文件夹中没有用上的摘要
+        """
+        if not added_folders:
+            return
+        self.new_folder_thread = NewFolderThread(self.db_manager, self.folder_watcher.target_folder, added_folders,
+                                                 moved_summaries, self)
+        self.new_folder_thread.folders_found.connect(self.add_folder_items)
+        self.new_folder_thread.finished.connect(self.on_new_folders_finished)
+        self.new_folder_thread.finished.connect(self.new_folder_thread.deleteLater)
+        self.new_folder_thread.start()
+        
+    def on_new_folders_finished(self):
+        """新子文件夹已加入文件夹树，处理期间发生的变化"""
+        self.new_folder_thread = None
+        self.apply_pending_changes()
+        
+    def remove_folder_item(self, folder_path: str):
+        """从文件夹树中删除文件夹及其中的所有内容，索引已在后台删除"""
+        if self.folder_model.node(folder_path) is None:
+            return
+        self.folder_watcher.remove_folders(self.folder_model.loaded_folder_paths(folder_path))
+        self.folder_model.remove(folder_path)
         
-        # 添加PCAP文件子项
-        for pcap_file in pcap_files:
-            child_item = QTreeWidgetItem(item)
-            child_item.setText(0, os.path.basename(pcap_file))
-            child_item.setText(1, pcap_file)
-            child_item.setText(2, "1")
-            
-            # 为单个文件添加发包按钮
-            file_send_btn = QPushButton("📤 发包")
-            file_send_btn.setMinimumWidth(100)  # 设置最小宽度
-            file_send_btn.setMaximumWidth(110)  # 增加最大宽度
-            file_send_btn.setMinimumHeight(32)  # 设置最小高度
-            file_send_btn.setStyleSheet("""
-                QPushButton {
-                    background-color: #2b6cb0;
-                    color: white;
-                    border: none;
-                    border-radius: 6px;
-                    padding: 8px 14px;
-                    font-weight: 500;
-                    font-size: 12px;
-                    text-align: center;
-                }
-                QPushButton:hover {
-                    background-color: #2c5aa0;
-                }
-                QPushButton:pressed {
-                    background-color: #2a4d8d;
-                }
-            """)
-            file_send_btn.clicked.connect(lambda checked, f=pcap_file: self.send_single_packet(f))
-            self.folder_tree.setItemWidget(child_item, 3, file_send_btn)
-            
-    def on_item_double_clicked(self, item, column):
-        """双击项目事件"""
-        if item.parent() is None:  # 文件夹项
-            if item.isExpanded():
-                item.setExpanded(False)
-            else:
-                item.setExpanded(True)
-                
     def set_folder_alias(self):
         """设置文件夹别名"""
-        current_item = self.folder_tree.currentItem()
-        if not current_item or current_item.parent() is not None:
+        node = self.folder_model.node_from_index(self.folder_tree.currentIndex())
+        if node is None or not node.is_folder:
             self.log_message("请选择一个文件夹", color="red", flash=True)
             return
             
-        folder_path = current_item.data(0, Qt.UserRole)
+        folder_path = node.path
         current_alias = self.db_manager.get_folder_alias(folder_path)
         
         alias, ok = QInputDialog.getText(
@@ -439,11 +1128,18 @@ class HomePage(QWidget):
         
         if ok and alias.strip():
             self.db_manager.set_folder_alias(folder_path, alias.strip())
-            current_item.setText(0, alias.strip())
+            self.folder_model.set_alias(folder_path, alias.strip())
             self.log_message(f"已设置别名: {alias.strip()}")
             
+    def on_send_requested(self, path: str, is_folder: bool):
+        """点击行内发送按钮"""
+        if is_folder:
+            self.send_folder_packets(path)
+        else:
+            self.send_single_packet(path)
+            
     def send_folder_packets(self, folder_path: str):
-        """发送文件夹中的所有PCAP包"""
+        """发送文件夹（含各级子文件夹）中的所有PCAP包"""
         # 检查网络设置
         network_interface = self.db_manager.get_setting('network_interface')
         source_ip = self.db_manager.get_setting('source_ip')
@@ -454,18 +1150,32 @@ class HomePage(QWidget):
             dialog.exec_()
             return
             
-        # 获取PCAP文件列表
-        pcap_files = glob.glob(os.path.join(folder_path, "*.pcap"))
-        pcap_files.extend(glob.glob(os.path.join(folder_path, "*.pcapng")))
+        if self.is_send_busy():
+            return
+            
+        # 在后台列出PCAP文件，列出后直接开始发包，无需确认
+        self.file_list_thread = SendFileListThread(self.db_manager, folder_path, self)
+        self.file_list_thread.files_listed.connect(
+            lambda pcap_files, totals: self.on_send_files_listed(pcap_files, totals, network_interface,
+                                                                 source_ip, dest_ip))
+        self.file_list_thread.finished.connect(self.on_file_list_finished)
+        self.file_list_thread.finished.connect(self.file_list_thread.deleteLater)
+        self.file_list_thread.start()
         
+    def on_file_list_finished(self):
+        """列出文件的线程已结束（包括出错未发出结果时），不再阻止新的发包任务"""
+        self.file_list_thread = None
+        
+    def on_send_files_listed(self, pcap_files, totals, network_interface, source_ip, dest_ip):
+        """发送的文件夹中的文件已列出，开始发包"""
+        # 结果先于线程的finished信号到达，开始发包前先清除，否则会被判断为发包任务正在准备
+        self.file_list_thread = None
         if not pcap_files:
             dialog = ModernMessageBox(self, "信息", "该文件夹中没有PCAP文件", "info")
             dialog.exec_()
             return
-            
-        # 直接开始发包，无需确认
-        self.start_packet_sending(pcap_files, network_interface, source_ip, dest_ip)
-            
+        self.start_packet_sending(pcap_files, network_interface, source_ip, dest_ip, totals)
+        
     def send_single_packet(self, pcap_file: str):
         """发送单个PCAP文件"""
         # 检查网络设置
@@ -479,29 +1189,54 @@ class HomePage(QWidget):
             return
             
         # 直接开始发包，无需确认
-        self.start_packet_sending([pcap_file], network_interface, source_ip, dest_ip)
-            
-    def start_packet_sending(self, pcap_files, network_interface, source_ip, dest_ip=None):
-        """开始发包任务"""
-        # 检查是否有正在运行的线程
-        if self.send_thread and self.send_thread.isRunning():
+        self.start_packet_sending([pcap_file], network_interface, source_ip, dest_ip,
+                                  self.get_packet_totals([pcap_file]))
+        
+    def is_send_busy(self) -> bool:
+        """是否有正在进行或正在准备的发包任务，有时提示用户"""
+        if (self.send_thread and self.send_thread.isRunning()) or self.file_list_thread is not None:
             dialog = ModernMessageBox(self, "警告", "发包任务正在进行中，请等待完成", "warning")
             dialog.exec_()
-            return
+            return True
+        return False
         
+    def start_packet_sending(self, pcap_files, network_interface, source_ip, dest_ip=None, packet_totals=None):
+        """开始发包任务，packet_totals为各文件发送完成时的累计包数，未知时为None"""
+        # 检查是否有正在运行的线程
+        if self.is_send_busy():
+            return
+            
         # 清理已完成的线程
         if self.send_thread and not self.send_thread.isRunning():
             self.send_thread.deleteLater()
             self.send_thread = None
             
         # 创建发包线程
-        self.send_thread = PacketSendThread(pcap_files, network_interface, source_ip, dest_ip)
+        settings = read_send_settings(self.db_manager)
+        loop_count, loop_duration = settings['loop_count'], settings['loop_duration']
+        self.interface_stats = {}
+        self.files_done = 0
+        self.files_total = len(pcap_files)
+        self.send_start_time = time.monotonic()
+        self.last_sample = (self.send_start_time, 0, 0)
+        self.smoothed_rate = None
+        # 不循环且所有文件都已索引时，按数据包数显示进度和剩余时间
+        self.send_packet_totals = None
+        if loop_count == 1 and loop_duration <= 0:
+            self.send_packet_totals = packet_totals
+        self.send_thread = PacketSendThread(pcap_files,
+                                            target_interfaces(network_interface, settings['fanout_interfaces']),
+                                            source_ip, dest_ip,
+                                            settings['send_options'], loop_count, loop_duration,
+                                            settings['workers'], settings['prefetch_budget'],
+                                            settings['telemetry_dir'])
         self.send_thread.progress_updated.connect(self.update_progress)
         self.send_thread.file_processed.connect(self.update_current_file)
         self.send_thread.finished_signal.connect(self.on_send_finished)
+        self.send_thread.interface_progress.connect(self.update_interface_progress)
         
         # 初始化进度条
-        self.progress_bar.setMaximum(len(pcap_files))
+        self.progress_bar.setMaximum(PROGRESS_SCALE if self.send_packet_totals else len(pcap_files))
         self.progress_bar.setValue(0)
         self.progress_bar.setVisible(True)
         
@@ -512,11 +1247,59 @@ class HomePage(QWidget):
         # 开始发送
         self.log_message(f"开始发送 {len(pcap_files)} 个PCAP文件...")
         self.send_thread.start()
+        self.progress_timer.start()
+        
+    def get_packet_totals(self, pcap_files):
+        """按文件夹树中显示的摘要返回各文件发送完成时的累计包数，有文件尚未索引时返回None"""
+        return packet_totals([self.folder_model.summary(pcap_file) for pcap_file in pcap_files])
         
     def update_progress(self, current, total):
         """更新进度"""
-        self.progress_bar.setValue(current)
-        self.status_label.setText(f"发送进度: {current}/{total}")
+        self.files_done = current
+        self.files_total = total
+        if not self.send_packet_totals:
+            self.progress_bar.setValue(current)
+        self.sample_progress()
+        
+    def sample_progress(self):
+        """读取发送进度计数，更新进度条和状态栏中的速率与剩余时间"""
+        if self.send_thread is None:
+            return
+        packets, byte_count = self.send_thread.progress.sample()
+        now = time.monotonic()
+        
+        # 按两次读取之间的增量计算速率，再做指数平滑
+        last_time, last_packets, last_bytes = self.last_sample
+        interval = now - last_time
+        if interval > 0:
+            pps = (packets - last_packets) / interval
+            mbps = (byte_count - last_bytes) * 8 / interval / 1e6
+            if self.smoothed_rate is None:
+                self.smoothed_rate = (pps, mbps)
+            else:
+                self.smoothed_rate = (self.smoothed_rate[0] + (pps - self.smoothed_rate[0]) * RATE_SMOOTHING,
+                                      self.smoothed_rate[1] + (mbps - self.smoothed_rate[1]) * RATE_SMOOTHING)
+            self.last_sample = (now, packets, byte_count)
+        pps, mbps = self.smoothed_rate or (0.0, 0.0)
+        
+        text = (f"发送进度: {self.files_done}/{self.files_total}，已发送 {packets} 个数据包"
+                f"（{format_bytes(byte_count)}），{pps:.0f} pps，{mbps:.2f} Mbps")
+        if self.send_packet_totals:
+            # 多接口发送时计数是所有接口之和
+            packets_done = min(packets // len(self.send_thread.interfaces), self.send_packet_totals[-1])
+            total_packets = self.send_packet_totals[-1]
+            self.progress_bar.setValue(int(packets_done * PROGRESS_SCALE / total_packets))
+            elapsed = now - self.send_start_time
+            if packets_done:
+                eta = elapsed * (total_packets - packets_done) / packets_done
+                text += f"，预计剩余 {format_duration(eta)}"
+        if self.interface_stats:
+            text += " | " + " | ".join(f"{name}: {count} 包" for name, count in self.interface_stats.items())
+        self.status_label.setText(text)
+        
+    def update_interface_progress(self, interface, packets, byte_count):
+        """记录多接口发送时各接口的进度，由sample_progress显示"""
+        self.interface_stats[interface] = packets
         
     def update_current_file(self, filename):
         """更新当前处理的文件"""
@@ -524,6 +1307,7 @@ class HomePage(QWidget):
         
     def on_send_finished(self, success, message):
         """发包完成"""
+        self.progress_timer.stop()
         self.progress_bar.setVisible(False)
         self.status_label.setText("就绪")
         
@@ -533,16 +1317,23 @@ class HomePage(QWidget):
             if self.send_thread.isRunning():
                 self.send_thread.quit()
                 self.send_thread.wait(1000)  # 等待最多1秒
-            
+                
+            # 遥测数据已在发送线程中导出，导出失败不影响发送，只在这里提示一次
+            if self.send_thread.telemetry_path:
+                self.log_message(f"遥测数据已导出: {self.send_thread.telemetry_path}")
+            elif self.send_thread.telemetry_error:
+                self.log_message(f"导出遥测数据失败: {self.send_thread.telemetry_error}", "red")
+                
             # 断开信号连接
             self.send_thread.progress_updated.disconnect()
             self.send_thread.file_processed.disconnect()
             self.send_thread.finished_signal.disconnect()
+            self.send_thread.interface_progress.disconnect()
             
             # 删除线程对象
             self.send_thread.deleteLater()
             self.send_thread = None
-        
+            
         # 恢复按钮
         self.refresh_btn.setEnabled(True)
         self.add_alias_btn.setEnabled(True)
@@ -589,7 +1380,7 @@ class HomePage(QWidget):
             '''
         else:
             formatted_message = f'<span style="color: {html_color};">[{timestamp}] {message}</span>'
-        
+            
         self.log_text.append(formatted_message)
         
         # 自动滚动到底部
@@ -599,7 +1390,7 @@ class HomePage(QWidget):
         # 如果是红色闪烁，额外触发一个简单的背景闪烁效果
         if color == "red" and flash:
             self._flash_log_background()
-    
+            
     def _flash_log_background(self):
         """日志区域背景闪烁效果"""
         original_style = self.log_text.styleSheet()
@@ -629,10 +1420,10 @@ class HomePage(QWidget):
                 self.log_text.setStyleSheet(original_style)
                 flash_timer.stop()
                 flash_timer.deleteLater()
-        
+                
         flash_timer.timeout.connect(flash_step)
         flash_timer.start(200)  # 每200ms切换一次
-         
+        
     def on_header_clicked(self, logical_index):
         """表头点击事件处理"""
         if logical_index == 0:  # 只对名称列（第0列）启用排序
@@ -641,9 +1432,9 @@ class HomePage(QWidget):
                 self.sort_order = Qt.DescendingOrder
             else:
                 self.sort_order = Qt.AscendingOrder
-            
+                
             # 应用排序
-            self.folder_tree.sortByColumn(0, self.sort_order)
+            self.folder_model.sort(0, self.sort_order)
             
             # 更新表头文本显示排序状态
             self.update_header_text()
@@ -655,7 +1446,7 @@ class HomePage(QWidget):
     def update_header_text(self):
         """更新表头文本显示排序状态"""
         # 重置所有列的表头文本
-        headers = ["名称", "路径", "PCAP文件数", "操作"]
+        headers = list(TREE_HEADERS)
         
         # 为名称列添加排序箭头
         if self.sort_order == Qt.AscendingOrder:
@@ -664,4 +1455,4 @@ class HomePage(QWidget):
             headers[0] = "名称 ▼"  # 降序箭头
             
         # 更新表头标签
-        self.folder_tree.setHeaderLabels(headers)
\ No newline at end of file
+        self.folder_model.set_headers(headers)
\ No newline at end of file
@@ -8,19 +8,32 @@
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QStackedWidget, QPushButton, QLabel, QFrame,
                              QMessageBox, QApplication)
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import Qt, pyqtSignal, QThread, QTimer
 from PyQt5.QtGui import QFont, QIcon
 
 from .home_page import HomePage
 from .settings_page import SettingsPage, ModernQuestionBox
+from .startup import startup_timer, warm_up
 from database.db_manager import DatabaseManager
 
+class WarmupThread(QThread):
+    """窗口显示后在后台预加载scapy和psutil"""
+    
+    def run(self):
+        """执行预加载"""
+        try:
+            warm_up()
+        except Exception as e:
+            # 预加载失败不影响使用，第一次用到时会重新导入并报告错误
+            print(f"后台预加载失败: {str(e)}")
+
 class MainWindow(QMainWindow):
     """主窗口类"""
     
     def __init__(self):
         super().__init__()
         self.db_manager = DatabaseManager()
+        self.warmup_thread = None
         self.init_ui()
         
     def init_ui(self):
@@ -53,9 +66,11 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(self.stacked_widget)
         
         # 创建页面
-        self.home_page = HomePage(self.db_manager)
-        self.settings_page = SettingsPage(self.db_manager)
-        
+        with startup_timer.measure("创建首页"):
+            self.home_page = HomePage(self.db_manager)
+        with startup_timer.measure("创建设置页面"):
+            self.settings_page = SettingsPage(self.db_manager)
+            
         # 添加页面到容器
         self.stacked_widget.addWidget(self.home_page)
         self.stacked_widget.addWidget(self.settings_page)
@@ -172,6 +187,27 @@ class MainWindow(QMainWindow):
         """)
         sidebar_layout.addWidget(version_label)
         
+    def showEvent(self, event):
+        """窗口显示事件"""
+        super().showEvent(event)
+        if self.warmup_thread is None:
+            # 等窗口绘制完成后再开始后台预加载
+            self.warmup_thread = WarmupThread(self)
+            self.warmup_thread.finished.connect(self.on_warmup_finished)
+            QTimer.singleShot(0, self.start_warmup)
+            
+    def start_warmup(self):
+        """开始后台预加载"""
+        startup_timer.mark("窗口已显示")
+        self.warmup_thread.start()
+        
+    def on_warmup_finished(self):
+        """后台预加载完成"""
+        # psutil已加载，读取设置页面的网络接口列表不会再阻塞界面
+        self.settings_page.load_network_interfaces()
+        if startup_timer.enabled:
+            print(startup_timer.report())
+            
     def show_home_page(self):
         """显示首页"""
         self.stacked_widget.setCurrentWidget(self.home_page)
@@ -210,6 +246,14 @@ class MainWindow(QMainWindow):
         reply = dialog.exec_()
         
         if reply == dialog.Accepted:
+            # 等待后台扫描和索引线程结束后再退出
+            self.home_page.stop_scan_thread(wait=True)
+            self.home_page.stop_index_thread(wait=True)
+            self.home_page.stop_folder_threads(wait=True)
+            self.home_page.stop_file_list_thread(wait=True)
+            # 正在运行的QThread被销毁会导致崩溃，预加载很快结束，直接等待
+            if self.warmup_thread is not None:
+                self.warmup_thread.wait()
             event.accept()
         else:
             event.ignore()
\ No newline at end of file
@@ -6,11 +6,11 @@
 """
 
 import os
-import psutil
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QFormLayout,
                              QLineEdit, QPushButton, QComboBox, QLabel, 
                              QFileDialog, QMessageBox, QGroupBox, QTextEdit,
-                             QFrame, QSpacerItem, QSizePolicy, QDialog)
+                             QFrame, QSpacerItem, QSizePolicy, QDialog, QSpinBox,
+                             QDoubleSpinBox, QListWidget, QListWidgetItem)
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont
 
@@ -243,15 +243,27 @@ class ModernQuestionBox(QDialog):
         self.setLayout(layout)
 
 from database.db_manager import DatabaseManager
+from network.transmit import (ENGINE_SCAPY, ENGINE_AF_PACKET, ENGINE_SENDMMSG,
+                              ENGINE_TX_RING, DEFAULT_BATCH_SIZE, SINK_NULL, SINK_PCAP_PREFIX)
+from network.prefetch import DEFAULT_MEMORY_BUDGET
+from network.pacing import (PACING_DEFAULT, PACING_TOPSPEED, PACING_PPS, PACING_MBPS,
+                            PACING_MULTIPLIER)
 
 class SettingsPage(QWidget):
     """设置页面类"""
     
     settings_changed = pyqtSignal()  # 设置改变信号
     
+    # 接口下拉框和扇出列表中选择抓包输出文件的条目
+    PCAP_SINK_PICKER_TEXT = "pcap文件… (选择写入的抓包文件)"
+    
     def __init__(self, db_manager: DatabaseManager):
         super().__init__()
         self.db_manager = db_manager
+        # 网络接口列表在页面第一次显示或后台预加载完成时才读取，避免启动时导入psutil
+        self.interfaces_loaded = False
+        # 接口下拉框中上一次选中的条目，取消选择抓包输出文件时恢复
+        self.last_interface_index = 0
         self.init_ui()
         self.load_settings()
         
@@ -414,6 +426,8 @@ class SettingsPage(QWidget):
                 margin-right: 5px;
             }
         """)
+        # 选中"pcap文件…"时弹出保存对话框，选择pcap伪接口的输出文件
+        self.interface_combo.activated.connect(self.on_interface_activated)
         interface_row_layout.addWidget(self.interface_combo)
         
         self.refresh_interfaces_btn = QPushButton("🔄 刷新")
@@ -442,6 +456,22 @@ class SettingsPage(QWidget):
         
         network_layout.addRow("网络接口:", interface_row_layout)
         
+        # 同时发送到的其他接口
+        self.fanout_list = QListWidget()
+        self.fanout_list.setMaximumHeight(100)
+        self.fanout_list.setStyleSheet("""
+            QListWidget {
+                border: 2px solid #e9ecef;
+                border-radius: 6px;
+                padding: 4px;
+                font-size: 13px;
+                background-color: white;
+                color: #495057;
+            }
+        """)
+        self.fanout_list.itemClicked.connect(self.on_fanout_item_clicked)
+        network_layout.addRow("同时发送到:", self.fanout_list)
+        
         # 源IP地址
         self.source_ip_edit = QLineEdit()
         self.source_ip_edit.setPlaceholderText("可选，留空使用接口默认IP")
@@ -494,6 +524,136 @@ class SettingsPage(QWidget):
         
         layout.addWidget(network_group)
         
+        # 发送引擎设置组
+        engine_group = QGroupBox("🚀 发送引擎设置")
+        engine_group.setStyleSheet("""
+            QGroupBox {
+                font-weight: 600;
+                font-size: 14px;
+                color: #495057;
+                border: 2px solid #dee2e6;
+                border-radius: 8px;
+                margin-top: 10px;
+                padding-top: 10px;
+            }
+            QGroupBox::title {
+                subcontrol-origin: margin;
+                left: 10px;
+                padding: 0 8px 0 8px;
+                background-color: white;
+            }
+        """)
+        engine_layout = QFormLayout(engine_group)
+        
+        # 发送引擎选择
+        self.engine_combo = QComboBox()
+        self.engine_combo.setMinimumWidth(300)
+        self.engine_combo.addItem("scapy 二层socket（跨平台）", ENGINE_SCAPY)
+        self.engine_combo.addItem("AF_PACKET 原始socket（Linux）", ENGINE_AF_PACKET)
+        self.engine_combo.addItem("sendmmsg 批量发送（Linux）", ENGINE_SENDMMSG)
+        self.engine_combo.addItem("TX_RING 内核环形缓冲区（Linux）", ENGINE_TX_RING)
+        self.engine_combo.setStyleSheet(self.interface_combo.styleSheet())
+        engine_layout.addRow("发送引擎:", self.engine_combo)
+        
+        # 批量大小
+        self.batch_size_spin = QSpinBox()
+        self.batch_size_spin.setRange(1, 1024)
+        self.batch_size_spin.setValue(DEFAULT_BATCH_SIZE)
+        self.batch_size_spin.setStyleSheet("""
+            QSpinBox {
+                border: 2px solid #e9ecef;
+                border-radius: 6px;
+                padding: 8px 12px;
+                font-size: 13px;
+                background-color: white;
+                color: #495057;
+                min-height: 20px;
+            }
+            QSpinBox:focus {
+                border-color: #007bff;
+            }
+        """)
+        engine_layout.addRow("批量大小:", self.batch_size_spin)
+        
+        # 速率模式
+        self.pacing_combo = QComboBox()
+        self.pacing_combo.setMinimumWidth(300)
+        self.pacing_combo.addItem("默认（每100包暂停1ms）", PACING_DEFAULT)
+        self.pacing_combo.addItem("全速发送", PACING_TOPSPEED)
+        self.pacing_combo.addItem("固定包速率（pps）", PACING_PPS)
+        self.pacing_combo.addItem("固定比特速率（Mbps）", PACING_MBPS)
+        self.pacing_combo.addItem("原始间隔倍速回放", PACING_MULTIPLIER)
+        self.pacing_combo.setStyleSheet(self.interface_combo.styleSheet())
+        self.pacing_combo.currentIndexChanged.connect(self.update_rate_spin)
+        engine_layout.addRow("速率模式:", self.pacing_combo)
+        
+        # 目标速率/倍速
+        self.rate_spin = QDoubleSpinBox()
+        self.rate_spin.setRange(0.01, 100000000)
+        self.rate_spin.setDecimals(2)
+        self.rate_spin.setValue(1.0)
+        self.rate_spin.setStyleSheet(self.batch_size_spin.styleSheet().replace("QSpinBox", "QDoubleSpinBox"))
+        engine_layout.addRow("目标速率:", self.rate_spin)
+        self.update_rate_spin()
+        
+        # 循环发送
+        self.loop_count_spin = QSpinBox()
+        self.loop_count_spin.setRange(0, 100000000)
+        self.loop_count_spin.setSpecialValueText("不限")
+        self.loop_count_spin.setValue(1)
+        self.loop_count_spin.setStyleSheet(self.batch_size_spin.styleSheet())
+        engine_layout.addRow("循环次数:", self.loop_count_spin)
+        
+        self.loop_duration_spin = QSpinBox()
+        self.loop_duration_spin.setRange(0, 30 * 24 * 3600)
+        self.loop_duration_spin.setSpecialValueText("不限")
+        self.loop_duration_spin.setSuffix(" 秒")
+        self.loop_duration_spin.setStyleSheet(self.batch_size_spin.styleSheet())
+        engine_layout.addRow("循环时间:", self.loop_duration_spin)
+        
+        # 并行发送进程数
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, max(os.cpu_count() or 1, 1))
+        self.workers_spin.setValue(1)
+        self.workers_spin.setStyleSheet(self.batch_size_spin.styleSheet())
+        engine_layout.addRow("并行进程数:", self.workers_spin)
+        
+        # 文件夹发送时预读后续文件的内存上限
+        self.prefetch_spin = QSpinBox()
+        self.prefetch_spin.setRange(0, 65536)
+        self.prefetch_spin.setSpecialValueText("不预读")
+        self.prefetch_spin.setSuffix(" MB")
+        self.prefetch_spin.setValue(DEFAULT_MEMORY_BUDGET // (1024 * 1024))
+        self.prefetch_spin.setStyleSheet(self.batch_size_spin.styleSheet())
+        engine_layout.addRow("预读内存上限:", self.prefetch_spin)
+        
+        # 遥测导出目录
+        telemetry_row_layout = QHBoxLayout()
+        self.telemetry_dir_edit = QLineEdit()
+        self.telemetry_dir_edit.setPlaceholderText("不导出遥测数据")
+        self.telemetry_dir_edit.setStyleSheet(self.folder_path_edit.styleSheet())
+        telemetry_row_layout.addWidget(self.telemetry_dir_edit)
+        
+        self.browse_telemetry_btn = QPushButton("📂 浏览")
+        self.browse_telemetry_btn.clicked.connect(self.browse_telemetry_dir)
+        self.browse_telemetry_btn.setStyleSheet(self.browse_folder_btn.styleSheet())
+        telemetry_row_layout.addWidget(self.browse_telemetry_btn)
+        engine_layout.addRow("遥测导出目录:", telemetry_row_layout)
+        
+        # 引擎说明
+        engine_info = QLabel("Linux下可选择AF_PACKET、sendmmsg或TX_RING引擎提升发包速率，批量大小对sendmmsg和TX_RING生效；系统不支持时自动依次回退，最终使用scapy。"
+                             "目标速率在pps、Mbps模式下为发送速率，在倍速回放模式下为倍速。"
+                             "循环次数不为1或设置了循环时间时，每个文件只加载一次到内存后循环发送。"
+                             "并行进程数大于1时按流把数据包分配到多个进程发送，同一条流内的顺序保持不变。"
+                             "发送文件夹时在后台预读后续文件，预读内存上限限制同时装入内存的文件大小。"
+                             "设置遥测导出目录后，发送过程中每秒更新playpcap.prom（Prometheus文本格式），"
+                             "结束时写入包含发送耗时直方图、错误统计和速率时间线的JSON文件")
+        engine_info.setStyleSheet("color: #666; font-size: 12px;")
+        engine_info.setWordWrap(True)
+        engine_layout.addRow("", engine_info)
+        
+        layout.addWidget(engine_group)
+        
         # 按钮组
         button_layout = QHBoxLayout()
         button_layout.addStretch()
@@ -548,8 +708,18 @@ class SettingsPage(QWidget):
         # 添加弹性空间
         layout.addStretch()
         
-        # 初始化网络接口列表
+    def showEvent(self, event):
+        """页面显示事件"""
+        super().showEvent(event)
+        self.load_network_interfaces()
+        
+    def load_network_interfaces(self):
+        """第一次调用时读取网络接口列表并选中已保存的接口"""
+        if self.interfaces_loaded:
+            return
+        self.interfaces_loaded = True
         self.refresh_network_interfaces()
+        self.load_interface_settings()
         
     def browse_folder(self):
         """浏览文件夹"""
@@ -561,11 +731,26 @@ class SettingsPage(QWidget):
         if folder:
             self.folder_path_edit.setText(folder)
             
+    def browse_telemetry_dir(self):
+        """浏览遥测导出目录"""
+        folder = QFileDialog.getExistingDirectory(
+            self, "选择遥测导出目录",
+            self.telemetry_dir_edit.text() or os.path.expanduser("~")
+        )
+        
+        if folder:
+            self.telemetry_dir_edit.setText(folder)
+            
     def refresh_network_interfaces(self):
         """刷新网络接口列表"""
+        current_interface = self.interface_combo.currentData()
         self.interface_combo.clear()
+        checked = set(self.get_fanout_interfaces())
+        self.fanout_list.clear()
         
         try:
+            import psutil
+            
             # 获取网络接口信息
             interfaces = psutil.net_if_addrs()
             stats = psutil.net_if_stats()
@@ -589,18 +774,109 @@ class SettingsPage(QWidget):
                 if ipv4_addr:
                     display_text = f"{interface_name} ({ipv4_addr})"
                     self.interface_combo.addItem(display_text, interface_name)
+                    item = QListWidgetItem(display_text)
+                    item.setData(Qt.UserRole, interface_name)
+                    item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+                    item.setCheckState(Qt.Checked if interface_name in checked else Qt.Unchecked)
+                    self.fanout_list.addItem(item)
                     
         except Exception as e:
             dialog = ModernMessageBox(self, "警告", f"获取网络接口失败: {str(e)}", "warning")
             dialog.exec_()
             
-    def load_settings(self):
-        """加载设置"""
-        # 加载文件夹路径
-        folder_path = self.db_manager.get_setting('target_folder')
-        if folder_path:
-            self.folder_path_edit.setText(folder_path)
+        # 不经网卡的伪接口，用于不需要root权限的吞吐测试
+        self.interface_combo.addItem("null (丢弃，不经网卡)", SINK_NULL)
+        # 已保存或已选择的抓包文件伪接口，以及选择新输出文件的条目
+        sinks = [current_interface or '', self.db_manager.get_setting('network_interface') or '']
+        sinks += list(checked) + (self.db_manager.get_setting('fanout_interfaces') or '').split(',')
+        for sink in dict.fromkeys(sinks):
+            if sink.startswith(SINK_PCAP_PREFIX) and sink != SINK_PCAP_PREFIX:
+                self.add_pcap_sink(sink, sink in checked)
+        self.interface_combo.addItem(self.PCAP_SINK_PICKER_TEXT, SINK_PCAP_PREFIX)
+        picker = QListWidgetItem(self.PCAP_SINK_PICKER_TEXT)
+        picker.setData(Qt.UserRole, SINK_PCAP_PREFIX)
+        self.fanout_list.addItem(picker)
+        if current_interface:
+            index = self.interface_combo.findData(current_interface)
+            if index >= 0:
+                self.interface_combo.setCurrentIndex(index)
+        self.last_interface_index = max(0, self.interface_combo.currentIndex())
+        
+    def add_pcap_sink(self, sink: str, checked: bool = False):
+        """把抓包文件伪接口加入接口下拉框和扇出列表（已存在时不重复添加）
+        
+        Args:
+            sink: pcap:<文件路径>
+            checked: 是否在扇出列表中勾选
+        """
+        display_text = f"{sink} (写入抓包文件)"
+        if self.interface_combo.findData(sink) < 0:
+            # 放在"pcap文件…"条目之前
+            picker_index = self.interface_combo.findData(SINK_PCAP_PREFIX)
+            index = picker_index if picker_index >= 0 else self.interface_combo.count()
+            self.interface_combo.insertItem(index, display_text, sink)
+            
+        for i in range(self.fanout_list.count()):
+            item = self.fanout_list.item(i)
+            if item.data(Qt.UserRole) == sink:
+                if checked:
+                    item.setCheckState(Qt.Checked)
+                return
+        item = QListWidgetItem(display_text)
+        item.setData(Qt.UserRole, sink)
+        item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+        item.setCheckState(Qt.Checked if checked else Qt.Unchecked)
+        picker_row = self.fanout_list.count()
+        if picker_row > 0 and self.fanout_list.item(picker_row - 1).data(Qt.UserRole) == SINK_PCAP_PREFIX:
+            picker_row -= 1
+        self.fanout_list.insertItem(picker_row, item)
+        
+    def choose_pcap_sink(self):
+        """弹出保存对话框选择抓包文件伪接口的输出文件
+        
+        Returns:
+            pcap:<文件路径>，取消时返回None
+        """
+        path, _ = QFileDialog.getSaveFileName(
+            self, "选择抓包输出文件", os.path.expanduser("~"),
+            "PCAP文件 (*.pcap);;所有文件 (*)"
+        )
+        if not path:
+            return None
+        return SINK_PCAP_PREFIX + path
+        
+    def on_interface_activated(self, index: int):
+        """接口下拉框选中"pcap文件…"时选择输出文件，取消时恢复之前的选择"""
+        if self.interface_combo.itemData(index) != SINK_PCAP_PREFIX:
+            self.last_interface_index = index
+            return
+        sink = self.choose_pcap_sink()
+        if sink is None:
+            self.interface_combo.setCurrentIndex(self.last_interface_index)
+            return
+        self.add_pcap_sink(sink)
+        self.last_interface_index = self.interface_combo.findData(sink)
+        self.interface_combo.setCurrentIndex(self.last_interface_index)
+        
+    def on_fanout_item_clicked(self, item: QListWidgetItem):
+        """扇出列表点击"pcap文件…"时选择输出文件，并勾选新加入的伪接口"""
+        if item.data(Qt.UserRole) != SINK_PCAP_PREFIX:
+            return
+        sink = self.choose_pcap_sink()
+        if sink is not None:
+            self.add_pcap_sink(sink, checked=True)
             
+    def get_fanout_interfaces(self):
+        """返回列表中勾选的扇出接口"""
+        interfaces = []
+        for i in range(self.fanout_list.count()):
+            item = self.fanout_list.item(i)
+            if item.checkState() == Qt.Checked:
+                interfaces.append(item.data(Qt.UserRole))
+        return interfaces
+        
+    def load_interface_settings(self):
+        """选中已保存的网络接口和扇出接口"""
         # 加载网络接口
         network_interface = self.db_manager.get_setting('network_interface')
         if network_interface:
@@ -608,8 +884,27 @@ class SettingsPage(QWidget):
             for i in range(self.interface_combo.count()):
                 if self.interface_combo.itemData(i) == network_interface:
                     self.interface_combo.setCurrentIndex(i)
+                    self.last_interface_index = i
                     break
                     
+        # 加载扇出接口
+        fanout_interfaces = set(filter(None, (self.db_manager.get_setting('fanout_interfaces') or '').split(',')))
+        for i in range(self.fanout_list.count()):
+            item = self.fanout_list.item(i)
+            if item.data(Qt.UserRole) != SINK_PCAP_PREFIX:
+                item.setCheckState(Qt.Checked if item.data(Qt.UserRole) in fanout_interfaces else Qt.Unchecked)
+            
+    def load_settings(self):
+        """加载设置"""
+        # 加载文件夹路径
+        folder_path = self.db_manager.get_setting('target_folder')
+        if folder_path:
+            self.folder_path_edit.setText(folder_path)
+            
+        # 网络接口列表还没有读取时，在读取后再选中
+        if self.interfaces_loaded:
+            self.load_interface_settings()
+            
         # 加载源IP
         source_ip = self.db_manager.get_setting('source_ip')
         if source_ip:
@@ -620,6 +915,55 @@ class SettingsPage(QWidget):
         if dest_ip:
             self.dest_ip_edit.setText(dest_ip)
             
+        # 加载发送引擎
+        send_engine = self.db_manager.get_setting('send_engine')
+        index = self.engine_combo.findData(send_engine)
+        if index >= 0:
+            self.engine_combo.setCurrentIndex(index)
+            
+        batch_size = self.db_manager.get_setting('batch_size')
+        if batch_size and batch_size.isdigit():
+            self.batch_size_spin.setValue(int(batch_size))
+            
+        # 加载速率模式
+        index = self.pacing_combo.findData(self.db_manager.get_setting('pacing_mode'))
+        if index >= 0:
+            self.pacing_combo.setCurrentIndex(index)
+            
+        pacing_rate = self.db_manager.get_setting('pacing_rate')
+        try:
+            self.rate_spin.setValue(float(pacing_rate))
+        except (TypeError, ValueError):
+            pass
+            
+        # 加载循环发送设置
+        loop_count = self.db_manager.get_setting('loop_count')
+        if loop_count and loop_count.isdigit():
+            self.loop_count_spin.setValue(int(loop_count))
+            
+        loop_duration = self.db_manager.get_setting('loop_duration')
+        if loop_duration and loop_duration.isdigit():
+            self.loop_duration_spin.setValue(int(loop_duration))
+            
+        send_workers = self.db_manager.get_setting('send_workers')
+        if send_workers and send_workers.isdigit():
+            self.workers_spin.setValue(int(send_workers))
+            
+        prefetch_budget = self.db_manager.get_setting('prefetch_budget')
+        if prefetch_budget and prefetch_budget.isdigit():
+            self.prefetch_spin.setValue(int(prefetch_budget))
+            
+        telemetry_dir = self.db_manager.get_setting('telemetry_dir')
+        if telemetry_dir:
+            self.telemetry_dir_edit.setText(telemetry_dir)
+            
+    def update_rate_spin(self):
+        """根据速率模式更新目标速率输入框的单位"""
+        mode = self.pacing_combo.currentData()
+        suffixes = {PACING_PPS: " pps", PACING_MBPS: " Mbps", PACING_MULTIPLIER: " 倍"}
+        self.rate_spin.setSuffix(suffixes.get(mode, ""))
+        self.rate_spin.setEnabled(mode in suffixes)
+        
     def save_settings(self):
         """保存设置"""
         try:
@@ -630,6 +974,13 @@ class SettingsPage(QWidget):
                 dialog.exec_()
                 return
                 
+            # 验证遥测导出目录
+            telemetry_dir = self.telemetry_dir_edit.text().strip()
+            if telemetry_dir and not os.path.isdir(telemetry_dir):
+                dialog = ModernMessageBox(self, "警告", "指定的遥测导出目录不存在", "warning")
+                dialog.exec_()
+                return
+                
             # 验证源IP地址格式（如果提供）
             source_ip = self.source_ip_edit.text().strip()
             if source_ip:
@@ -652,15 +1003,31 @@ class SettingsPage(QWidget):
                     dialog.exec_()
                     return
                     
+            # 验证循环设置：次数和时间都不限时发送永远不会结束
+            if self.loop_count_spin.value() == 0 and self.loop_duration_spin.value() == 0:
+                dialog = ModernMessageBox(self, "警告", "循环次数和循环时间不能同时为不限", "warning")
+                dialog.exec_()
+                return
+                
             # 保存设置
             self.db_manager.set_setting('target_folder', folder_path)
             
             current_interface = self.interface_combo.currentData()
-            if current_interface:
+            if current_interface and current_interface != SINK_PCAP_PREFIX:
                 self.db_manager.set_setting('network_interface', current_interface)
                 
+            self.db_manager.set_setting('fanout_interfaces', ','.join(self.get_fanout_interfaces()))
             self.db_manager.set_setting('source_ip', source_ip)
             self.db_manager.set_setting('dest_ip', dest_ip)
+            self.db_manager.set_setting('send_engine', self.engine_combo.currentData())
+            self.db_manager.set_setting('batch_size', str(self.batch_size_spin.value()))
+            self.db_manager.set_setting('pacing_mode', self.pacing_combo.currentData())
+            self.db_manager.set_setting('pacing_rate', str(self.rate_spin.value()))
+            self.db_manager.set_setting('loop_count', str(self.loop_count_spin.value()))
+            self.db_manager.set_setting('loop_duration', str(self.loop_duration_spin.value()))
+            self.db_manager.set_setting('send_workers', str(self.workers_spin.value()))
+            self.db_manager.set_setting('prefetch_budget', str(self.prefetch_spin.value()))
+            self.db_manager.set_setting('telemetry_dir', telemetry_dir)
             
             # 发送设置改变信号
             self.settings_changed.emit()
@@ -684,14 +1051,38 @@ class SettingsPage(QWidget):
         if reply == QMessageBox.Yes:
             self.folder_path_edit.clear()
             self.interface_combo.setCurrentIndex(0)
+            self.last_interface_index = 0
+            for i in range(self.fanout_list.count()):
+                item = self.fanout_list.item(i)
+                if item.data(Qt.UserRole) != SINK_PCAP_PREFIX:
+                    item.setCheckState(Qt.Unchecked)
             self.source_ip_edit.clear()
             self.dest_ip_edit.clear()
+            self.engine_combo.setCurrentIndex(0)
+            self.batch_size_spin.setValue(DEFAULT_BATCH_SIZE)
+            self.pacing_combo.setCurrentIndex(0)
+            self.rate_spin.setValue(1.0)
+            self.loop_count_spin.setValue(1)
+            self.loop_duration_spin.setValue(0)
+            self.workers_spin.setValue(1)
+            self.prefetch_spin.setValue(DEFAULT_MEMORY_BUDGET // (1024 * 1024))
+            self.telemetry_dir_edit.clear()
             
             # 清除数据库中的设置
             self.db_manager.set_setting('target_folder', '')
             self.db_manager.set_setting('network_interface', '')
+            self.db_manager.set_setting('fanout_interfaces', '')
             self.db_manager.set_setting('source_ip', '')
             self.db_manager.set_setting('dest_ip', '')
+            self.db_manager.set_setting('send_engine', ENGINE_SCAPY)
+            self.db_manager.set_setting('batch_size', str(DEFAULT_BATCH_SIZE))
+            self.db_manager.set_setting('pacing_mode', PACING_DEFAULT)
+            self.db_manager.set_setting('pacing_rate', '1.0')
+            self.db_manager.set_setting('loop_count', '1')
+            self.db_manager.set_setting('loop_duration', '0')
+            self.db_manager.set_setting('send_workers', '1')
+            self.db_manager.set_setting('prefetch_budget', str(DEFAULT_MEMORY_BUDGET // (1024 * 1024)))
+            self.db_manager.set_setting('telemetry_dir', '')
             
             # 发送设置改变信号
             self.settings_changed.emit()
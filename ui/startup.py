@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动计时和后台预加载
+不依赖Qt，主程序在导入界面模块之前就可以开始计时
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+class StartupTimer:
+    """记录启动各阶段（导入模块、创建页面、后台预加载）的耗时"""
+    
+    def __init__(self):
+        self.origin = time.perf_counter()
+        # 是否在启动完成后输出报告（主程序按命令行参数设置）
+        self.enabled = False
+        # (阶段名称, 开始时刻, 耗时, 嵌套层级)，时刻以秒为单位、相对于开始计时
+        self.records = []
+        self._local = threading.local()
+        
+    @contextmanager
+    def measure(self, name: str):
+        """记录with块的耗时，嵌套的阶段在报告中缩进显示"""
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            self.records.append((name, start - self.origin, time.perf_counter() - start, depth))
+            
+    def mark(self, name: str):
+        """记录一个时间点（耗时为0）"""
+        self.records.append((name, time.perf_counter() - self.origin, 0.0, 0))
+        
+    def report(self) -> str:
+        """返回按开始时刻排列的启动耗时报告"""
+        lines = ["启动耗时（开始时刻 / 耗时，毫秒）:"]
+        for name, start, duration, depth in sorted(self.records, key=lambda record: (record[1], record[3])):
+            lines.append(f"  {start * 1000:8.1f} {duration * 1000:8.1f}  {'  ' * depth}{name}")
+        return "\n".join(lines)
+
+# 整个进程共用的启动计时器
+startup_timer = StartupTimer()
+
+def warm_up():
+    """在后台线程中预加载界面启动时用不到、发包和设置页面才需要的模块"""
+    with startup_timer.measure("后台预加载 psutil"):
+        import psutil  # noqa: F401
+    with startup_timer.measure("后台预加载 scapy"):
+        from network.packet_sender import SCAPY_AVAILABLE, load_scapy
+        if SCAPY_AVAILABLE:
+            load_scapy()
\ No newline at end of file